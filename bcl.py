@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Command Line
+One entry point for the pipeline scripts:
+
+    bcl slides           generate or update the player slides
+    bcl serve            keep the slide generator running with a local HTTP API
+    bcl split            build the player slides as several smaller decks
+    bcl package          embed the linked photos of a draft deck
+    bcl sort             sort the player slides by name
+    bcl verify           verify the photos in the deck
+    bcl reset            remove every player slide, keeping the template
+    bcl dedupe           find and remove duplicate player photos
+    bcl photos           store photos once and link them by phone number
+    bcl web-photos       build web sizes of the photos and their manifest
+    bcl sql              generate the player data migration
+    bcl import-results   generate a bulk import of auction results
+    bcl roster           summarize and check the roster
+    bcl manifest         query the deck manifest
+
+Arguments after the command go to that script (`bcl slides --help` lists
+its options). --deck, --roster and --photos before the command set the
+paths every script uses (see output/pipeline_config.py).
+
+Each command imports only its own script, so python-pptx, PIL and NumPy
+are loaded only by the commands that use them; `bcl roster` and
+`bcl manifest` need none of them.
+
+Install it by linking it onto your PATH:
+    ln -s "$PWD/bcl.py" ~/.local/bin/bcl
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+REPO_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_DIR / "output"))
+sys.path.insert(0, str(REPO_DIR))
+import pipeline_config
+
+
+# Command: (module, description); the module's main() parses the remaining arguments
+SCRIPTS = {
+    'slides': ('generate_player_slides', "generate or update the player slides"),
+    'serve': ('deck_server', "keep the slide generator running with a local HTTP API"),
+    'split': ('split_decks', "build the player slides as several smaller decks"),
+    'package': ('package_deck', "embed the linked photos of a draft deck"),
+    'sort': ('sort_slides_by_name', "sort the player slides by name"),
+    'verify': ('verify_images', "verify the photos in the deck"),
+    'reset': ('reset_and_regenerate', "remove every player slide, keeping the template"),
+    'dedupe': ('remove_duplicates', "find and remove duplicate player photos"),
+    'photos': ('photo_store', "store photos once and link them by phone number"),
+    'web-photos': ('web_photos', "build web sizes of the photos and their manifest"),
+    'sql': ('generate_update_sql', "generate the player data migration"),
+    'import-results': ('import_auction_results', "generate a bulk import of auction results"),
+}
+
+BUILTINS = {
+    'roster': "summarize and check the roster",
+    'manifest': "query the deck manifest",
+}
+
+
+def run_script(command: str, args: List[str]) -> None:
+    """Run a pipeline script's main() with the given arguments."""
+    module = importlib.import_module(SCRIPTS[command][0])
+    sys.argv = [f"bcl {command}", *args]
+    module.main()
+
+
+def count_by(values) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def roster_command(args: List[str]) -> None:
+    """Summary of the roster and the entries that need attention."""
+    parser = argparse.ArgumentParser(prog="bcl roster", description=BUILTINS['roster'])
+    parser.add_argument('--no-cache', action='store_true', help="parse the roster file without the binary cache")
+    parser.add_argument('--strict', action='store_true', help="exit with status 1 if any problem is found")
+    options = parser.parse_args(args)
+
+    from roster import Category, load_roster
+
+    roster_path = pipeline_config.roster_path()
+    if not roster_path.exists():
+        print(f"Error: Roster not found: {roster_path}")
+        sys.exit(1)
+    players = load_roster(roster_path, use_cache=not options.no_cache)
+
+    print(f"Roster: {roster_path} ({len(players)} players)")
+    for category, count in sorted(count_by(player.category.value or '(none)' for player in players).items()):
+        print(f"  {category}: {count}")
+    for player_type, count in sorted(count_by(player.player_type.value for player in players).items()):
+        print(f"  {player_type}: {count}")
+
+    phone_counts = count_by(player.phone for player in players if player.has_phone)
+    problems = [
+        ("no usable phone number (no slide)", [p for p in players if not p.has_phone]),
+        ("repeated phone number", [p for p in players if phone_counts.get(p.phone, 0) > 1]),
+        ("unknown category", [p for p in players if p.category is Category.UNKNOWN]),
+        ("no age", [p for p in players if p.age is None]),
+        ("marked not valid", [p for p in players if not p.valid]),
+    ]
+    found = 0
+    for label, matches in problems:
+        if not matches:
+            continue
+        found += len(matches)
+        print(f"{label}: {len(matches)}")
+        for player in matches[:10]:
+            print(f"  {player.name or '(no name)'} ({player.phone or 'no phone'})")
+        if len(matches) > 10:
+            print(f"  ... and {len(matches) - 10} more")
+    if not found:
+        print("No problems found")
+    if found and options.strict:
+        sys.exit(1)
+
+
+def manifest_command(args: List[str]) -> None:
+    """What the deck manifest records, overall or for matching players."""
+    parser = argparse.ArgumentParser(prog="bcl manifest", description=BUILTINS['manifest'])
+    parser.add_argument('query', nargs='?',
+                        help="phone number or part of a player's name to show the slides of")
+    options = parser.parse_args(args)
+
+    from deck_manifest import load_manifest, manifest_path_for, record_hash, slide_keys
+    from roster import load_roster
+
+    pptx_path = pipeline_config.deck_path()
+    manifest_path = manifest_path_for(pptx_path)
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        print(f"No manifest for {pptx_path.name}; run `bcl slides` to build the deck")
+        sys.exit(1)
+    recorded = manifest['players']
+
+    roster_path = pipeline_config.roster_path()
+    players = [player for player in load_roster(roster_path) if player.has_phone] if roster_path.exists() else []
+    player_by_key = dict(zip(slide_keys([player.phone for player in players]), players))
+
+    if options.query is None:
+        print(f"Manifest: {manifest_path}")
+        print(f"Settings: {', '.join(f'{key}={value}' for key, value in manifest['settings'].items())}")
+        print(f"Player slides recorded: {len(recorded)}")
+        if players:
+            # Photo changes need the photos hashed; `bcl slides` checks those
+            new = [key for key in player_by_key if key not in recorded]
+            changed = [key for key, player in player_by_key.items()
+                       if key in recorded and recorded[key]['record'] != record_hash(player.record())]
+            removed = [key for key in recorded if key not in player_by_key]
+            print(f"Since the last build ({roster_path.name}): {len(new)} new, "
+                  f"{len(changed)} changed, {len(removed)} removed players")
+        return
+
+    query = options.query.lower()
+    matches = [key for key in recorded
+               if key.startswith(options.query)
+               or (key in player_by_key and query in player_by_key[key].name.lower())]
+    if not matches:
+        print(f"No player slide matches '{options.query}'")
+        sys.exit(1)
+    for key in sorted(matches, key=lambda key: recorded[key]['position']):
+        entry = recorded[key]
+        player = player_by_key.get(key)
+        name = player.name if player else '(not in the roster)'
+        current = player is not None and record_hash(player.record()) == entry['record']
+        print(f"{key}: {name}")
+        print(f"  slide {entry['position']} (id {entry['slide_id']}), "
+              f"record {'up to date' if current else 'changed since the last build'}, "
+              f"photo {entry['photo'][:12] if entry['photo'] else 'none'}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the shared options and the command."""
+    commands = {**{command: description for command, (_, description) in SCRIPTS.items()}, **BUILTINS}
+    epilog = "commands:\n" + "\n".join(f"  {command:<16} {description}" for command, description in commands.items())
+    parser = argparse.ArgumentParser(
+        prog="bcl", description="BCL Re-Auction 2025 pipeline.", epilog=epilog,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--deck', type=Path,
+                        help=f"player deck (default: output/{pipeline_config.DECK_NAME}, or ${pipeline_config.DECK_ENV})")
+    parser.add_argument('--roster', type=Path,
+                        help=f"roster file (default: output/players_data.json, or ${pipeline_config.ROSTER_ENV})")
+    parser.add_argument('--photos', type=Path,
+                        help=f"player photo directory (default: output/, or ${pipeline_config.PHOTOS_ENV})")
+    parser.add_argument('command', choices=list(commands), metavar='command', help="see the list below")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="arguments for the command")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+
+    # Scripts read the shared paths from the environment
+    for env, value in ((pipeline_config.DECK_ENV, args.deck), (pipeline_config.ROSTER_ENV, args.roster),
+                       (pipeline_config.PHOTOS_ENV, args.photos)):
+        if value is not None:
+            os.environ[env] = str(value)
+
+    if args.command == 'roster':
+        roster_command(args.args)
+    elif args.command == 'manifest':
+        manifest_command(args.args)
+    else:
+        run_script(args.command, args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Pipeline Benchmarks
+Times the slide pipeline scripts on synthetic rosters and photo sets of
+150, 1,000 and 10,000 players and compares the results with a stored
+baseline, so regressions show up before auction day.
+
+For every roster size a workspace is laid out like the repository (the
+scripts, players_data.json, the photos and a template-only deck in
+output/, remove_duplicates.py next to it) and each script is run in its
+own process. Each step records wall time, per-stage times (from the
+script's stage metrics report), peak RSS and output file size.
+
+benchmarks/baseline.json holds results for the default sizes, with the
+machine they were taken on in its "meta". Wall times only compare on
+similar hardware; on another machine, save a baseline of your own first.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py                     # 150, 1000 and 10000 players
+    python3 benchmarks/run_benchmarks.py --sizes 150 1000
+    python3 benchmarks/run_benchmarks.py --save-baseline     # store results as the new baseline
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = REPO_DIR / "output"
+sys.path.insert(0, str(OUTPUT_DIR))
+from deck_writer import StreamingDeckWriter
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+DATA_DIR = BENCH_DIR / ".data"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+DEFAULT_SIZES = [150, 1000, 10000]
+DATASET_VERSION = 1
+
+DECK_NAME = "Re-Auction-2025-BCL-Players.pptx"
+SOURCE_DECK = OUTPUT_DIR / DECK_NAME
+
+# Pixel sizes seen in the real photo set (phone cameras and WhatsApp forwards)
+PHOTO_SIZES = [
+    (1536, 2048), (1536, 2048), (1536, 2048), (768, 1024), (768, 1024),
+    (900, 1600), (2048, 2048), (720, 1280), (960, 1280), (1200, 1600), (3024, 4032),
+]
+PHOTO_POOL_SIZE = 24
+
+# Share of players with an exact duplicate photo ("<phone>-1.jpg"),
+# a ".jpeg" photo, no photo at all and no phone number
+DUPLICATE_RATE = 0.03
+JPEG_EXTENSION_RATE = 0.05
+MISSING_PHOTO_RATE = 0.02
+MISSING_PHONE_RATE = 0.01
+
+CATEGORIES = ['All Rounder', 'All Rounder', 'Batsman', 'Batsman', 'Bowler', 'Wicket Keeper', '']
+
+# Script steps, in run order: (step, script, arguments, stdin, outputs).
+# Per-stage times come from the stage metrics report each script writes.
+STEPS = [
+    ('generate_cold', 'output/generate_player_slides.py', [], None, [DECK_NAME]),
+    ('generate_noop', 'output/generate_player_slides.py', [], None, [DECK_NAME]),
+    ('sort', 'output/sort_slides_by_name.py', [], None, [DECK_NAME]),
+    ('verify', 'output/verify_images.py', [], None, []),
+    ('remove_duplicates', 'remove_duplicates.py', [], "no\n", []),
+]
+
+# Runs a script as __main__ and records its peak RSS (KB) on exit. On Linux a
+# child's rusage also counts the parent's memory at fork time, so the script
+# reads its own high-water mark from /proc instead.
+LAUNCHER = """
+import atexit, os, resource, runpy, sys
+def report():
+    try:
+        with open('/proc/self/status') as f:
+            peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    except (OSError, StopIteration):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak //= 1024
+    with open(os.environ['BENCH_PEAK_RSS_FILE'], 'w') as f:
+        f.write(str(peak))
+atexit.register(report)
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+
+def synthetic_phone(rng: random.Random, used: set) -> str:
+    """Unique 10-digit mobile number."""
+    while True:
+        phone = f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}"
+        if phone not in used:
+            used.add(phone)
+            return phone
+
+
+def render_base_photo(rng: random.Random, size: Tuple[int, int]) -> bytes:
+    """A photo-like JPEG: smooth, noisy content that compresses like a real photo."""
+    width, height = size
+    channels = [Image.effect_noise((max(1, width // 16), max(1, height // 16)), rng.randint(40, 90))
+                for _ in range(3)]
+    img = Image.merge('RGB', channels).resize(size, Image.Resampling.BICUBIC)
+    grain = Image.effect_noise(size, 12).convert('RGB')
+    img = Image.blend(img, grain, 0.15)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=rng.randint(85, 95))
+    return buffer.getvalue()
+
+
+def tag_photo(jpeg: bytes, tag: str) -> bytes:
+    """Copy of a JPEG with a comment segment, so every photo has distinct content."""
+    comment = tag.encode('ascii')
+    return jpeg[:2] + b'\xff\xfe' + struct.pack('>H', len(comment) + 2) + comment + jpeg[2:]
+
+
+def create_dataset(players_count: int, seed: int = 2025) -> Path:
+    """
+    Create (or reuse) a synthetic roster and photo set for `players_count` players.
+    Returns the dataset directory holding players_data.json and photos/.
+    """
+    dataset_dir = DATA_DIR / f"players-{players_count}"
+    info_path = dataset_dir / "dataset.json"
+    if info_path.exists():
+        with open(info_path, 'r', encoding='utf-8') as f:
+            if json.load(f).get('version') == DATASET_VERSION:
+                return dataset_dir
+
+    print(f"Creating synthetic dataset: {players_count} players")
+    if dataset_dir.exists():
+        shutil.rmtree(dataset_dir)
+    photos_dir = dataset_dir / "photos"
+    photos_dir.mkdir(parents=True)
+
+    rng = random.Random(seed + players_count)
+    pool = [render_base_photo(rng, rng.choice(PHOTO_SIZES)) for _ in range(PHOTO_POOL_SIZE)]
+
+    players = []
+    used_phones = set()
+    counts = {'photos': 0, 'duplicates': 0, 'missing': 0}
+    for number in range(1, players_count + 1):
+        phone = synthetic_phone(rng, used_phones)
+        players.append({
+            'Name': f"Player {number:05d}",
+            'Age': f"{rng.randint(18, 60)} years",
+            'Category': rng.choice(CATEGORIES),
+            'Ph': '?' if rng.random() < MISSING_PHONE_RATE else phone,
+            'PlayerType': 'ICON' if rng.random() < 0.03 else 'Regular',
+        })
+
+        if rng.random() < MISSING_PHOTO_RATE:
+            counts['missing'] += 1
+            continue
+        photo = tag_photo(rng.choice(pool), phone)
+        ext = '.jpeg' if rng.random() < JPEG_EXTENSION_RATE else '.jpg'
+        (photos_dir / f"{phone}{ext}").write_bytes(photo)
+        counts['photos'] += 1
+        if rng.random() < DUPLICATE_RATE:
+            (photos_dir / f"{phone}-1{ext}").write_bytes(photo)
+            counts['duplicates'] += 1
+
+    with open(dataset_dir / "players_data.json", 'w', encoding='utf-8') as f:
+        json.dump(players, f, indent=2, ensure_ascii=False)
+    with open(info_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': DATASET_VERSION, 'players': players_count, 'seed': seed, **counts}, f, indent=2)
+
+    print(f"  {counts['photos']} photos, {counts['duplicates']} duplicates, {counts['missing']} players without a photo")
+    return dataset_dir
+
+
+def create_template_deck(template_path: Path) -> None:
+    """Template-only copy of the real deck: every base part, no player slides."""
+    StreamingDeckWriter(SOURCE_DECK, template_path).close()
+
+
+def create_workspace(dataset_dir: Path, template_path: Path) -> Path:
+    """Lay out a fresh copy of the repository scripts around a dataset."""
+    workspace = Path(tempfile.mkdtemp(prefix="bcl-bench-"))
+    output_dir = workspace / "output"
+    output_dir.mkdir()
+
+    shutil.copy2(REPO_DIR / "remove_duplicates.py", workspace)
+    for script in OUTPUT_DIR.glob("*.py"):
+        shutil.copy2(script, output_dir)
+    shutil.copy2(dataset_dir / "players_data.json", output_dir)
+    shutil.copy2(template_path, output_dir / DECK_NAME)
+
+    # Photos are hard-linked; no step modifies them
+    for photo in (dataset_dir / "photos").iterdir():
+        try:
+            os.link(photo, output_dir / photo.name)
+        except OSError:
+            shutil.copy2(photo, output_dir / photo.name)
+    return workspace
+
+
+def run_step(workspace: Path, script: str, args: List[str], stdin: Optional[str], outputs: List[str]) -> Dict:
+    """Run one script in its own process and measure it."""
+    script_path = workspace / script
+    peak_path = workspace / ".peak_rss"
+    metrics_path = workspace / ".metrics.json"
+    for path in (peak_path, metrics_path):
+        path.unlink(missing_ok=True)
+    env = dict(os.environ, PYTHONUNBUFFERED='1', BENCH_PEAK_RSS_FILE=str(peak_path),
+               BCL_PROFILE='timing', BCL_METRICS=str(metrics_path))
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-c', LAUNCHER, str(script_path), *args],
+        cwd=script_path.parent, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    if stdin:
+        proc.stdin.write(stdin)
+    proc.stdin.close()
+
+    tail: List[str] = []
+    for line in proc.stdout:
+        tail = (tail + [line.rstrip()])[-20:]
+    proc.stdout.close()
+    proc.wait()
+    end = time.perf_counter()
+
+    stages = {}
+    if metrics_path.exists():
+        with open(metrics_path, 'r', encoding='utf-8') as f:
+            stages = {stage: stats['total_s'] for stage, stats in json.load(f)['stages'].items()}
+
+    output_dir = script_path.parent
+    result = {
+        'wall_s': end - start,
+        'peak_rss_kb': int(peak_path.read_text()) if peak_path.exists() else 0,
+        'output_bytes': sum((output_dir / name).stat().st_size
+                            for name in outputs if (output_dir / name).exists()),
+        'stages': stages,
+        'returncode': proc.returncode,
+    }
+    if proc.returncode != 0:
+        result['output_tail'] = tail
+    return result
+
+
+def run_size(players_count: int, template_path: Path, keep: bool = False) -> Dict[str, Dict]:
+    """Run every step against a fresh workspace for one roster size."""
+    dataset_dir = create_dataset(players_count)
+    workspace = create_workspace(dataset_dir, template_path)
+    results = {}
+    try:
+        for step, script, args, stdin, outputs in STEPS:
+            print(f"  {step:<20}", end='', flush=True)
+            result = run_step(workspace, script, args, stdin, outputs)
+            results[step] = result
+            status = "" if result['returncode'] == 0 else f"  ✗ exit code {result['returncode']}"
+            print(f"{result['wall_s']:8.2f} s{status}")
+    finally:
+        if keep:
+            print(f"  Workspace kept at: {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, min_seconds: float) -> List[str]:
+    """Steps that got slower, or grew in memory or output size, beyond the tolerance."""
+    regressions = []
+    for size, steps in results['results'].items():
+        for step, result in steps.items():
+            base = baseline.get('results', {}).get(size, {}).get(step)
+            if base is None:
+                continue
+            label = f"{size} players / {step}"
+            if result['wall_s'] > base['wall_s'] * (1 + tolerance) and result['wall_s'] - base['wall_s'] > min_seconds:
+                regressions.append(f"{label}: wall time {base['wall_s']:.2f} s -> {result['wall_s']:.2f} s")
+            if result['peak_rss_kb'] > base['peak_rss_kb'] * (1 + tolerance):
+                regressions.append(f"{label}: peak RSS {base['peak_rss_kb'] / 1024:.1f} MB -> "
+                                   f"{result['peak_rss_kb'] / 1024:.1f} MB")
+            if result['output_bytes'] > base['output_bytes'] * (1 + tolerance):
+                regressions.append(f"{label}: output {base['output_bytes'] / 1e6:.1f} MB -> "
+                                   f"{result['output_bytes'] / 1e6:.1f} MB")
+    return regressions
+
+
+def change(value: float, base: Optional[float]) -> str:
+    """Relative change against the baseline, e.g. '+12%'."""
+    if not base:
+        return ""
+    return f"{(value - base) / base * 100:+.0f}%"
+
+
+def print_report(results: Dict, baseline: Optional[Dict]) -> None:
+    """Table of all steps, with per-stage times and changes against the baseline."""
+    print()
+    print("=" * 78)
+    print("Results")
+    print("=" * 78)
+    print(f"{'Players':>8}  {'Step':<20}{'Wall (s)':>10}{'':>6}{'Peak RSS (MB)':>15}{'':>6}{'Output (MB)':>13}")
+    print("-" * 78)
+    for size, steps in results['results'].items():
+        for step, result in steps.items():
+            base = (baseline or {}).get('results', {}).get(size, {}).get(step, {})
+            print(f"{size:>8}  {step:<20}"
+                  f"{result['wall_s']:>10.2f}{change(result['wall_s'], base.get('wall_s')):>6}"
+                  f"{result['peak_rss_kb'] / 1024:>15.1f}{change(result['peak_rss_kb'], base.get('peak_rss_kb')):>6}"
+                  f"{result['output_bytes'] / 1e6:>13.1f}")
+            stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in result['stages'].items())
+            print(f"{'':>10}  stages: {stages}")
+            for line in result.get('output_tail', []):
+                print(f"{'':>10}  | {line}")
+    print("=" * 78)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the slide pipeline on synthetic rosters.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="roster sizes to benchmark (default: 150 1000 10000)")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE,
+                        help="baseline results to compare against (default: benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    parser.add_argument('--json', type=Path, help="also write the results to this file")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed relative growth before a step counts as a regression (default: 0.2)")
+    parser.add_argument('--min-seconds', type=float, default=0.25,
+                        help="ignore wall time regressions smaller than this (default: 0.25)")
+    parser.add_argument('--keep', action='store_true', help="keep the workspaces for inspection")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+
+    print("=" * 60)
+    print("BCL Re-Auction 2025 - Pipeline Benchmarks")
+    print("=" * 60)
+    print()
+
+    if not SOURCE_DECK.exists():
+        print(f"Error: PowerPoint file not found: {SOURCE_DECK}")
+        sys.exit(1)
+
+    results = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bcl-bench-template-") as template_dir:
+        template_path = Path(template_dir) / DECK_NAME
+        create_template_deck(template_path)
+
+        for players_count in args.sizes:
+            print(f"{players_count} players")
+            results['results'][str(players_count)] = run_size(players_count, template_path, args.keep)
+            print()
+
+    baseline = None
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to: {args.json}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to: {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    failed = [f"{size} players / {step}: exit code {result['returncode']}"
+              for size, steps in results['results'].items()
+              for step, result in steps.items() if result['returncode'] != 0]
+    regressions = failed + compare(results, baseline, args.tolerance, args.min_seconds)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) against the baseline from {baseline['meta']['date']}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\n✓ No regressions against the baseline from {baseline['meta']['date']}")
+
+
+if __name__ == "__main__":
+    main()
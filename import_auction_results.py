@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Generate a SQL script that imports an auction results export in bulk.
+
+The input is the CSV downloaded from the admin Manage page (Order, Player
+Name, Category, Team, Amount, Sold At), optionally with a Phone column to
+identify players whose names repeat. The script loads every row with one
+INSERT while the per-row triggers on auction_results are disabled, then
+applies their effect in a few set-based statements: team balances and
+player counts, and player status and auction order. Everything runs in
+one transaction; rows that do not resolve to exactly one player and team
+abort it.
+
+With --verify, the script instead runs the import both ways, through the
+row triggers and in bulk, compares the resulting teams, players and
+results, and rolls everything back.
+
+Sold At values are read in --tz (India time by default). Slash dates
+such as 03/04/2025 are day/month in an en-IN export and month/day in an
+en-US one; pass --date-order when the export has any that read both ways.
+
+Apply the script with psql or the Supabase SQL editor:
+    python3 import_auction_results.py results.csv [--date-order dmy] [--replace] [--verify]
+    psql "$DATABASE_URL" -f results.import.sql
+"""
+
+import argparse
+import csv
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+# Slash date formats of the export's "Sold At" column by date order
+# (toLocaleString output varies by browser locale)
+SOLD_AT_FORMATS = {
+    'dmy': ['%d/%m/%Y, %I:%M:%S %p',   # en-IN
+            '%d/%m/%Y, %H:%M:%S'],     # en-GB
+    'mdy': ['%m/%d/%Y, %I:%M:%S %p'],  # en-US
+}
+
+# The auction is held in India
+DEFAULT_TZ = 'Asia/Kolkata'
+
+TRIGGERS = ['trigger_update_team_balance', 'trigger_refund_team']
+
+
+def quote(value: Optional[str]) -> str:
+    """SQL string literal, or NULL."""
+    if value is None:
+        return 'NULL'
+    return "'" + value.replace("'", "''") + "'"
+
+
+def read_date(text: str, date_order: str) -> Optional[datetime]:
+    """A slash date in one date order, or None if it doesn't read that way."""
+    for fmt in SOLD_AT_FORMATS[date_order]:
+        try:
+            return datetime.strptime(text.upper(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_sold_at(text: str, tz: ZoneInfo, date_order: Optional[str] = None) -> Optional[str]:
+    """
+    ISO timestamp with offset from the export's Sold At column, or None if
+    it can't be read. Times without an offset are in `tz`. Without a
+    `date_order`, raises ValueError for a slash date that reads both ways.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        sold_at = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        orders = [date_order] if date_order else list(SOLD_AT_FORMATS)
+        readings = {reading for reading in (read_date(text, order) for order in orders) if reading is not None}
+        if len(readings) > 1:
+            raise ValueError(f"'{text}' reads as day/month and as month/day")
+        if not readings:
+            return None
+        sold_at = readings.pop()
+    if sold_at.tzinfo is None:
+        sold_at = sold_at.replace(tzinfo=tz)
+    return sold_at.isoformat()
+
+
+def load_results(csv_path: Path, tz: ZoneInfo, date_order: Optional[str] = None) -> List[Dict]:
+    """Rows of an auction results export."""
+    results = []
+    unreadable_dates = 0
+    ambiguous_dates = []
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            try:
+                order = int(row['Order'])
+                amount = float(row['Amount'].replace(',', ''))
+            except (KeyError, ValueError) as e:
+                print(f"Error: {csv_path.name} line {line}: bad Order or Amount ({e})")
+                sys.exit(1)
+            try:
+                sold_at = parse_sold_at(row.get('Sold At', ''), tz, date_order)
+            except ValueError as e:
+                ambiguous_dates.append(f"line {line}: {e}")
+                sold_at = None
+            if sold_at is None and row.get('Sold At'):
+                unreadable_dates += 1
+            results.append({
+                'line': line,
+                'phone': row.get('Phone') or None,
+                'name': row.get('Player Name', ''),
+                'category': row.get('Category') or None,
+                'team': row.get('Team', ''),
+                'amount': f"{amount:.2f}",
+                'order': order,
+                'sold_at': sold_at,
+            })
+    if ambiguous_dates:
+        print(f"Error: {csv_path.name} has Sold At dates that read both ways; "
+              f"pass --date-order dmy (en-IN, en-GB) or mdy (en-US)")
+        for problem in ambiguous_dates[:10]:
+            print(f"  {problem}")
+        if len(ambiguous_dates) > 10:
+            print(f"  ... and {len(ambiguous_dates) - 10} more")
+        sys.exit(1)
+    if unreadable_dates:
+        print(f"Warning: {unreadable_dates} Sold At value(s) could not be read; those rows get the import time")
+    return results
+
+
+def staging_statements(results: List[Dict]) -> List[str]:
+    """Load the export into a temp table and resolve its players and teams."""
+    rows = [
+        f"  ({result['line']}, {quote(result['phone'])}, {quote(result['name'])}, {quote(result['category'])}, "
+        f"{quote(result['team'])}, {result['amount']}, {result['order']}, {quote(result['sold_at'])})"
+        for result in results
+    ]
+    return [
+        '''CREATE TEMP TABLE auction_import (
+  line INTEGER, phone TEXT, player_name TEXT, category TEXT, team_name TEXT,
+  final_amount NUMERIC(10, 2), auction_order INTEGER, sold_at TIMESTAMP WITH TIME ZONE
+) ON COMMIT DROP;''',
+        'INSERT INTO auction_import VALUES\n' + ',\n'.join(rows) + ';',
+        # Players by phone when the export has one, otherwise by name (and category)
+        '''CREATE TEMP TABLE auction_resolved ON COMMIT DROP AS
+SELECT i.*,
+  ARRAY(SELECT p.id FROM players p
+        WHERE CASE WHEN i.phone IS NOT NULL THEN p.phone = i.phone
+                   ELSE lower(trim(p.name)) = lower(i.player_name)
+                        AND (i.category IS NULL OR p.category = i.category) END) AS player_ids,
+  ARRAY(SELECT t.id FROM teams t WHERE lower(t.name) = lower(i.team_name)) AS team_ids
+FROM auction_import i;''',
+        '''DO $$
+DECLARE
+  problems TEXT;
+BEGIN
+  SELECT string_agg(format('line %s (%s, %s): %s player(s), %s team(s)', line, player_name, team_name,
+                           cardinality(player_ids), cardinality(team_ids)), '; ' ORDER BY line)
+  INTO problems
+  FROM auction_resolved
+  WHERE cardinality(player_ids) <> 1 OR cardinality(team_ids) <> 1;
+  IF problems IS NOT NULL THEN
+    RAISE EXCEPTION 'Auction results that do not match exactly one player and team: %', problems;
+  END IF;
+END $$;''',
+    ]
+
+
+def insert_statement() -> str:
+    return '''INSERT INTO auction_results (player_id, team_id, final_amount, auction_order, sold_at)
+SELECT player_ids[1], team_ids[1], final_amount, auction_order, COALESCE(sold_at, NOW())
+FROM auction_resolved
+ORDER BY auction_order, line;'''
+
+
+def trigger_statements(replace: bool) -> List[str]:
+    """The import as the app does it: row by row, through the triggers."""
+    statements = ['DELETE FROM auction_results;'] if replace else []
+    return statements + [insert_statement()]
+
+
+def bulk_statements(replace: bool) -> List[str]:
+    """The import with the row triggers disabled and their effect applied set-based."""
+    statements = [f"ALTER TABLE auction_results DISABLE TRIGGER {trigger};" for trigger in TRIGGERS]
+    statements.append('''CREATE TEMP TABLE auction_removed ON COMMIT DROP AS
+SELECT player_id, team_id, final_amount FROM auction_results WHERE false;''')
+    if replace:
+        statements.append('''WITH removed AS (DELETE FROM auction_results RETURNING player_id, team_id, final_amount)
+INSERT INTO auction_removed SELECT * FROM removed;''')
+    statements.append(insert_statement())
+    # What the refund trigger does for each removed sale and the sale trigger for each new one
+    statements.append('''UPDATE teams t
+SET current_balance = t.current_balance + d.refunded - d.charged,
+    players_count = t.players_count - d.removed + d.added
+FROM (
+  SELECT team_id, sum(refunded) AS refunded, sum(charged) AS charged, sum(removed) AS removed, sum(added) AS added
+  FROM (
+    SELECT team_id, final_amount AS refunded, 0 AS charged, 1 AS removed, 0 AS added FROM auction_removed
+    UNION ALL
+    SELECT team_ids[1], 0, final_amount, 0, 1 FROM auction_resolved
+  ) changes
+  GROUP BY team_id
+) d
+WHERE t.id = d.team_id;''')
+    statements.append('''UPDATE players p
+SET status = 'unsold', auction_order = NULL
+FROM auction_removed r
+WHERE p.id = r.player_id
+  AND NOT EXISTS (SELECT 1 FROM auction_resolved i WHERE i.player_ids[1] = p.id);''')
+    statements.append('''UPDATE players p
+SET status = 'sold', auction_order = i.auction_order
+FROM auction_resolved i
+WHERE p.id = i.player_ids[1];''')
+    statements.extend(f"ALTER TABLE auction_results ENABLE TRIGGER {trigger};" for trigger in TRIGGERS)
+    return statements
+
+
+# Everything the triggers touch, in a comparable form
+STATE_QUERY = '''SELECT jsonb_build_object(
+    'teams', (SELECT jsonb_agg(jsonb_build_array(id, current_balance, players_count) ORDER BY id) FROM teams),
+    'players', (SELECT jsonb_agg(jsonb_build_array(id, status, auction_order) ORDER BY id) FROM players),
+    'results', (SELECT jsonb_agg(jsonb_build_array(player_id, team_id, final_amount, auction_order, sold_at)
+                                 ORDER BY player_id) FROM auction_results))'''
+
+
+def verify_block(replace: bool) -> str:
+    """DO block running both paths, each rolled back, and comparing their outcome."""
+    def attempt(statements: List[str], variable: str) -> str:
+        body = '\n'.join(statements)
+        return f'''  BEGIN
+{body}
+    {STATE_QUERY} INTO {variable};
+    RAISE EXCEPTION USING MESSAGE = 'bcl_verify_rollback';
+  EXCEPTION WHEN raise_exception THEN
+    IF SQLERRM <> 'bcl_verify_rollback' THEN RAISE; END IF;
+  END;'''
+
+    return f'''DO $verify$
+DECLARE
+  trigger_state JSONB;
+  bulk_state JSONB;
+  section TEXT;
+BEGIN
+{attempt(trigger_statements(replace), 'trigger_state')}
+{attempt(bulk_statements(replace), 'bulk_state')}
+  FOR section IN SELECT unnest(ARRAY['teams', 'players', 'results']) LOOP
+    IF trigger_state -> section IS DISTINCT FROM bulk_state -> section THEN
+      RAISE EXCEPTION 'Bulk import differs from the trigger path in %', section;
+    END IF;
+  END LOOP;
+  RAISE NOTICE 'Bulk import matches the trigger path (% results)',
+    jsonb_array_length(COALESCE(bulk_state -> 'results', '[]'::jsonb));
+END $verify$;'''
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Generate a bulk import script for an auction results export.")
+    parser.add_argument('results', type=Path, help="auction results CSV exported from the Manage page")
+    parser.add_argument('--date-order', choices=sorted(SOLD_AT_FORMATS),
+                        help="order of day and month in slash dates: dmy (en-IN, en-GB) or mdy (en-US); "
+                             "required when a date reads both ways")
+    parser.add_argument('--tz', default=DEFAULT_TZ,
+                        help=f"time zone of Sold At values without an offset (default: {DEFAULT_TZ})")
+    parser.add_argument('--replace', action='store_true',
+                        help="replace all existing auction results (restore) instead of adding to them")
+    parser.add_argument('--verify', action='store_true',
+                        help="write a script that compares the bulk import with the trigger path and rolls back")
+    parser.add_argument('--output', type=Path,
+                        help="script to write (default: <results>.import.sql, or <results>.verify.sql with --verify)")
+    args = parser.parse_args()
+
+    if not args.results.exists():
+        print(f"Error: {args.results} not found")
+        sys.exit(1)
+
+    try:
+        tz = ZoneInfo(args.tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"Error: Unknown time zone: {args.tz}")
+        sys.exit(1)
+
+    results = load_results(args.results, tz, args.date_order)
+    if not results:
+        print(f"No auction results in {args.results.name}")
+        return
+
+    mode = 'replacing all existing results' if args.replace else 'added to existing results'
+    sql_lines = [
+        f"-- Bulk import of {len(results)} auction results from {args.results.name} ({mode})",
+        f"-- Generated {datetime.now().isoformat(timespec='seconds')} by import_auction_results.py",
+        '',
+        'BEGIN;',
+        '',
+    ]
+    sql_lines.extend(statement + '\n' for statement in staging_statements(results))
+    if args.verify:
+        sql_lines.append(verify_block(args.replace))
+        sql_lines.extend(['', 'ROLLBACK;'])
+    else:
+        sql_lines.append('-- Row triggers are off for this transaction; their effect is applied below')
+        sql_lines.extend(statement + '\n' for statement in bulk_statements(args.replace))
+        sql_lines.append('COMMIT;')
+
+    suffix = '.verify.sql' if args.verify else '.import.sql'
+    output_path = args.output or args.results.with_suffix(suffix)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sql_lines) + '\n')
+
+    print(f"Generated {output_path} ({len(results)} auction results, {mode})")
+    if args.verify:
+        print("Run it against a copy of the database; it reports whether both paths agree and changes nothing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Player Asset Index
+Persistent index of the photos in a directory: phone number, format, pixel
+size, content hash, perceptual hashes and mtime of each image. Entries of
+deleted files are dropped on refresh. Only files whose size or mtime
+changed since the last run are re-read, and pixel sizes come from image
+headers only. Content hashes are computed when first needed, on a thread
+pool, and kept until the file changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+
+from photo_derivatives import file_hash
+
+
+INDEX_VERSION = 2
+INDEX_FILENAME = ".asset_index.json"
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+# Bytes read from each end of a file for its partial hash
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# hashlib releases the GIL on large updates, so hashing threads overlap with reads
+HASH_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+# "9611999614", "9611999614-1" (another player sharing the phone), "9611999614_2" and
+# "9611999614 (3)" (copies of the same photo), "+91 9611999614", "9611999614-1_2"
+PHOTO_NAME_PATTERN = re.compile(
+    r'^(?:\+?91[\s-]?)?(?P<phone>\d{10})(?:\s*-\s*(?P<suffix>\d+))?'
+    r'(?:\s*(?:_\s*(?P<copy>\d+)|\((?P<paren>\d+)\)))?$'
+)
+
+
+def partial_hash(filepath: Path) -> str:
+    """Hash of a file's size and its first and last PARTIAL_HASH_BYTES."""
+    size = filepath.stat().st_size
+    hash_sha = hashlib.sha256(str(size).encode('ascii'))
+    with open(filepath, 'rb') as f:
+        hash_sha.update(f.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            f.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+            hash_sha.update(f.read(PARTIAL_HASH_BYTES))
+        elif size > PARTIAL_HASH_BYTES:
+            hash_sha.update(f.read())
+    return hash_sha.hexdigest()
+
+
+def parse_photo_name(stem: str) -> Optional[Tuple[str, int]]:
+    """
+    Extract (key, variant) from a photo file name.
+    The key is the phone number with its player suffix, if any ("9900922363-1");
+    the photo itself is variant 0 and its "_N" / " (N)" copies are variants N.
+    """
+    match = PHOTO_NAME_PATTERN.match(stem.strip())
+    if not match:
+        return None
+    key = match.group('phone') + (f"-{match.group('suffix')}" if match.group('suffix') else '')
+    return key, int(match.group('copy') or match.group('paren') or 0)
+
+
+def suffixed_owner(key: str, phones: set) -> Optional[str]:
+    """
+    The suffixed roster phone whose photo a suffixed file key names, or None.
+    The photo extractor numbers the photos of "9900922363-1" as "9900922363-11", ...
+    """
+    base, _, suffix = key.partition('-')
+    owners = [phone for phone in phones
+              if phone.startswith(f"{base}-") and suffix.startswith(phone.partition('-')[2])]
+    return max(owners, key=len) if owners else None
+
+
+class AssetIndex:
+    """
+    Index of the images in `images_dir`, stored in `images_dir/.asset_index.json`.
+
+    Entries are keyed by file name and hold phone (the photo key), variant, format, width,
+    height, size, mtime_ns and hash (SHA-256 of the content, None until it
+    is needed). Call `refresh()` to bring the index up to date and `save()`
+    to persist it.
+    """
+
+    def __init__(self, images_dir: Path, index_path: Optional[Path] = None):
+        self.images_dir = images_dir
+        self.index_path = index_path or images_dir / INDEX_FILENAME
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not read asset index {self.index_path.name}: {e}")
+            return
+        if data.get('version') == INDEX_VERSION:
+            self.entries = data.get('entries', {})
+
+    def save(self) -> None:
+        """Write the index atomically, if anything changed."""
+        if not self._dirty:
+            return
+        tmp_path = self.index_path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'entries': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Bring the index up to date with the directory.
+        Returns counts of 'added', 'updated', 'removed' and 'unchanged' entries.
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        seen = set()
+
+        with os.scandir(self.images_dir) as it:
+            for dir_entry in it:
+                name = dir_entry.name
+                if not dir_entry.is_file() or Path(name).suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                seen.add(name)
+                stat = dir_entry.stat()
+                old = self.entries.get(name)
+                if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                    counts['unchanged'] += 1
+                    continue
+                self.entries[name] = self._describe(Path(dir_entry.path), stat)
+                counts['updated' if old else 'added'] += 1
+                self._dirty = True
+
+        for name in [name for name in self.entries if name not in seen]:
+            del self.entries[name]
+            counts['removed'] += 1
+            self._dirty = True
+
+        return counts
+
+    def _describe(self, path: Path, stat: os.stat_result) -> Dict:
+        """Index entry for one file, reading only the image header."""
+        parsed = parse_photo_name(path.stem)
+        try:
+            with Image.open(path) as img:
+                image_format = img.format
+                width, height = img.size
+        except Exception as e:
+            print(f"Warning: Could not read image header for {path.name}: {e}")
+            image_format, width, height = None, 0, 0
+        return {
+            'phone': parsed[0] if parsed else None,
+            'variant': parsed[1] if parsed else None,
+            'format': image_format,
+            'width': width,
+            'height': height,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': None,
+        }
+
+    def path(self, name: str) -> Path:
+        """Full path of an indexed file."""
+        return self.images_dir / name
+
+    def entry_for(self, path: Path) -> Optional[Dict]:
+        """Index entry of a file in the indexed directory."""
+        if path.parent != self.images_dir:
+            return None
+        return self.entries.get(path.name)
+
+    def current_entry(self, path: Path) -> Optional[Dict]:
+        """Index entry of a file, if the file is unchanged since it was indexed."""
+        entry = self.entry_for(path)
+        if entry is not None:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return None
+            if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                return entry
+        return None
+
+    def content_hash(self, path: Path) -> str:
+        """Content hash of a file, from the index when the file is unchanged."""
+        entry = self.current_entry(path)
+        if entry is None:
+            return file_hash(path)
+        if entry['hash'] is None:
+            entry['hash'] = file_hash(path)
+            self._dirty = True
+        return entry['hash']
+
+    def _fill(self, names: Iterable[str], field: str, hash_func: Callable[[Path], str]) -> int:
+        """Compute a hash field for the named entries that lack it, on a thread pool."""
+        pending = [name for name in names if self.entries[name].get(field) is None]
+        if not pending:
+            return 0
+        with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+            for name, digest in zip(pending, pool.map(hash_func, [self.path(name) for name in pending])):
+                self.entries[name][field] = digest
+        self._dirty = True
+        return len(pending)
+
+    def fill_batch(self, names: Iterable[str], field: str,
+                   compute: Callable[[List[Path]], Dict[Path, object]]) -> int:
+        """
+        Store a derived value (e.g. a perceptual hash) for the named entries
+        that lack it, computed by one call over all their paths. Values are
+        kept until the file changes. Returns how many were computed.
+        """
+        pending = [name for name in names if field not in self.entries[name]]
+        if not pending:
+            return 0
+        values = compute([self.path(name) for name in pending])
+        for name in pending:
+            self.entries[name][field] = values[self.path(name)]
+        self._dirty = True
+        return len(pending)
+
+    def hash_files(self, paths: Iterable[Path]) -> int:
+        """Make sure the given indexed files have content hashes; returns how many were hashed."""
+        names = [path.name for path in paths if self.current_entry(path) is not None]
+        return self._fill(names, 'hash', file_hash)
+
+    def duplicate_groups(self, names: Optional[Iterable[str]] = None) -> Tuple[Dict[str, List[Path]], Dict[str, int]]:
+        """
+        Groups of byte-identical files among `names` (default: every entry), keyed by hash.
+
+        Files are compared in tiers: by size, then by a partial hash of their
+        first and last blocks, and only files still sharing both get a full
+        hash. Returns the groups and how many files reached each tier.
+        """
+        names = list(self.entries) if names is None else list(names)
+
+        def survivors(candidates: List[str], key) -> List[str]:
+            groups: Dict = {}
+            for name in candidates:
+                groups.setdefault(key(name), []).append(name)
+            return [name for group in groups.values() if len(group) > 1 for name in group]
+
+        same_size = survivors(names, lambda name: self.entries[name]['size'])
+        self._fill(same_size, 'partial', partial_hash)
+        same_partial = survivors(same_size, lambda name: (self.entries[name]['size'], self.entries[name]['partial']))
+        self._fill(same_partial, 'hash', file_hash)
+
+        groups: Dict[str, List[Path]] = {}
+        for name in sorted(same_partial):
+            groups.setdefault(self.entries[name]['hash'], []).append(self.path(name))
+        duplicates = {digest: paths for digest, paths in groups.items() if len(paths) > 1}
+        tiers = {'files': len(names), 'same_size': len(same_size), 'full_hashed': len(same_partial)}
+        return duplicates, tiers
+
+    def phone_map(self, phones: Iterable[str] = ()) -> Dict[str, Path]:
+        """
+        Map each phone number (suffixed ones included) to its photo.
+
+        The photo itself wins over its copies; otherwise the lowest-numbered
+        copy is used. A suffixed photo that is not named after one of the
+        roster `phones` goes to the suffixed phone it extends (see
+        suffixed_owner), unless that player has a photo of their own.
+        """
+        phones = set(phones)
+        best: Dict[str, Tuple[int, int, str]] = {}
+        for name, entry in self.entries.items():
+            phone = entry['phone']
+            if phone is None:
+                continue
+            extended = 0
+            if phones and '-' in phone and phone not in phones:
+                owner = suffixed_owner(phone, phones)
+                if owner is not None:
+                    phone, extended = owner, 1
+            candidate = (extended, entry['variant'], name)
+            if phone not in best or candidate < best[phone]:
+                best[phone] = candidate
+        return {phone: self.path(name) for phone, (_, _, name) in best.items()}
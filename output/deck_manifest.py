@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Deck Manifest
+Records which slide holds which player, together with a hash of the
+player's record and photo, so the deck can be updated incrementally.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+MANIFEST_VERSION = 1
+
+
+class SyncPlan(NamedTuple):
+    """Slides to keep, (re)build and drop, by slide key."""
+    keep: List[str]
+    build: List[str]
+    drop: List[str]
+
+
+def manifest_path_for(pptx_path: Path) -> Path:
+    """Manifest file stored next to the deck."""
+    return pptx_path.with_suffix('.manifest.json')
+
+
+def record_hash(player: Dict) -> str:
+    """Hash of a player's record, independent of key order."""
+    data = json.dumps(player, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def slide_keys(phones: List[str]) -> List[str]:
+    """
+    Key each slide by phone number, suffixed ones ("9900922363-1") included.
+    Repeated phone numbers in the roster get '#2', '#3', ... suffixes.
+    """
+    seen: Dict[str, int] = {}
+    keys = []
+    for phone in phones:
+        seen[phone] = seen.get(phone, 0) + 1
+        keys.append(phone if seen[phone] == 1 else f"{phone}#{seen[phone]}")
+    return keys
+
+
+def new_manifest(settings: Dict) -> Dict:
+    """Empty manifest for a deck built with the given settings."""
+    return {'version': MANIFEST_VERSION, 'settings': settings, 'players': {}}
+
+
+def load_manifest(manifest_path: Path) -> Optional[Dict]:
+    """Load the manifest, or None if it is missing or unreadable."""
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not read manifest {manifest_path.name}: {e}")
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        print(f"Warning: Manifest {manifest_path.name} has an unknown version, ignoring it")
+        return None
+    return manifest
+
+
+def save_manifest(manifest_path: Path, manifest: Dict) -> None:
+    """Write the manifest atomically."""
+    tmp_path = manifest_path.with_suffix(f".tmp{os.getpid()}")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def plan_sync(manifest: Dict, entries: Dict[str, Dict], slide_ids: set, rebuild: Iterable[str] = ()) -> SyncPlan:
+    """
+    Compare the roster against the manifest.
+
+    `entries` maps slide key -> {'record': hash, 'photo': hash or None} for
+    the current roster; `slide_ids` are the slide ids present in the deck.
+    Unchanged players whose slide is still in the deck are kept, unless
+    their key is in `rebuild`. New and changed players are built; slides of
+    changed and removed players are dropped.
+    """
+    recorded = manifest['players']
+    rebuild = set(rebuild)
+    keep, build, drop = [], [], []
+
+    for key, entry in entries.items():
+        old = recorded.get(key)
+        if (old is not None and key not in rebuild and old['slide_id'] in slide_ids
+                and old['record'] == entry['record'] and old['photo'] == entry['photo']):
+            keep.append(key)
+        else:
+            build.append(key)
+            if old is not None:
+                drop.append(key)
+
+    drop.extend(key for key in recorded if key not in entries)
+    return SyncPlan(keep, build, drop)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Merge Decks
+Combines several decks into one package, in order. The first deck provides
+the template slide, masters, layouts and theme; every deck then contributes
+its slides after its own first (template) slide. Slide parts and media are
+renamed to fit the merged package and identical media are stored once.
+
+Usage:
+    python3 deck_merge.py merged.pptx part-1.pptx part-2.pptx [...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+from deck_writer import SourceDeck, StreamingDeckWriter
+
+
+def merge_decks(deck_paths: List[Path], output_path: Path, keep_first: bool = False) -> List[int]:
+    """
+    Merge decks into `output_path` and return the ids of the appended slides, in order.
+
+    The first slide of the first deck is always kept as the template. With
+    `keep_first`, the first slide of every other deck is appended as well.
+    """
+    writer = StreamingDeckWriter(deck_paths[0], output_path)
+    try:
+        for partname in writer.source.slide_partnames()[1:]:
+            writer.copy_slide(writer.source, partname)
+        for deck_path in deck_paths[1:]:
+            with SourceDeck(deck_path) as deck:
+                slides = deck.slide_partnames()
+                for partname in slides if keep_first else slides[1:]:
+                    writer.copy_slide(deck, partname)
+        writer.close()
+    except BaseException:
+        # Don't leave a half-written package behind
+        writer.abort()
+        raise
+    return writer.slide_ids
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Merge decks into one package, in order.")
+    parser.add_argument('output', type=Path, help="merged deck to write")
+    parser.add_argument('decks', type=Path, nargs='+', help="decks to merge; the first provides the template")
+    parser.add_argument('--keep-first', action='store_true',
+                        help="also append the first slide of every deck after the first")
+    args = parser.parse_args()
+
+    for deck_path in args.decks:
+        if not deck_path.exists():
+            print(f"Error: PowerPoint file not found: {deck_path}")
+            sys.exit(1)
+    if args.output.resolve() in {deck_path.resolve() for deck_path in args.decks}:
+        print("Error: Output file must not be one of the input decks")
+        sys.exit(1)
+
+    print(f"Merging {len(args.decks)} deck(s) into {args.output.name}")
+    slide_ids = merge_decks(args.decks, args.output, keep_first=args.keep_first)
+    print(f"✓ Merged deck saved with {len(slide_ids) + 1} slides")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Deck Reader
+Read-only access to a deck's package as a zip: the slide list from
+presentation.xml, and individual slide parts and relationships on demand.
+Nothing is parsed until it is asked for, so reading slide order or a few
+slides stays cheap for any deck size. Media sizes and checksums come from
+the zip directory without inflating the blobs.
+"""
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+from lxml import etree
+
+
+NS = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'pr': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'ct': 'http://schemas.openxmlformats.org/package/2006/content-types',
+}
+
+RT_OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+RT_SLIDE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide'
+RT_SLIDE_LAYOUT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout'
+RT_IMAGE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+RT_NOTES_SLIDE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+RT_MEDIA = {
+    RT_IMAGE,
+    'http://schemas.openxmlformats.org/officeDocument/2006/relationships/audio',
+    'http://schemas.openxmlformats.org/officeDocument/2006/relationships/video',
+    'http://schemas.microsoft.com/office/2007/relationships/media',
+}
+
+CONTENT_TYPES = '[Content_Types].xml'
+
+
+def rels_name_for(partname: str) -> str:
+    """Zip name of the relationships part belonging to a part ('' is the package)."""
+    directory, filename = posixpath.split(partname)
+    return posixpath.join(directory, '_rels', f"{filename}.rels")
+
+
+def resolve_target(source_partname: str, target: str) -> str:
+    """Zip name of a relationship target, relative to its source part."""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_partname), target))
+
+
+def relative_target(source_partname: str, partname: str) -> str:
+    """Relationship target of `partname` as seen from `source_partname`."""
+    return posixpath.relpath(partname, posixpath.dirname(source_partname))
+
+
+def linked_file(target: str) -> Optional[Path]:
+    """Local file an external relationship links to, or None if it is not a file URI."""
+    url = urlparse(target)
+    if url.scheme != 'file':
+        return None
+    return Path(url2pathname(url.path))
+
+
+def serialize(element) -> bytes:
+    """XML bytes with declaration, as written by python-pptx."""
+    return etree.tostring(element, encoding='UTF-8', standalone=True)
+
+
+class SlideRef(NamedTuple):
+    """A slide as listed in presentation.xml."""
+    slide_id: int
+    rId: str
+    partname: str
+
+
+class PictureRef(NamedTuple):
+    """A picture on a slide and the media part it shows, from the zip directory."""
+    rId: Optional[str]
+    media: Optional[str]   # None when the slide has no such relationship; a URL for a linked picture
+    size: int              # uncompressed size; -1 when the media part (or linked file) is missing
+    crc: int               # 0 for a linked picture
+
+
+class DeckReader:
+    """
+    Read-only view of a deck's package.
+
+    Only the package relationships, presentation.xml and its relationships
+    are read on open; slides, relationships and media are read when asked.
+    """
+
+    def __init__(self, pptx_path: Path):
+        self.path = pptx_path
+        self.zip = zipfile.ZipFile(pptx_path)
+        self.names = set(self.zip.namelist())
+
+        package_rels = self.read_rels('')
+        self.presentation_partname = next(
+            resolve_target('', target) for _, rel_type, target in package_rels if rel_type == RT_OFFICE_DOCUMENT
+        )
+        self.presentation = etree.fromstring(self.zip.read(self.presentation_partname))
+        self.presentation_rels = self.read_rels(self.presentation_partname)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self.zip.close()
+
+    def read_rels(self, partname: str, external: bool = False) -> List[Tuple[str, str, str]]:
+        """(rId, type, target) of a part's internal (or, with `external`, external) relationships."""
+        rels_name = rels_name_for(partname)
+        if rels_name not in self.names:
+            return []
+        rels = etree.fromstring(self.zip.read(rels_name))
+        return [
+            (rel.get('Id'), rel.get('Type'), rel.get('Target'))
+            for rel in rels.findall('pr:Relationship', NS)
+            if (rel.get('TargetMode') == 'External') == external
+        ]
+
+    def slides(self) -> List[SlideRef]:
+        """The slides, in presentation order."""
+        targets = {rId: target for rId, _, target in self.presentation_rels}
+        refs = []
+        for sldId in self.presentation.findall('p:sldIdLst/p:sldId', NS):
+            rId = sldId.get(f"{{{NS['r']}}}id")
+            refs.append(SlideRef(int(sldId.get('id')), rId, resolve_target(self.presentation_partname, targets[rId])))
+        return refs
+
+    def slide_partnames(self) -> List[str]:
+        """Zip names of the slides, in presentation order."""
+        return [ref.partname for ref in self.slides()]
+
+    def slide_xml(self, partname: str):
+        """Parsed slide part."""
+        return etree.fromstring(self.zip.read(partname))
+
+    def media_info(self, partname: str) -> Optional[zipfile.ZipInfo]:
+        """Zip directory entry of a part, or None if it is not in the package."""
+        try:
+            return self.zip.getinfo(partname)
+        except KeyError:
+            return None
+
+    def pictures(self, partname: str, slide=None) -> List[PictureRef]:
+        """Pictures on a slide (including grouped ones) with their media, without reading the media."""
+        slide = self.slide_xml(partname) if slide is None else slide
+        targets = {rId: resolve_target(partname, target) for rId, _, target in self.read_rels(partname)}
+        links = {rId: target for rId, _, target in self.read_rels(partname, external=True)}
+        refs = []
+        for blip in slide.iterfind('.//p:pic/p:blipFill/a:blip', NS):
+            rId = blip.get(f"{{{NS['r']}}}embed")
+            if rId is None and blip.get(f"{{{NS['r']}}}link") in links:
+                # Draft decks link the photo file instead of embedding it
+                rId = blip.get(f"{{{NS['r']}}}link")
+                path = linked_file(links[rId])
+                size = path.stat().st_size if path is not None and path.is_file() else -1
+                refs.append(PictureRef(rId, links[rId], size, 0))
+                continue
+            media = targets.get(rId)
+            info = self.media_info(media) if media else None
+            refs.append(PictureRef(rId, media, info.file_size if info else -1, info.CRC if info else 0))
+        return refs
+
+    def content_type(self, partname: str) -> str:
+        """Content type of a part, from its override or its extension's default."""
+        types = etree.fromstring(self.zip.read(CONTENT_TYPES))
+        for override in types.findall('ct:Override', NS):
+            if override.get('PartName').lstrip('/') == partname:
+                return override.get('ContentType')
+        ext = posixpath.splitext(partname)[1].lstrip('.').lower()
+        for default in types.findall('ct:Default', NS):
+            if default.get('Extension').lower() == ext:
+                return default.get('ContentType')
+        return 'application/octet-stream'
+
+
+def first_table_texts(slide) -> List[str]:
+    """Cell texts of the first table on a parsed slide, row by row ([] if there is none)."""
+    table = slide.find('.//a:tbl', NS)
+    if table is None:
+        return []
+    texts = []
+    for cell in table.iterfind('a:tr/a:tc', NS):
+        paragraphs = cell.findall('a:txBody/a:p', NS)
+        texts.append('\n'.join(''.join(t.text or '' for t in p.iterfind('.//a:t', NS)) for p in paragraphs).strip())
+    return texts
+
+
+def first_table_cell_text(slide) -> str:
+    """Text of the first cell of the first table on a parsed slide ('' if there is none)."""
+    texts = first_table_texts(slide)
+    return texts[0] if texts else ''
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Deck Server
+Keeps the slide generator resident for auction day. python-pptx, the open
+deck with its compiled template, the roster, the asset index and the photo
+cache are loaded once; each update only rebuilds the slides of new and
+changed players and saves the deck.
+
+The roster file and the photo directory are polled for changes, and a
+change updates the deck once the files have stopped changing. A local
+HTTP API triggers updates by hand:
+
+    GET  /status               deck, roster and last update (JSON)
+    POST /regenerate           update new, changed and removed players
+    POST /regenerate?full=1    rebuild every player slide
+    POST /regenerate/<phone>   rebuild one player's slide(s)
+
+Usage:
+    python3 deck_server.py [--port 8765] [--poll 2]
+    curl -X POST localhost:8765/regenerate/9876543210
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from pptx import Presentation
+
+from asset_index import IMAGE_EXTENSIONS, AssetIndex
+from deck_manifest import load_manifest, manifest_path_for, new_manifest, save_manifest, slide_keys
+from generate_player_slides import (CompiledTemplate, drop_slides, save_presentation, scan_player_images,
+                                    sync_slides)
+from photo_derivatives import DEFAULT_DPI, DEFAULT_QUALITY, DerivativeCache, file_hash
+from pipeline_config import deck_path, photos_dir, roster_path
+from roster import load_roster
+
+
+DEFAULT_PORT = 8765
+DEFAULT_POLL = 2.0
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(size, mtime) of a file, or None if it is missing."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class UnknownPlayer(Exception):
+    """A regenerate request for a phone number that has no slide."""
+
+
+class DeckService:
+    """The deck, template, roster and photos held in memory between updates."""
+
+    def __init__(self, pptx_path: Path, json_path: Path, images_dir: Path, cache_dir: Path, settings: Dict,
+                 placeholder: Optional[Path] = None):
+        self.pptx_path = pptx_path
+        self.json_path = json_path
+        self.manifest_path = manifest_path_for(pptx_path)
+        self.settings = settings
+        self.placeholder = placeholder
+        self.asset_index = AssetIndex(images_dir)
+        self.derivatives = None
+        if not settings['original_photos']:
+            max_bytes = settings['max_kb'] * 1024 if settings['max_kb'] else None
+            self.derivatives = DerivativeCache(cache_dir, dpi=settings['dpi'], quality=settings['quality'],
+                                               max_bytes=max_bytes, hash_source=self.asset_index.content_hash)
+
+        # One update at a time; status reads never wait for it
+        self.lock = threading.Lock()
+        self.busy = False
+        self.started = time.time()
+        self.updates = 0
+        self.last_update: Optional[Dict] = None
+
+        self.prs = None
+        self.template: Optional[CompiledTemplate] = None
+        self.manifest: Optional[Dict] = None
+        self.players = []
+        self.image_map: Dict[str, Path] = {}
+        self._deck_signature = None
+        self._roster_signature = None
+        self._load_deck()
+        self._load_roster()
+
+    def _load_deck(self) -> None:
+        """(Re)load the deck and compile its template slide."""
+        print(f"Loading PowerPoint: {self.pptx_path.name}")
+        self._deck_signature = file_signature(self.pptx_path)
+        self.prs = Presentation(self.pptx_path)
+        if len(self.prs.slides) == 0:
+            raise ValueError(f"{self.pptx_path.name} has no slides")
+        self.template = CompiledTemplate(self.prs.slides[0])
+        self.manifest = load_manifest(self.manifest_path)
+        if self.manifest is not None and self.manifest['settings'] != self.settings:
+            print("Photo settings changed since the last run, the first update rebuilds all slides")
+            self.manifest = None
+
+    def _load_roster(self) -> None:
+        # A roster caught half-written fails to parse; the previous one stays until it reads cleanly
+        signature = file_signature(self.json_path)
+        self.players = load_roster(self.json_path)
+        self._roster_signature = signature
+        print(f"Loaded {len(self.players)} players from {self.json_path.name}")
+
+    def _reload_changed(self) -> None:
+        """Pick up a deck written by another tool and an edited roster."""
+        if file_signature(self.pptx_path) != self._deck_signature:
+            print("Deck changed on disk, reloading it")
+            self._load_deck()
+        if file_signature(self.json_path) != self._roster_signature:
+            self._load_roster()
+
+    def keys_for_phone(self, phone: str) -> List[str]:
+        """Slide keys of a phone number ('#2', '#3' suffixes for repeated numbers)."""
+        keys = slide_keys([player.phone for player in self.players if player.has_phone])
+        return [key for key in keys if key.split('#')[0] == phone]
+
+    def _drop_player_slides(self) -> int:
+        removed = drop_slides(self.prs, {sldId.id for sldId in self.prs.slides._sldIdLst[1:]})
+        self.manifest = new_manifest(self.settings)
+        return removed
+
+    def regenerate(self, phone: Optional[str] = None, full: bool = False, reason: str = 'request') -> Dict:
+        """Bring the deck up to date; `phone` or `full` also rebuild unchanged slides."""
+        with self.lock:
+            self.busy = True
+            try:
+                return self._regenerate(phone, full, reason)
+            except UnknownPlayer:
+                raise
+            except Exception:
+                # The deck in memory may be half updated; start again from the file
+                self._deck_signature = None
+                raise
+            finally:
+                self.busy = False
+
+    def _regenerate(self, phone: Optional[str], full: bool, reason: str) -> Dict:
+        started = time.perf_counter()
+        self._reload_changed()
+        self.image_map = scan_player_images(self.asset_index, self.players)
+
+        rebuild = []
+        if phone is not None:
+            rebuild = self.keys_for_phone(phone)
+            if not rebuild:
+                raise UnknownPlayer(f"No player with phone number {phone} in {self.json_path.name}")
+
+        removed = 0
+        if full or self.manifest is None:
+            removed = self._drop_player_slides()
+
+        stats = sync_slides(self.prs, self.template, self.players, self.image_map, self.manifest,
+                            self.derivatives, self.asset_index.content_hash, rebuild,
+                            placeholder=self.placeholder, link=self.settings.get('draft', False))
+        stats['slides_removed'] += removed
+        saved = stats.pop('changed') or removed > 0
+        if saved:
+            save_presentation(self.prs, self.pptx_path)
+            self._deck_signature = file_signature(self.pptx_path)
+        save_manifest(self.manifest_path, self.manifest)
+
+        self.updates += 1
+        self.last_update = dict(
+            stats,
+            reason=reason,
+            phone=phone,
+            full=full,
+            saved=saved,
+            total_slides=len(self.prs.slides),
+            finished=datetime.now().isoformat(timespec='seconds'),
+            duration_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        print(f"Update ({reason}{', ' + phone if phone else ''}): {stats['slides_created']} built, "
+              f"{stats['slides_removed']} removed, {'saved' if saved else 'nothing to save'} "
+              f"in {self.last_update['duration_ms']} ms")
+        return self.last_update
+
+    def status(self) -> Dict:
+        return {
+            'deck': str(self.pptx_path),
+            'roster': str(self.json_path),
+            'photos': str(self.asset_index.images_dir),
+            'slides': len(self.prs.slides),
+            'players': len(self.players),
+            'player_photos': len(self.image_map),
+            'busy': self.busy,
+            'updates': self.updates,
+            'last_update': self.last_update,
+            'uptime_s': round(time.time() - self.started),
+        }
+
+    def inputs_signature(self) -> Tuple:
+        """Cheap fingerprint of the roster and photo directory: names, sizes and mtimes only."""
+        photos = []
+        with os.scandir(self.asset_index.images_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    stat = entry.stat()
+                    photos.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return file_signature(self.json_path), tuple(sorted(photos))
+
+    def watch(self, interval: float, stop: threading.Event) -> None:
+        """Update the deck after the inputs change and then stay unchanged for one poll."""
+        last = self.inputs_signature()
+        pending = False
+        while not stop.wait(interval):
+            try:
+                current = self.inputs_signature()
+                if current != last:
+                    last, pending = current, True
+                elif pending:
+                    pending = False
+                    self.regenerate(reason='watch')
+            except Exception as e:
+                print(f"Warning: Update after a file change failed: {e}")
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """JSON API of the deck server."""
+
+    service: DeckService = None
+
+    def _send(self, status: int, body: Dict) -> None:
+        data = (json.dumps(body, indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if urlparse(self.path).path.rstrip('/') == '/status':
+            self._send(200, self.service.status())
+        else:
+            self._send(404, {'error': f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if not parts or parts[0] != 'regenerate' or len(parts) > 2:
+            self._send(404, {'error': f"Unknown endpoint {self.path}"})
+            return
+        full = parse_qs(url.query).get('full', ['0'])[0] not in ('0', '', 'false')
+        phone = parts[1] if len(parts) == 2 else None
+        try:
+            self._send(200, self.service.regenerate(phone, full))
+        except UnknownPlayer as e:
+            self._send(404, {'error': str(e)})
+        except Exception as e:
+            self._send(500, {'error': f"Update failed: {e}"})
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Keep the slide generator running with a local HTTP API.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL,
+                        help=f"seconds between checks of the roster and photos, 0 to not watch (default: {DEFAULT_POLL})")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI,
+                        help=f"resolution photos are resized to for their slot (default: {DEFAULT_DPI})")
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY,
+                        help=f"JPEG quality of resized photos (default: {DEFAULT_QUALITY})")
+    parser.add_argument('--max-kb', type=int, default=None,
+                        help="lower the quality of resized photos until they fit this size")
+    parser.add_argument('--original-photos', action='store_true',
+                        help="embed the original photo files without resizing")
+    parser.add_argument('--placeholder', type=Path,
+                        help="photo shown for players without a usable photo (stored once in the deck)")
+    parser.add_argument('--draft', action='store_true',
+                        help="link the photos from the slides instead of embedding them; "
+                             "`bcl package` embeds them into the final deck")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    pptx_path = deck_path()
+    json_path = roster_path()
+    for path in (pptx_path, json_path):
+        if not path.exists():
+            print(f"Error: {path} not found")
+            sys.exit(1)
+
+    settings = {
+        'dpi': args.dpi,
+        'quality': args.quality,
+        'max_kb': args.max_kb,
+        'original_photos': args.original_photos,
+    }
+    if args.placeholder:
+        if not args.placeholder.exists():
+            print(f"Error: Placeholder photo not found: {args.placeholder}")
+            sys.exit(1)
+        settings['placeholder'] = file_hash(args.placeholder)
+    if args.draft:
+        settings['draft'] = True
+    service = DeckService(pptx_path, json_path, photos_dir(), Path(__file__).parent / ".photo_cache", settings,
+                          args.placeholder)
+    # Start from an up-to-date deck
+    service.regenerate(reason='startup')
+
+    stop = threading.Event()
+    if args.poll > 0:
+        threading.Thread(target=service.watch, args=(args.poll, stop), daemon=True).start()
+        print(f"Watching {json_path.name} and {service.asset_index.images_dir} every {args.poll:g}s")
+
+    RequestHandler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+    print(f"Deck server listening on http://{args.host}:{args.port} (GET /status, POST /regenerate[/<phone>])")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Streaming Deck Writer
+Writes a deck slide by slide: each finished slide part and its photo go
+into the output package as soon as they are complete, so memory stays flat
+whatever the roster size. Only presentation.xml, its relationships and the
+content types are written at the end.
+"""
+
+import hashlib
+import io
+import posixpath
+import re
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from lxml import etree
+
+from deck_reader import (CONTENT_TYPES, NS, RT_IMAGE, RT_MEDIA, RT_NOTES_SLIDE, RT_SLIDE, RT_SLIDE_LAYOUT,
+                         DeckReader, relative_target, rels_name_for, resolve_target, serialize)
+
+
+CT_SLIDE = 'application/vnd.openxmlformats-officedocument.presentationml.slide+xml'
+
+IMAGE_CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'bmp': 'image/bmp',
+    'tif': 'image/tiff',
+    'tiff': 'image/tiff',
+    'wmf': 'image/x-wmf',
+}
+
+# Already-compressed media, stored as-is when a package is copied
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.mp3', '.mp4', '.m4a', '.mov'}
+
+# Relationship ids used by every streamed slide; the template's static
+# shapes (artwork, links) are numbered from FIRST_STATIC_RID
+LAYOUT_RID = 'rId1'
+PHOTO_RID = 'rId2'
+FIRST_STATIC_RID = 3
+
+
+class SourceDeck(DeckReader):
+    """
+    Read-only view of the template deck's package: which parts make up
+    the deck without its player slides, and which slide is the template.
+    """
+
+    def __init__(self, pptx_path: Path):
+        super().__init__(pptx_path)
+
+        sld_ids = self.presentation.findall('p:sldIdLst/p:sldId', NS)
+        if not sld_ids:
+            raise ValueError("PowerPoint file has no slides")
+        self.template_rId = sld_ids[0].get(f"{{{NS['r']}}}id")
+        self.template_slide_id = int(sld_ids[0].get('id'))
+        self.template_partname = next(
+            resolve_target(self.presentation_partname, target)
+            for rId, _, target in self.presentation_rels if rId == self.template_rId
+        )
+        self.template_layout_partname = next(
+            resolve_target(self.template_partname, target)
+            for _, rel_type, target in self.read_rels(self.template_partname) if rel_type == RT_SLIDE_LAYOUT
+        )
+        self.base_parts = self._reachable_parts()
+
+    def _reachable_parts(self) -> Set[str]:
+        """Parts reachable from the package root, skipping every slide but the template."""
+        reachable: Set[str] = set()
+        pending = ['']
+        while pending:
+            source = pending.pop()
+            for rId, rel_type, target in self.read_rels(source):
+                if source == self.presentation_partname and rel_type == RT_SLIDE and rId != self.template_rId:
+                    continue
+                partname = resolve_target(source, target)
+                if partname in reachable or partname not in self.names:
+                    continue
+                reachable.add(partname)
+                pending.append(partname)
+        return reachable
+
+    def base_entries(self) -> List[str]:
+        """Zip entries of the base parts and their relationships, minus the package-level parts."""
+        entries = set()
+        for partname in self.base_parts:
+            entries.add(partname)
+            if rels_name_for(partname) in self.names:
+                entries.add(rels_name_for(partname))
+        entries.discard(self.presentation_partname)
+        entries.discard(rels_name_for(self.presentation_partname))
+        return sorted(entries)
+
+    def template_package(self) -> io.BytesIO:
+        """A template-only copy of the deck, small enough to load with python-pptx."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as out:
+            out.writestr(CONTENT_TYPES, self.zip.read(CONTENT_TYPES))
+            out.writestr('_rels/.rels', self.zip.read('_rels/.rels'))
+            for name in self.base_entries():
+                out.writestr(name, self.zip.read(name))
+            presentation, presentation_rels = self.trimmed_presentation([])
+            out.writestr(self.presentation_partname, serialize(presentation))
+            out.writestr(rels_name_for(self.presentation_partname), serialize(presentation_rels))
+        buffer.seek(0)
+        return buffer
+
+    def trimmed_presentation(self, new_slides: List[Tuple[int, str, str]]):
+        """
+        presentation.xml and its relationships with the template slide
+        followed by `new_slides` as (slide id, rId, slide partname).
+        """
+        presentation = etree.fromstring(self.zip.read(self.presentation_partname))
+        rels = etree.fromstring(self.zip.read(rels_name_for(self.presentation_partname)))
+
+        sldIdLst = presentation.find('p:sldIdLst', NS)
+        for sldId in sldIdLst.findall('p:sldId', NS)[1:]:
+            sldIdLst.remove(sldId)
+        for rel in rels.findall('pr:Relationship', NS):
+            if rel.get('Type') == RT_SLIDE and rel.get('Id') != self.template_rId:
+                rels.remove(rel)
+
+        for slide_id, rId, partname in new_slides:
+            sldId = etree.SubElement(sldIdLst, f"{{{NS['p']}}}sldId")
+            sldId.set('id', str(slide_id))
+            sldId.set(f"{{{NS['r']}}}id", rId)
+            rel = etree.SubElement(rels, f"{{{NS['pr']}}}Relationship")
+            rel.set('Id', rId)
+            rel.set('Type', RT_SLIDE)
+            rel.set('Target', relative_target(self.presentation_partname, partname))
+        return presentation, rels
+
+    def next_rId_number(self) -> int:
+        """First rId number not used by the presentation's kept relationships."""
+        used = [
+            int(match.group(1)) for rId, rel_type, _ in self.presentation_rels
+            if (rel_type != RT_SLIDE or rId == self.template_rId) and (match := re.fullmatch(r'rId(\d+)', rId))
+        ]
+        return max(used + [0]) + 1
+
+
+class StreamingDeckWriter:
+    """
+    Builds a new deck from the template slide of `source_path`, writing
+    slides and photos to `output_path` one at a time.
+
+    Usage: `add_media_bytes()` for a slide's photo, then `add_slide()` with the
+    finished `p:sld` element, and `close()` once every slide is written.
+    Slides must reference their layout as LAYOUT_RID and photo as PHOTO_RID;
+    parts of the template that every slide shares are passed to `add_slide()`
+    and stay one part in the package. `copy_slide()` appends a slide of
+    another deck instead.
+    """
+
+    def __init__(self, source_path: Path, output_path: Path):
+        self.source = SourceDeck(source_path)
+        self.output_path = output_path
+        self._out = zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED)
+        self._written: Set[str] = set()
+        self._media_by_hash: Dict[str, str] = {}
+        self._new_slides: List[Tuple[int, str, str]] = []
+        self._extensions: Set[str] = set()
+        self._overrides: List[Tuple[str, str]] = []
+
+        for name in self.source.base_entries():
+            self._copy_entry(name)
+
+        self._next_rId = self.source.next_rId_number()
+        self._next_slide_id = self.source.template_slide_id + 1
+        self._next_name = 1
+
+    @property
+    def slide_ids(self) -> List[int]:
+        """Ids of the slides written so far, in order."""
+        return [slide_id for slide_id, _, _ in self._new_slides]
+
+    def template_package(self) -> io.BytesIO:
+        """Template-only copy of the source deck, for compiling the template slide."""
+        return self.source.template_package()
+
+    def _copy_entry(self, name: str) -> None:
+        """Stream one entry of the source package into the output; media are indexed by content."""
+        if not name.startswith('ppt/media/'):
+            with self.source.zip.open(name) as src, self._out.open(name, 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        else:
+            # Identical media added later (e.g. the template's artwork on merged slides) reuse this part
+            digest = hashlib.sha1()
+            with self.source.zip.open(name) as src, self._out.open(name, 'w') as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            self._media_by_hash.setdefault(digest.hexdigest(), name)
+        self._written.add(name)
+
+    def _unused_name(self, pattern: str) -> str:
+        """First name from `pattern` (with a {} counter) not already in the package."""
+        while True:
+            name = pattern.format(self._next_name)
+            self._next_name += 1
+            if name not in self._written and name not in self.source.names:
+                return name
+
+    def add_media_bytes(self, data: bytes, ext: str) -> str:
+        """Write a media blob into the package once and return its part name."""
+        key = hashlib.sha1(data).hexdigest()
+        if key in self._media_by_hash:
+            return self._media_by_hash[key]
+
+        ext = ext.lower().lstrip('.')
+        partname = self._unused_name(f"ppt/media/image{{}}.{ext}")
+        self._out.writestr(partname, data)
+        self._written.add(partname)
+        self._media_by_hash[key] = partname
+        self._extensions.add(ext)
+        return partname
+
+    def add_part(self, data: bytes, pattern: str, content_type: str) -> str:
+        """Write any other part under an unused name from `pattern` (with a {} counter)."""
+        partname = self._unused_name(pattern)
+        self._out.writestr(partname, data)
+        self._written.add(partname)
+        self._overrides.append((partname, content_type))
+        return partname
+
+    def _write_slide(self, xml: bytes, rels: List[Tuple[str, str, str, bool]]) -> int:
+        """
+        Write a slide part with relationships given as
+        (rId, type, target partname or external URL, is external).
+        """
+        number = len(self._new_slides) + 1
+        partname = f"ppt/slides/slide{number}.xml"
+        while partname in self._written:
+            number += 1
+            partname = f"ppt/slides/slide{number}.xml"
+
+        rels_element = etree.Element(f"{{{NS['pr']}}}Relationships", nsmap={None: NS['pr']})
+        for rId, rel_type, target, external in rels:
+            rel = etree.SubElement(rels_element, f"{{{NS['pr']}}}Relationship")
+            rel.set('Id', rId)
+            rel.set('Type', rel_type)
+            if external:
+                rel.set('Target', target)
+                rel.set('TargetMode', 'External')
+            else:
+                rel.set('Target', relative_target(partname, target))
+
+        self._out.writestr(partname, xml)
+        self._out.writestr(rels_name_for(partname), serialize(rels_element))
+        self._written.update([partname, rels_name_for(partname)])
+
+        slide_id = self._next_slide_id
+        self._next_slide_id += 1
+        self._new_slides.append((slide_id, f"rId{self._next_rId}", partname))
+        self._next_rId += 1
+        return slide_id
+
+    def add_slide(self, sld, media_partname: Optional[str] = None,
+                  shared_rels: Iterable[Tuple[str, str, str, bool]] = ()) -> int:
+        """
+        Write a finished slide part and its relationships; returns the slide id.
+        `shared_rels` (rId, type, target partname or external URL, is external)
+        relate the slide to parts already in the package.
+        """
+        rels = [(LAYOUT_RID, RT_SLIDE_LAYOUT, self.source.template_layout_partname, False)]
+        if media_partname:
+            rels.append((PHOTO_RID, RT_IMAGE, media_partname, False))
+        rels.extend(shared_rels)
+        return self._write_slide(serialize(sld), rels)
+
+    def copy_slide(self, deck: SourceDeck, partname: str) -> int:
+        """
+        Append a slide of another deck; returns the new slide id.
+
+        The slide keeps its own relationship ids. Its layout maps to the
+        layout with the same part name here (the template's layout if there
+        is none), media are stored once per unique content, other parts are
+        copied under new names and notes are left out.
+        """
+        rels = []
+        for rId, rel_type, target in deck.read_rels(partname):
+            target_partname = resolve_target(partname, target)
+            if rel_type == RT_SLIDE_LAYOUT:
+                if target_partname not in self._written:
+                    target_partname = self.source.template_layout_partname
+            elif rel_type in RT_MEDIA:
+                ext = posixpath.splitext(target_partname)[1]
+                target_partname = self.add_media_bytes(deck.zip.read(target_partname), ext)
+            elif rel_type == RT_NOTES_SLIDE:
+                continue
+            else:
+                stem, ext = posixpath.splitext(target_partname)
+                pattern = re.sub(r'\d*$', '', stem) + '{}' + ext
+                target_partname = self.add_part(deck.zip.read(target_partname), pattern,
+                                                deck.content_type(target_partname))
+            rels.append((rId, rel_type, target_partname, False))
+        for rId, rel_type, target in deck.read_rels(partname, external=True):
+            rels.append((rId, rel_type, target, True))
+        return self._write_slide(deck.zip.read(partname), rels)
+
+    def close(self) -> None:
+        """Write the package-level parts and finish the zip."""
+        presentation, presentation_rels = self.source.trimmed_presentation(self._new_slides)
+        self._out.writestr(self.source.presentation_partname, serialize(presentation))
+        self._out.writestr(rels_name_for(self.source.presentation_partname), serialize(presentation_rels))
+        self._written.update([self.source.presentation_partname,
+                              rels_name_for(self.source.presentation_partname)])
+        self._out.writestr('_rels/.rels', self.source.zip.read('_rels/.rels'))
+        self._written.add('_rels/.rels')
+        self._out.writestr(CONTENT_TYPES, serialize(self._content_types()))
+        self._out.close()
+        self.source.zip.close()
+
+    def abort(self) -> None:
+        """Close the package without finishing it and remove the partial output."""
+        self._out.close()
+        self.source.zip.close()
+        Path(self.output_path).unlink(missing_ok=True)
+
+    def _content_types(self):
+        """Content types of the source, trimmed to the parts written, plus new slides and media."""
+        types = etree.fromstring(self.source.zip.read(CONTENT_TYPES))
+        for override in types.findall('ct:Override', NS):
+            if override.get('PartName').lstrip('/') not in self._written:
+                types.remove(override)
+
+        defaults = {default.get('Extension').lower() for default in types.findall('ct:Default', NS)}
+        for ext in sorted(self._extensions - defaults):
+            default = etree.Element(f"{{{NS['ct']}}}Default")
+            default.set('Extension', ext)
+            default.set('ContentType', IMAGE_CONTENT_TYPES.get(ext, 'application/octet-stream'))
+            types.insert(0, default)
+
+        overrides = [(partname, CT_SLIDE) for _, _, partname in self._new_slides] + self._overrides
+        for partname, content_type in overrides:
+            override = etree.SubElement(types, f"{{{NS['ct']}}}Override")
+            override.set('PartName', f"/{partname}")
+            override.set('ContentType', content_type)
+        return types
+
+
+def write_slide_order(deck: DeckReader, slide_ids: List[int], output_path: Path) -> None:
+    """
+    Copy the package with its slides in the order of `slide_ids`.
+
+    Only presentation.xml changes; every other part is copied unchanged and
+    compressed media are stored rather than deflated again. Slides not in
+    `slide_ids` keep their relative order after the listed ones.
+    """
+    presentation = etree.fromstring(deck.zip.read(deck.presentation_partname))
+    sldIdLst = presentation.find('p:sldIdLst', NS)
+    by_id = {int(sldId.get('id')): sldId for sldId in sldIdLst.findall('p:sldId', NS)}
+    ordered = [by_id[slide_id] for slide_id in slide_ids]
+    ordered += [sldId for sldId in by_id.values() if sldId not in ordered]
+    for sldId in ordered:
+        sldIdLst.remove(sldId)
+        sldIdLst.append(sldId)
+
+    # Later duplicates of a name win, as when the package is read
+    entries = {info.filename: info for info in deck.zip.infolist()}
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as out:
+        for name, info in entries.items():
+            if name == deck.presentation_partname:
+                out.writestr(name, serialize(presentation))
+                continue
+            stored = posixpath.splitext(name)[1].lower() in STORED_EXTENSIONS
+            target = zipfile.ZipInfo(name, date_time=info.date_time)
+            target.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            with deck.zip.open(info) as src, out.open(target, 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
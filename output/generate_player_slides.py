@@ -5,24 +5,63 @@ Creates slides for all players using the first slide as a template.
 Replaces the left-hand side player photo and updates text content.
 """
 
-import json
+import argparse
+import os
 import sys
+import tempfile
 import copy
+import itertools
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
+from pptx.oxml.ns import nsuri, qn
+from pptx.oxml.shapes.graphfrm import CT_GraphicalObjectFrame
+from pptx.oxml.shapes.picture import CT_Picture
+from pptx.oxml.slide import CT_Slide
+from pptx.shapes.graphfrm import GraphicFrame
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.serialized import _ContentTypesItem
+from pptx.parts.image import Image as PackageImage, ImagePart
 from PIL import Image
+from photo_derivatives import DEFAULT_DPI, DEFAULT_QUALITY, DerivativeCache, file_hash
+from asset_index import AssetIndex
+from deck_manifest import (load_manifest, manifest_path_for, new_manifest, plan_sync,
+                           record_hash, save_manifest, slide_keys)
+from deck_writer import FIRST_STATIC_RID, PHOTO_RID, STORED_EXTENSIONS, StreamingDeckWriter
+from deck_merge import merge_decks
+from pipeline_config import deck_path, photos_dir, roster_path
+from pipeline_metrics import MODES, metrics
+from roster import Player, load_roster
 
 
-def load_player_data(json_path: Path) -> List[Dict]:
-    """Load player data from JSON file."""
+# Text that marks a template shape as the sample player's info panel
+PLAYER_INFO_KEYWORDS = ('name:', 'age:', 'category:', 'ph:', 'phone:')
+
+# Player info table geometry (standard 16:9 slide, 10 x 7.5 inches)
+INFO_TABLE_LEFT = Inches(0)
+INFO_TABLE_TOP = Inches(4.5)  # Higher up on the slide, more visible
+INFO_TABLE_WIDTH = Inches(10)
+INFO_TABLE_HEIGHT = Inches(1.2)
+
+# Photos loaded ahead of the slide being built, and the threads loading them
+DEFAULT_PREFETCH = 8
+PREFETCH_THREADS = 4
+
+
+@metrics.timed()
+def load_player_data(json_path: Path) -> List[Player]:
+    """Load player data through the shared roster loader."""
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            players = json.load(f)
+        players = load_roster(json_path)
         print(f"Loaded {len(players)} players from {json_path.name}")
         return players
     except Exception as e:
@@ -30,19 +69,21 @@ def load_player_data(json_path: Path) -> List[Dict]:
         sys.exit(1)
 
 
-def scan_player_images(images_dir: Path) -> Dict[str, Path]:
-    """Scan directory for player images and create mobile number mapping."""
-    image_map = {}
-    image_extensions = {'.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG'}
+@metrics.timed()
+def scan_player_images(asset_index: AssetIndex, players: List[Player]) -> Dict[str, Path]:
+    """Refresh the asset index and create the mobile number to player image mapping."""
+    counts = asset_index.refresh()
+    
+    # Suffixed players (e.g., "9900922363-1") get their own photos ("9900922363-11.jpg"), never the plain one
+    image_map = asset_index.phone_map(player.phone for player in players if player.has_phone)
     
-    for image_file in images_dir.glob('*'):
-        if image_file.suffix in image_extensions:
-            # Extract mobile number from filename (e.g., "6360452535.jpg" -> "6360452535")
-            mobile = image_file.stem
-            if mobile.isdigit():
-                image_map[mobile] = image_file
+    # Player photos are hashed up front, in parallel, for the manifest and photo cache
+    hashed = asset_index.hash_files(image_map.values())
+    asset_index.save()
     
-    print(f"Found {len(image_map)} player images")
+    print(f"Found {len(image_map)} player images "
+          f"({counts['added'] + counts['updated']} indexed, {counts['unchanged']} unchanged, "
+          f"{counts['removed']} removed, {hashed} hashed)")
     return image_map
 
 
@@ -69,152 +110,105 @@ def find_first_image_shape(slide) -> Optional:
     return leftmost_image[1]
 
 
-def replace_image_in_shape(shape, image_path: Path, slide) -> bool:
-    """Replace the image in a shape with a new image file, maintaining natural aspect ratio."""
-    try:
-        # Check if image format is supported by python-pptx
-        ext = image_path.suffix.lower()
-        supported_formats = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.wmf'}
-        if ext not in supported_formats:
-            print(f"  Warning: Unsupported image format: {ext} for {image_path.name}")
-            return False
-        
-        # Verify image file exists and is readable
-        if not image_path.exists():
-            print(f"  Warning: Image file does not exist: {image_path}")
-            return False
-        
-        # Save shape properties before removal (available space)
-        available_left = shape.left
-        available_top = shape.top
-        available_width = shape.width
-        available_height = shape.height
-        
-        # Get the actual image dimensions to calculate aspect ratio
-        try:
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                img_aspect_ratio = img_width / img_height
-        except Exception as e:
-            print(f"  Warning: Could not read image dimensions for {image_path.name}: {e}")
-            # Fall back to using available space dimensions
-            img_aspect_ratio = available_width / available_height
-        
+def is_player_info_shape(shape) -> bool:
+    """Check whether a template shape holds the sample player's details."""
+    # Tables near the bottom are player info tables from a previous run
+    if hasattr(shape, 'has_table') and shape.has_table:
+        return shape.top > Inches(5)
+    
+    if not shape.has_text_frame:
+        return False
+    
+    text = shape.text.strip()
+    # Text shapes that look like player info (contain names, ages, categories, phones)
+    return bool(text) and (
+        any(keyword in text.lower() for keyword in PLAYER_INFO_KEYWORDS) or
+        len([c for c in text if c.isdigit()]) >= 10  # Contains phone number (10+ digits)
+    )
+
+
+def relationship_refs(element) -> List[Tuple[object, str, str]]:
+    """(element, attribute, rId) of every relationship reference (r:embed, r:link, r:id, ...) in a tree."""
+    prefix = f"{{{nsuri('r')}}}"
+    return [
+        (el, attr, value)
+        for el in element.iter() for attr, value in el.attrib.items() if attr.startswith(prefix)
+    ]
+
+
+class PhotoSlot:
+    """Box occupied by the template's player photo, with a prototype picture element."""
+    
+    def __init__(self, left: int, top: int, width: int, height: int, shape_id: int):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self._prototype = CT_Picture.new_pic(
+            shape_id, f'Picture {shape_id - 1}', '', 'rId1', left, top, width, height
+        )
+    
+    def fit(self, img_aspect_ratio: float) -> Tuple[int, int, int, int]:
+        """Box (left, top, width, height) of an image centred in the slot at its natural aspect ratio."""
         # Calculate available space aspect ratio
-        available_aspect_ratio = available_width / available_height
+        available_aspect_ratio = self.width / self.height
         
         # Calculate new dimensions maintaining natural aspect ratio
         if img_aspect_ratio > available_aspect_ratio:
             # Image is wider - fit to width
-            new_width = available_width
-            new_height = available_width / img_aspect_ratio
+            new_width = self.width
+            new_height = int(self.width / img_aspect_ratio)
         else:
             # Image is taller - fit to height
-            new_height = available_height
-            new_width = available_height * img_aspect_ratio
+            new_height = self.height
+            new_width = int(self.height * img_aspect_ratio)
         
         # Center the image within the available space
-        new_left = available_left + (available_width - new_width) // 2
-        new_top = available_top + (available_height - new_height) // 2
-        
-        # Get the parent element before removal
-        parent = shape._element.getparent()
-        
-        # Remove the old shape element from the tree
-        parent.remove(shape._element)
-        
-        # Add new image at calculated position with natural aspect ratio
-        # This creates a new relationship automatically and embeds the image
-        new_picture = slide.shapes.add_picture(str(image_path), new_left, new_top, new_width, new_height)
-        
-        # Verify the picture was actually added and has a valid image
-        if new_picture is None:
-            return False
-        
-        # Verify the image relationship exists
-        try:
-            test_img = new_picture.image
-            if test_img is None or len(test_img.blob) == 0:
-                return False
-        except Exception:
-            return False
-        
-        return True
-        
-    except Exception as e:
-        print(f"  Warning: Could not replace image for {image_path.name}: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+        new_left = self.left + (self.width - new_width) // 2
+        new_top = self.top + (self.height - new_height) // 2
+        return new_left, new_top, new_width, new_height
+    
+    def new_picture(self, rId: str, descr: str, left: int, top: int, width: int, height: int,
+                    linked: bool = False):
+        """Stamp a `p:pic` element for this slot from the prototype; a linked picture refers to a file."""
+        pic = copy.deepcopy(self._prototype)
+        pic.nvPicPr.cNvPr.set('descr', descr)
+        blip = pic.blipFill.blip
+        if linked:
+            blip.rEmbed = None
+            blip.set(qn('r:link'), rId)
+        else:
+            blip.rEmbed = rId
+        pic.x, pic.y, pic.cx, pic.cy = left, top, width, height
+        return pic
 
 
-def create_player_info_table(slide, player: Dict, presentation: Presentation) -> None:
-    """Create a table at the bottom of the slide with player information."""
-    player_name = player.get('Name', '')
-    age = player.get('Age', '')
-    category = player.get('Category', '')
-    phone = player.get('Ph', '')
-    
-    # Remove any existing tables at the bottom (if regenerating)
-    shapes_to_remove = []
-    for shape in slide.shapes:
-        if hasattr(shape, 'has_table') and shape.has_table:
-            # Check if it's at the bottom (likely our player info table)
-            if shape.top > Inches(6):  # Near bottom of slide
-                shapes_to_remove.append(shape)
-    
-    for shape in shapes_to_remove:
-        sp = shape._element
-        sp.getparent().remove(sp)
-    
-    # Standard PowerPoint slide dimensions (16:9 aspect ratio)
-    # Width: 10 inches, Height: 7.5 inches
-    slide_width = Inches(10)
-    slide_height = Inches(7.5)
-    
-    # Table dimensions: 100% width, positioned higher up on slide
-    table_width = slide_width
-    table_height = Inches(1.2)  # Adjust height as needed
-    table_left = Inches(0)
-    table_top = Inches(4.5)  # Position at 4.5 inches from top (higher up, more visible)
-    
-    # Create table with 2 rows and 2 columns
+def build_player_info_table(shape_id: int):
+    """Build the formatted 2x2 player info table once, with empty cells."""
     rows = 2
     cols = 2
-    
-    # Add table to slide
-    table_shape = slide.shapes.add_table(rows, cols, table_left, table_top, table_width, table_height)
-    table = table_shape.table
+    graphic_frame = CT_GraphicalObjectFrame.new_table_graphicFrame(
+        shape_id, f'Table {shape_id - 1}', rows, cols,
+        INFO_TABLE_LEFT, INFO_TABLE_TOP, INFO_TABLE_WIDTH, INFO_TABLE_HEIGHT
+    )
+    table = GraphicFrame(graphic_frame, None).table
     
     # Set column widths to 50% each (must be integer)
-    col_width = int(table_width / 2)
+    col_width = int(INFO_TABLE_WIDTH / 2)
     table.columns[0].width = col_width
     table.columns[1].width = col_width
     
-    # Fill in the data with actual player information
-    # Row 1: Name | Age
-    table.cell(0, 0).text = player_name if player_name else ''
-    table.cell(0, 1).text = age if age else ''
-    
-    # Row 2: Category | Phone
-    table.cell(1, 0).text = category if category else ''
-    table.cell(1, 1).text = phone if phone else ''
-    
     # Format cells - center align text and make visible
     for row_idx in range(rows):
         for col_idx in range(cols):
             cell = table.cell(row_idx, col_idx)
-            # Get the text that was just set
-            cell_text = cell.text.strip() if cell.text else ''
-            
-            # Ensure text is set - clear and recreate
             cell.text_frame.clear()
             p = cell.text_frame.paragraphs[0]
             p.alignment = PP_ALIGN.CENTER
             
-            # Add text with formatting
+            # Empty run carrying the formatting; text is filled in per player
             run = p.add_run()
-            run.text = cell_text
+            run.text = ''
             run.font.size = Pt(24)  # Larger font for visibility
             run.font.bold = True
             run.font.color.rgb = RGBColor(0, 0, 0)  # Black text
@@ -223,216 +217,812 @@ def create_player_info_table(slide, player: Dict, presentation: Presentation) ->
             cell.vertical_anchor = MSO_ANCHOR.MIDDLE
             
             # Set cell fill to white for better visibility
-            try:
-                cell.fill.solid()
-                cell.fill.fore_color.rgb = RGBColor(255, 255, 255)  # White background
-            except:
-                pass
+            cell.fill.solid()
+            cell.fill.fore_color.rgb = RGBColor(255, 255, 255)  # White background
     
-    # Ensure table is visible by setting it to be on top layer
-    # Tables added last should be on top, but we can also verify
-    try:
-        # Move table to end of shape tree (brings to front)
-        table_element = table_shape._element
-        parent = table_element.getparent()
-        parent.remove(table_element)
-        parent.append(table_element)
-    except:
-        pass
+    return graphic_frame
 
 
-def duplicate_slide(presentation: Presentation, source_slide) -> 'Slide':
+class PackageImages:
+    """
+    Image parts of a presentation's package by SHA-1, with the next free
+    media part number, gathered once so embedding a photo is a dict lookup
+    instead of a walk over every part of the package.
     """
-    Duplicate a slide in the presentation.
     
-    Args:
-        presentation: Presentation object
-        source_slide: Source slide to duplicate
+    def __init__(self, package):
+        self.package = package
+        self.by_sha1: Dict[str, ImagePart] = {}
+        numbers = [0]
+        for part in package.iter_parts():
+            if part.partname.startswith('/ppt/media/image') and part.partname.idx is not None:
+                numbers.append(part.partname.idx)
+            if isinstance(part, ImagePart):
+                self.by_sha1.setdefault(part.sha1, part)
+        self._next_number = max(numbers) + 1
+    
+    def part_for(self, image: PackageImage) -> ImagePart:
+        """The package's image part holding `image`, added the first time it is seen."""
+        part = self.by_sha1.get(image.sha1)
+        if part is None:
+            partname = PackURI(f"/ppt/media/image{self._next_number}.{image.ext}")
+            self._next_number += 1
+            part = ImagePart(partname, image.content_type, self.package, image.blob, image.filename)
+            self.by_sha1[image.sha1] = part
+        return part
+
+
+class CompiledTemplate:
+    """
+    Template slide analysed once into a reusable skeleton.
+    
+    The photo slot and the info-panel slot are identified up front and
+    stripped from the template's shape tree; what remains are the static
+    shapes. Each player slide is stamped from the skeleton, and only the
+    photo and the four table cells are filled in.
+    
+    Static shapes that refer to parts of the template slide (pictures,
+    linked media) are related to those same parts on every slide, so each
+    piece of artwork is stored once in the deck whatever the slide count.
+    """
+    
+    def __init__(self, template_slide):
+        self.slide_layout = template_slide.slide_layout
         
-    Returns:
-        New duplicated slide
+        photo_shape = find_first_image_shape(template_slide)
+        dropped = {shape._element for shape in template_slide.shapes if is_player_info_shape(shape)}
+        if photo_shape is not None:
+            dropped.add(photo_shape._element)
+        
+        # Copy the shape tree and drop the variable shapes from the copy
+        source_tree = template_slide.shapes._spTree
+        self.skeleton = copy.deepcopy(source_tree)
+        variable_els = [
+            skeleton_el for source_el, skeleton_el in zip(source_tree.iter(), self.skeleton.iter())
+            if source_el in dropped
+        ]
+        for skeleton_el in variable_els:
+            skeleton_el.getparent().remove(skeleton_el)
+        
+        # References of the static shapes are renumbered from FIRST_STATIC_RID, clear of the
+        # layout and photo relationships; each becomes (rId, type, target part or URL, is external)
+        template_rels = template_slide.part.rels
+        self.static_rels = []
+        renumbered = {}
+        for el, attr, rId in relationship_refs(self.skeleton):
+            if rId not in template_rels:
+                continue
+            if rId not in renumbered:
+                rel = template_rels[rId]
+                renumbered[rId] = f"rId{FIRST_STATIC_RID + len(renumbered)}"
+                target = rel.target_ref if rel.is_external else rel.target_part
+                self.static_rels.append((renumbered[rId], rel.reltype, target, rel.is_external))
+            el.set(attr, renumbered[rId])
+        
+        self.static_shape_count = len(self.skeleton.xpath('./p:sp | ./p:pic | ./p:grpSp | ./p:graphicFrame | ./p:cxnSp'))
+        
+        # New shapes get ids above anything left in the skeleton
+        next_id = max([int(el.get('id')) for el in self.skeleton.iter(qn('p:cNvPr'))] + [0]) + 1
+        
+        self.photo_slot = None
+        if photo_shape is not None:
+            self.photo_slot = PhotoSlot(photo_shape.left, photo_shape.top,
+                                        photo_shape.width, photo_shape.height, next_id)
+        self.info_table = build_player_info_table(next_id + 1)
+        self.images = PackageImages(template_slide.part.package)
+    
+    def new_slide(self, presentation: Presentation):
+        """Append a slide holding only the static shapes of the template."""
+        rId, slide = presentation.part.add_slide(self.slide_layout)
+        presentation.slides._sldIdLst.add_sldId(rId)
+        spTree = copy.deepcopy(self.skeleton)
+        if self.static_rels:
+            # Relate the slide to the template's own parts; python-pptx picks the rIds
+            rIds = {
+                static_rId: slide.part.relate_to(target, reltype, is_external)
+                for static_rId, reltype, target, is_external in self.static_rels
+            }
+            for el, attr, static_rId in relationship_refs(spTree):
+                el.set(attr, rIds.get(static_rId, static_rId))
+        cSld = slide._element.cSld
+        cSld.replace(cSld.spTree, spTree)
+        return slide
+    
+    def new_slide_element(self):
+        """
+        Stand-alone `p:sld` element holding only the static shapes of the
+        template, with the relationships it needs in stream_rels().
+        """
+        sld = CT_Slide.new()
+        sld.cSld.replace(sld.cSld.spTree, copy.deepcopy(self.skeleton))
+        return sld
+    
+    def stream_rels(self) -> List[Tuple[str, str, str, bool]]:
+        """Static relationships for the streaming writer, targets as zip names."""
+        return [
+            (rId, reltype, target if is_external else target.partname.lstrip('/'), is_external)
+            for rId, reltype, target, is_external in self.static_rels
+        ]
+    
+    def info_table_for(self, player: Player):
+        """Copy of the compiled info table with the player's details filled in."""
+        values = [
+            player.name,            # Row 1: Name | Age
+            player.age_text,
+            player.category.value,  # Row 2: Category | Phone
+            player.phone,
+        ]
+        
+        table_element = copy.deepcopy(self.info_table)
+        for text_el, value in zip(table_element.iter(qn('a:t')), values):
+            text_el.text = (value or '').strip()
+        return table_element
+
+
+def prepare_photo(slot: PhotoSlot, image_path: Path,
+                  derivatives: Optional[DerivativeCache] = None) -> Optional[Tuple[Path, Tuple[int, int, int, int]]]:
     """
-    # Get slide layout from source
-    slide_layout = source_slide.slide_layout
+    Check a photo and work out the file to embed and its box in the slot.
     
-    # Create new slide with same layout
-    new_slide = presentation.slides.add_slide(slide_layout)
+    With a derivative cache, the file to embed is a copy resized to the slot
+    instead of the original photo. Returns None if the photo can't be used.
+    """
+    # Check if image format is supported by python-pptx
+    ext = image_path.suffix.lower()
+    supported_formats = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.wmf'}
+    if ext not in supported_formats:
+        print(f"  Warning: Unsupported image format: {ext} for {image_path.name}")
+        return None
     
-    # Remove default shapes from the new slide
-    for shape in list(new_slide.shapes):
-        sp = shape._element
-        sp.getparent().remove(sp)
+    # Verify image file exists and is readable
+    if not image_path.exists():
+        print(f"  Warning: Image file does not exist: {image_path}")
+        return None
     
-    # Copy shapes from source slide
-    # Note: Image relationships will be broken, but we'll replace images anyway
-    for shape in source_slide.shapes:
-        el = shape._element
-        newel = copy.deepcopy(el)
-        new_slide.shapes._spTree.insert_element_before(newel, 'p:extLst')
+    # Get the actual image dimensions to calculate aspect ratio
+    embed_path = image_path
+    try:
+        if derivatives is not None:
+            derivative = derivatives.derive(image_path, slot.width, slot.height)
+            embed_path = derivative.path
+            img_aspect_ratio = derivative.width / derivative.height
+        else:
+            with Image.open(image_path) as img:
+                img_width, img_height = img.size
+                img_aspect_ratio = img_width / img_height
+    except Exception as e:
+        print(f"  Warning: Could not read image dimensions for {image_path.name}: {e}")
+        # Fall back to using available space dimensions
+        img_aspect_ratio = slot.width / slot.height
     
-    return new_slide
+    return embed_path, slot.fit(img_aspect_ratio)
+
+
+class LoadedPhoto(NamedTuple):
+    """A photo ready to embed: the image data and its box in the photo slot."""
+    image_path: Path
+    embed_path: Path
+    image: Optional[PackageImage]  # None for a photo linked rather than embedded
+    box: Tuple[int, int, int, int]
+    placeholder: bool = False
+
+
+@metrics.timed()
+def load_photo(slot: PhotoSlot, image_path: Path,
+               derivatives: Optional[DerivativeCache] = None, link: bool = False) -> Optional[LoadedPhoto]:
+    """
+    Prepare a photo and read the file to embed, with its hash and format
+    worked out, so embedding it only adds it to the package. With `link`
+    the file is not read; the slide links to it instead. Safe to run on
+    worker threads. Returns None if the photo can't be used.
+    """
+    try:
+        prepared = prepare_photo(slot, image_path, derivatives)
+        if prepared is None:
+            return None
+        embed_path, box = prepared
+        if link:
+            return LoadedPhoto(image_path, embed_path, None, box)
+        
+        blob = embed_path.read_bytes()
+        if len(blob) == 0:
+            print(f"  Warning: Image file is empty: {embed_path.name}")
+            return None
+        image = PackageImage.from_blob(blob, embed_path.name)
+        # Computed and cached by the image now rather than while the slide is built
+        _ = image.sha1
+        _ = image.ext
+        return LoadedPhoto(image_path, embed_path, image, box)
+    
+    except Exception as e:
+        print(f"  Warning: Could not load image {image_path.name}: {e}")
+        return None
 
 
-def create_player_slide(presentation: Presentation, template_slide, player: Dict, image_map: Dict[str, Path]) -> Tuple[bool, str]:
+def prefetch_photos(slot: Optional[PhotoSlot], image_paths: Iterable[Optional[Path]],
+                    derivatives: Optional[DerivativeCache] = None, depth: int = DEFAULT_PREFETCH,
+                    placeholder: Optional[Path] = None, link: bool = False) -> Iterator[Optional[LoadedPhoto]]:
     """
-    Create a new slide for a player based on the template.
+    Load photos ahead of the slides being built, yielding them in input order.
+    
+    Up to `depth` photos are resized, read and hashed on a thread pool while
+    the caller builds slides (Pillow and file reads release the GIL). A new
+    photo is only started when the caller takes one, so at most `depth`
+    loaded photos are held in memory. With depth 0 each photo is loaded
+    when it is reached.
+    
+    A None path, or a photo that can't be used, yields the `placeholder`
+    photo, loaded once and shared by every such slide; without a
+    placeholder (or a slot) it yields None. With `link` the photos are
+    prepared for linking and their files are not read.
+    """
+    placeholder_photo = None
+    if slot is not None and placeholder is not None:
+        placeholder_photo = load_photo(slot, placeholder, derivatives, link)
+        if placeholder_photo is not None:
+            placeholder_photo = placeholder_photo._replace(placeholder=True)
+    
+    def load(image_path: Optional[Path]) -> Optional[LoadedPhoto]:
+        photo = None
+        if slot is not None and image_path is not None:
+            photo = load_photo(slot, image_path, derivatives, link)
+        return photo if photo is not None else placeholder_photo
+    
+    image_paths = iter(image_paths)
+    if depth <= 0:
+        for image_path in image_paths:
+            yield load(image_path)
+        return
+    
+    with ThreadPoolExecutor(max_workers=min(depth, PREFETCH_THREADS), thread_name_prefix='photo') as pool:
+        pending = deque(pool.submit(load, image_path) for image_path in itertools.islice(image_paths, depth))
+        try:
+            while pending:
+                photo = pending.popleft().result()
+                # Backpressure: start the next photo only as this one is handed over
+                pending.extend(pool.submit(load, image_path) for image_path in itertools.islice(image_paths, 1))
+                yield photo
+        finally:
+            # The caller stopped early: don't load photos nobody will take
+            for future in pending:
+                future.cancel()
+
+
+def photo_link(photo: LoadedPhoto) -> str:
+    """Target of a linked photo: the absolute file URI of the file a full build would embed."""
+    return photo.embed_path.resolve().as_uri()
+
+
+@metrics.timed()
+def replace_image_in_shape(template: CompiledTemplate, photo: LoadedPhoto, slide) -> bool:
+    """Fill the photo slot with a loaded photo, maintaining natural aspect ratio."""
+    try:
+        new_left, new_top, new_width, new_height = photo.box
+        
+        linked = photo.image is None
+        if linked:
+            # Draft: the slide only links to the file; package_deck.py embeds it later
+            rId = slide.part.relate_to(photo_link(photo), RT.IMAGE, is_external=True)
+        else:
+            # Embed the image once per package (reusing an identical one) and relate it to the slide
+            rId = slide.part.relate_to(template.images.part_for(photo.image), RT.IMAGE)
+        
+        picture = template.photo_slot.new_picture(rId, photo.image_path.name, new_left, new_top, new_width, new_height, linked)
+        slide.shapes._spTree.insert_element_before(picture, 'p:extLst')
+        
+        return True
+        
+    except Exception as e:
+        print(f"  Warning: Could not replace image for {photo.image_path.name}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+@metrics.timed()
+def create_player_info_table(slide, player: Player, template: CompiledTemplate) -> None:
+    """Add the player information table to the slide, filled in from the compiled table."""
+    # Added last so it is on top of the other shapes
+    slide.shapes._spTree.insert_element_before(template.info_table_for(player), 'p:extLst')
+
+
+@metrics.timed()
+def create_player_slide(presentation: Presentation, template: CompiledTemplate, player: Player, image_map: Dict[str, Path],
+                        photo: Optional[LoadedPhoto] = None) -> Tuple[bool, str]:
+    """
+    Create a new slide for a player from the compiled template.
+    
+    `photo` is the player's photo, or the shared placeholder, from
+    prefetch_photos(); None if there is neither.
     
     Returns:
         Tuple of (success: bool, message: str)
     """
     try:
-        # Duplicate the template slide
-        new_slide = duplicate_slide(presentation, template_slide)
+        # Stamp the static shapes of the template
+        new_slide = template.new_slide(presentation)
         
-        # Now find and replace the first image
-        first_image_shape = find_first_image_shape(new_slide)
-        phone = player.get('Ph', '')
-        
-        if first_image_shape and phone in image_map:
-            image_path = image_map[phone]
-            if replace_image_in_shape(first_image_shape, image_path, new_slide):
-                image_replaced = True
-            else:
-                image_replaced = False
-        else:
-            image_replaced = False
-            if not first_image_shape:
-                print(f"  Warning: No image shape found for {player.get('Name', 'Unknown')}")
-            elif phone not in image_map:
-                print(f"  Warning: Image not found for {player.get('Name', 'Unknown')} (Phone: {phone})")
-        
-        # Remove any existing text shapes that might contain old player data
-        # (These are copied from the template and should be removed)
-        shapes_to_remove = []
-        for shape in list(new_slide.shapes):  # Use list() to avoid iteration issues
-            if hasattr(shape, 'text') and shape.has_text_frame:
-                text = shape.text.strip()
-                # Remove text shapes that look like player info (contain names, ages, categories, phones)
-                if text and (
-                    any(keyword in text.lower() for keyword in ['name:', 'age:', 'category:', 'ph:', 'phone:']) or
-                    len([c for c in text if c.isdigit()]) >= 10  # Contains phone number (10+ digits)
-                ):
-                    shapes_to_remove.append(shape)
-        
-        # Remove the identified shapes
-        for shape in shapes_to_remove:
-            try:
-                sp = shape._element
-                parent = sp.getparent()
-                if parent is not None:
-                    parent.remove(sp)
-            except Exception as e:
-                # Shape might already be removed, continue
-                pass
+        # Fill the photo slot
+        phone = player.phone
         
-        # Remove any existing tables (if regenerating)
-        tables_to_remove = []
-        for shape in list(new_slide.shapes):
-            if hasattr(shape, 'has_table') and shape.has_table:
-                if shape.top > Inches(5):  # Near bottom
-                    tables_to_remove.append(shape)
+        image_replaced = False
+        if photo is not None:
+            image_replaced = replace_image_in_shape(template, photo, new_slide) and not photo.placeholder
+        if not template.photo_slot:
+            print(f"  Warning: No image shape found for {player.name or 'Unknown'}")
+        elif phone not in image_map:
+            print(f"  Warning: Image not found for {player.name or 'Unknown'} (Phone: {phone})")
         
-        for shape in tables_to_remove:
-            try:
-                sp = shape._element
-                parent = sp.getparent()
-                if parent is not None:
-                    parent.remove(sp)
-            except:
-                pass
-        
-        # Create player info table at the bottom (even if image replacement failed)
-        # This is added last so it appears on top
+        # Fill the info panel (even if image replacement failed)
         try:
-            create_player_info_table(new_slide, player, presentation)
+            create_player_info_table(new_slide, player, template)
         except Exception as table_error:
-            print(f"  Warning: Could not create table for {player.get('Name', 'Unknown')}: {table_error}")
+            print(f"  Warning: Could not create table for {player.name or 'Unknown'}: {table_error}")
         
-        player_name = player.get('Name', 'Unknown')
+        player_name = player.name or 'Unknown'
         status = "✓" if image_replaced else "⚠ (no image)"
         return True, f"{status} {player_name} ({phone})"
         
     except Exception as e:
-        player_name = player.get('Name', 'Unknown')
+        player_name = player.name or 'Unknown'
         error_msg = str(e)
         return False, f"✗ {player_name}: {error_msg}"
 
 
-def main():
-    """Main function to generate player slides."""
-    # Set up paths
-    script_dir = Path(__file__).parent
-    pptx_path = script_dir / "Re-Auction-2025-BCL-Players.pptx"
-    json_path = script_dir / "players_data.json"
-    images_dir = script_dir
+@metrics.timed()
+def write_player_slide(writer: StreamingDeckWriter, template: CompiledTemplate, player: Player,
+                       image_map: Dict[str, Path], photo: Optional[LoadedPhoto] = None) -> Tuple[bool, str]:
+    """
+    Stream a player slide straight into the output package.
     
-    # Validate input files
-    if not pptx_path.exists():
-        print(f"Error: PowerPoint file not found: {pptx_path}")
-        sys.exit(1)
+    `photo` is the player's photo, or the shared placeholder, from
+    prefetch_photos(); None if there is neither.
     
-    if not json_path.exists():
-        print(f"Error: Player data file not found: {json_path}")
-        sys.exit(1)
+    Returns:
+        Tuple of (success: bool, message: str)
+    """
+    player_name = player.name or 'Unknown'
+    phone = player.phone
+    try:
+        sld = template.new_slide_element()
+        spTree = sld.cSld.spTree
+        
+        # Fill the photo slot
+        media_partname = None
+        rels = template.stream_rels()
+        image_added = False
+        if photo is not None:
+            try:
+                left, top, width, height = photo.box
+                linked = photo.image is None
+                if linked:
+                    rels = [(PHOTO_RID, RT.IMAGE, photo_link(photo), True), *rels]
+                else:
+                    media_partname = writer.add_media_bytes(photo.image.blob, photo.embed_path.suffix)
+                spTree.insert_element_before(
+                    template.photo_slot.new_picture(PHOTO_RID, photo.image_path.name, left, top, width, height,
+                                                    linked),
+                    'p:extLst'
+                )
+                image_added = not photo.placeholder
+            except Exception as e:
+                print(f"  Warning: Could not replace image for {photo.image_path.name}: {e}")
+        if not template.photo_slot:
+            print(f"  Warning: No image shape found for {player_name}")
+        elif phone not in image_map:
+            print(f"  Warning: Image not found for {player_name} (Phone: {phone})")
+        
+        # Fill the info panel; added last so it is on top
+        spTree.insert_element_before(template.info_table_for(player), 'p:extLst')
+        
+        writer.add_slide(sld, media_partname, rels)
+        status = "✓" if image_added else "⚠ (no image)"
+        return True, f"{status} {player_name} ({phone})"
+        
+    except Exception as e:
+        return False, f"✗ {player_name}: {str(e)}"
+
+
+@metrics.timed()
+def drop_slides(presentation: Presentation, slide_ids: set) -> int:
+    """Remove the slides with the given slide ids from the presentation."""
+    sldIdLst = presentation.slides._sldIdLst
+    dropped = 0
+    for sldId in list(sldIdLst):
+        if sldId.id in slide_ids:
+            presentation.part.drop_rel(sldId.rId)
+            sldIdLst.remove(sldId)
+            dropped += 1
     
-    print("=" * 60)
-    print("BCL Re-Auction 2025 - Generate Player Slides")
-    print("=" * 60)
+    # Renumber slide parts so new slides never reuse a name still in the package
+    presentation.part.rename_slide_parts([sldId.rId for sldId in sldIdLst])
+    return dropped
+
+
+def place_slides(previous_ids: List[int], key_by_slide_id: Dict[int, str], keys: List[str],
+                 slide_ids: Dict[str, int]) -> List[int]:
+    """
+    Player slide order after a sync: slides keep their place in the deck
+    (`previous_ids`), a rebuilt slide takes the place of the one it
+    replaces, and a new player's slide goes after the slide of the player
+    before them in the roster (first if there is none).
+    """
+    order = []
+    placed = set()
+    for slide_id in previous_ids:
+        key = key_by_slide_id.get(slide_id)
+        if key is None:
+            # Not a player slide of the manifest; it stays where it is
+            order.append(slide_id)
+        elif key in slide_ids and key not in placed:
+            order.append(slide_ids[key])
+            placed.add(key)
+    
+    position_of = {slide_id: position for position, slide_id in enumerate(order)}
+    previous_key = None
+    for key in keys:
+        if key not in slide_ids:
+            continue
+        if key not in placed:
+            position = position_of[slide_ids[previous_key]] + 1 if previous_key is not None else 0
+            order.insert(position, slide_ids[key])
+            placed.add(key)
+            position_of = {slide_id: position for position, slide_id in enumerate(order)}
+        previous_key = key
+    return order
+
+
+def reorder_slides(presentation: Presentation, slide_ids: List[int]) -> None:
+    """Put the slides in the given order after the template; other slides go last."""
+    sldIdLst = presentation.slides._sldIdLst
+    by_id = {sldId.id: sldId for sldId in sldIdLst}
+    template = sldIdLst[0]
+    ordered = [template] + [by_id[slide_id] for slide_id in slide_ids]
+    ordered += [sldId for sldId in sldIdLst if sldId not in ordered]
+    for sldId in ordered:
+        sldIdLst.remove(sldId)
+        sldIdLst.append(sldId)
+
+
+@metrics.timed()
+def roster_entries(players: List[Player], image_map: Dict[str, Path],
+                   hash_source: Callable[[Path], str] = file_hash) -> Tuple[List[str], Dict[int, str], Dict[str, Dict]]:
+    """
+    Key players with a usable phone number and hash their record and photo.
+    
+    Returns:
+        (slide keys in roster order, slide key by id(player), manifest entries by slide key)
+    """
+    valid_players = [player for player in players if player.has_phone]
+    keys = slide_keys([player.phone for player in valid_players])
+    key_by_player = {id(player): key for player, key in zip(valid_players, keys)}
+    entries = {}
+    for player, key in zip(valid_players, keys):
+        image_path = image_map.get(player.phone)
+        entries[key] = {
+            'record': record_hash(player.record()),
+            'photo': hash_source(image_path) if image_path else None,
+        }
+    return keys, key_by_player, entries
+
+
+def stream_player_slides(pptx_path: Path, players: List[Player], image_map: Dict[str, Path],
+                         derivatives: Optional[DerivativeCache] = None,
+                         hash_source: Callable[[Path], str] = file_hash,
+                         prefetch: int = DEFAULT_PREFETCH, placeholder: Optional[Path] = None,
+                         link: bool = False) -> Optional[Dict]:
+    """
+    Rebuild the deck with the streaming writer, keeping memory flat.
+    
+    Only the template slide is loaded with python-pptx; every player slide
+    and photo is written to the output package as soon as it is finished.
+    With `link` the slides link to the photo files instead (a draft deck).
+    Returns the statistics (with the manifest entries under 'manifest_players'),
+    or None if the deck could not be written.
+    """
+    tmp_path = pptx_path.with_name(f".{pptx_path.name}.streaming")
+    print(f"Streaming PowerPoint: {pptx_path.name}")
+    try:
+        writer = StreamingDeckWriter(pptx_path, tmp_path)
+        template = CompiledTemplate(Presentation(writer.template_package()).slides[0])
+    except Exception as e:
+        print(f"Error loading PowerPoint: {e}")
+        return None
+    
+    if template.photo_slot is None:
+        print("Warning: Template has no photo slot, slides will have no images")
+    print(f"Compiled template: {template.static_shape_count} static shape(s)")
     print()
     
-    # Load player data
-    players = load_player_data(json_path)
+    keys, key_by_player, entries = roster_entries(players, image_map, hash_source)
+    stats = {
+        'total_players': len(players),
+        'slides_created': 0,
+        'slides_unchanged': 0,
+        'slides_removed': 0,
+        'images_found': 0,
+        'images_missing': 0,
+        'errors': 0
+    }
+    slide_ids = {}
+    
+    # Photos are loaded on worker threads while earlier slides are written
+    photos = prefetch_photos(template.photo_slot, [image_map.get(player.phone) for player in players if player.has_phone],
+                             derivatives, prefetch, placeholder, link)
+    
+    print("Generating player slides...")
+    print("-" * 60)
     
-    # Scan for player images
-    image_map = scan_player_images(images_dir)
+    for i, player in enumerate(players, start=1):
+        phone = player.phone
+        
+        # Skip players without phone numbers
+        if not player.has_phone:
+            print(f"  [{i:3d}/{len(players)}] ⚠ Skipping {player.name or 'Unknown'} - invalid phone number")
+            stats['errors'] += 1
+            continue
+        
+        success, message = write_player_slide(writer, template, player, image_map, next(photos))
+        if success:
+            slide_ids[key_by_player[id(player)]] = writer.slide_ids[-1]
+            stats['slides_created'] += 1
+            if phone in image_map:
+                stats['images_found'] += 1
+            else:
+                stats['images_missing'] += 1
+        else:
+            stats['errors'] += 1
+        print(f"  [{i:3d}/{len(players)}] {message}")
+    
+    print("-" * 60)
     print()
     
-    # Load PowerPoint presentation
-    print(f"Loading PowerPoint: {pptx_path.name}")
+    print(f"Saving updated presentation to: {pptx_path.name}")
     try:
-        prs = Presentation(pptx_path)
+        with metrics.stage('save_presentation'):
+            writer.close()
+            os.replace(tmp_path, pptx_path)
+        print("✓ Presentation saved successfully")
     except Exception as e:
-        print(f"Error loading PowerPoint: {e}")
-        sys.exit(1)
+        print(f"✗ Error saving presentation: {e}")
+        return None
     
-    # Get template slide (first slide)
-    if len(prs.slides) == 0:
-        print("Error: PowerPoint file has no slides")
-        sys.exit(1)
+    stats['manifest_players'] = manifest_players(keys, entries, slide_ids)
+    stats['total_slides'] = len(slide_ids) + 1
+    return stats
+
+
+def derivative_settings(derivatives: Optional[DerivativeCache]) -> Optional[Dict]:
+    """Arguments to rebuild a derivative cache in a worker process."""
+    if derivatives is None:
+        return None
+    return {
+        'cache_dir': derivatives.cache_dir,
+        'dpi': derivatives.dpi,
+        'quality': derivatives.quality,
+        'max_bytes': derivatives.max_bytes,
+        'hash_source': derivatives.hash_source,
+    }
+
+
+def build_shard(task: Dict) -> Dict:
+    """
+    Process pool worker: stream one shard of the roster into a partial deck.
     
-    template_slide = prs.slides[0]
-    print(f"Using slide 1 as template")
-    print(f"Current slides in presentation: {len(prs.slides)}")
+    Returns the (roster index, success, message) of each player, the ids
+    of the slides written and the resized photo cache counters.
+    """
+    derivatives = None
+    if task['derivatives'] is not None:
+        derivatives = DerivativeCache(**task['derivatives'])
+    
+    writer = StreamingDeckWriter(task['pptx_path'], task['shard_path'])
+    template = CompiledTemplate(Presentation(writer.template_package()).slides[0])
+    photos = prefetch_photos(template.photo_slot, [task['image_map'].get(player.phone) for _, player in task['players']],
+                             derivatives, task['prefetch'], task['placeholder'], task['link'])
+    results = []
+    for (i, player), photo in zip(task['players'], photos):
+        success, message = write_player_slide(writer, template, player, task['image_map'], photo)
+        results.append((i, success, message))
+    writer.close()
+    
+    return {
+        'results': results,
+        'slide_ids': writer.slide_ids,
+        'hits': derivatives.hits if derivatives else 0,
+        'misses': derivatives.misses if derivatives else 0,
+    }
+
+
+def build_player_slides_parallel(pptx_path: Path, players: List[Player], image_map: Dict[str, Path],
+                                 derivatives: Optional[DerivativeCache] = None,
+                                 hash_source: Callable[[Path], str] = file_hash,
+                                 workers: int = 2, prefetch: int = DEFAULT_PREFETCH,
+                                 placeholder: Optional[Path] = None, link: bool = False) -> Optional[Dict]:
+    """
+    Rebuild the deck in a process pool and merge the partial decks in roster order.
+    
+    The roster is split into one contiguous shard per worker; each worker
+    streams its shard into a partial deck. Returns the same statistics as
+    stream_player_slides(), or None if the deck could not be written.
+    """
+    keys, key_by_player, entries = roster_entries(players, image_map, hash_source)
+    stats = {
+        'total_players': len(players),
+        'slides_created': 0,
+        'slides_unchanged': 0,
+        'slides_removed': 0,
+        'images_found': 0,
+        'images_missing': 0,
+        'errors': 0
+    }
+    
+    # Players without phone numbers are skipped up front
+    results = []
+    valid = []
+    for i, player in enumerate(players, start=1):
+        if not player.has_phone:
+            results.append((i, None, f"⚠ Skipping {player.name or 'Unknown'} - invalid phone number"))
+        else:
+            valid.append((i, player))
+    
+    workers = max(1, min(workers, len(valid)))
+    shard_size = -(-len(valid) // workers) if valid else 1
+    shards = [valid[start:start + shard_size] for start in range(0, len(valid), shard_size)] or [[]]
+    
+    print(f"Building {len(valid)} player slides in {len(shards)} shard(s) with {workers} worker(s)...")
+    print("-" * 60)
+    
+    tmp_path = pptx_path.with_name(f".{pptx_path.name}.merging")
+    with tempfile.TemporaryDirectory(prefix=".shards-", dir=pptx_path.parent) as shard_dir:
+        tasks = [{
+            'pptx_path': pptx_path,
+            'shard_path': Path(shard_dir) / f"shard-{number:04d}.pptx",
+            'players': shard,
+            'image_map': {player.phone: image_map[player.phone] for _, player in shard if player.phone in image_map},
+            'derivatives': derivative_settings(derivatives),
+            'prefetch': prefetch,
+            'placeholder': placeholder,
+            'link': link,
+        } for number, shard in enumerate(shards, start=1)]
+        
+        try:
+            with metrics.stage('build_shards'), ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(build_shard, tasks))
+        except Exception as e:
+            print(f"✗ Error building slides: {e}")
+            return None
+        
+        for outcome in outcomes:
+            results.extend(outcome['results'])
+            if derivatives is not None:
+                derivatives.hits += outcome['hits']
+                derivatives.misses += outcome['misses']
+        
+        # Report in roster order
+        built_keys = []
+        for i, success, message in sorted(results, key=lambda result: result[0]):
+            player = players[i - 1]
+            print(f"  [{i:3d}/{len(players)}] {message}")
+            if not success:
+                stats['errors'] += 1
+                continue
+            built_keys.append(key_by_player[id(player)])
+            stats['slides_created'] += 1
+            if player.phone in image_map:
+                stats['images_found'] += 1
+            else:
+                stats['images_missing'] += 1
+        
+        print("-" * 60)
+        print()
+        
+        print(f"Merging {len(tasks)} partial deck(s) into: {pptx_path.name}")
+        try:
+            with metrics.stage('save_presentation'):
+                merged_ids = merge_decks([task['shard_path'] for task in tasks], tmp_path)
+                os.replace(tmp_path, pptx_path)
+            print("✓ Presentation saved successfully")
+        except Exception as e:
+            print(f"✗ Error saving presentation: {e}")
+            return None
+    
+    slide_ids = dict(zip(built_keys, merged_ids))
+    stats['manifest_players'] = manifest_players(keys, entries, slide_ids)
+    stats['total_slides'] = len(slide_ids) + 1
+    return stats
+
+
+def manifest_players(keys: List[str], entries: Dict[str, Dict], slide_ids: Dict[str, int],
+                     order: Optional[List[int]] = None) -> Dict[str, Dict]:
+    """
+    Manifest entries of the players with a slide, positioned after the
+    template as in `order` (slide ids in deck order), or in roster order.
+    """
+    ordered_keys = [key for key in keys if key in slide_ids]
+    if order is None:
+        order = [slide_ids[key] for key in ordered_keys]
+    position_of = {slide_id: position for position, slide_id in enumerate(order, start=2)}
+    ordered_keys.sort(key=lambda key: position_of[slide_ids[key]])
+    return {
+        key: dict(entries[key], slide_id=slide_ids[key], position=position_of[slide_ids[key]])
+        for key in ordered_keys
+    }
+
+
+@metrics.timed()
+def sync_slides(prs: Presentation, template: CompiledTemplate, players: List[Player], image_map: Dict[str, Path],
+                manifest: Dict, derivatives: Optional[DerivativeCache] = None,
+                hash_source: Callable[[Path], str] = file_hash, rebuild: Iterable[str] = (),
+                prefetch: int = DEFAULT_PREFETCH, placeholder: Optional[Path] = None, link: bool = False) -> Dict:
+    """
+    Bring the player slides of an open presentation in line with the roster.
+    
+    New and changed players, and those whose slide key is in `rebuild`, get a
+    new slide; slides of changed and removed players are dropped. Other
+    slides keep their order (e.g. after sort_slides_by_name.py); new slides
+    are placed as in place_slides(). The manifest's player entries are
+    updated in place. Up to `prefetch` photos are loaded on worker threads
+    ahead of the slide being built; players without a usable photo get the
+    `placeholder` photo, if given. With `link` new slides link to their
+    photo files instead of embedding them.
+    
+    Returns the statistics; 'changed' tells whether the deck needs saving.
+    """
+    keys, key_by_player, entries = roster_entries(players, image_map, hash_source)
+    previous_ids = [sldId.id for sldId in prs.slides._sldIdLst[1:]]
+    key_by_slide_id = {entry['slide_id']: key for key, entry in manifest['players'].items()}
+    
+    # Slide ids straight from the slide list: Slide.slide_id searches the list on every call
+    with metrics.stage('plan_sync'):
+        plan = plan_sync(manifest, entries, {sldId.id for sldId in prs.slides._sldIdLst}, rebuild)
+    removed_ids = {manifest['players'][key]['slide_id'] for key in plan.drop}
+    removed = drop_slides(prs, removed_ids)
+    slide_ids = {key: manifest['players'][key]['slide_id'] for key in plan.keep}
+    print(f"Unchanged: {len(plan.keep)}, to build: {len(plan.build)}, removed: {removed}")
     print()
     
     # Statistics
     stats = {
         'total_players': len(players),
         'slides_created': 0,
+        'slides_unchanged': len(plan.keep),
+        'slides_removed': removed,
         'images_found': 0,
         'images_missing': 0,
         'errors': 0
     }
     
-    # Generate slides for each player
+    # Generate slides for new and changed players
     print("Generating player slides...")
     print("-" * 60)
     
+    to_build = set(plan.build)
+    photos = prefetch_photos(template.photo_slot, [
+        image_map.get(player.phone) for player in players
+        if player.has_phone and key_by_player[id(player)] in to_build
+    ], derivatives, prefetch, placeholder, link)
+    
     for i, player in enumerate(players, start=1):
-        phone = player.get('Ph', '')
+        phone = player.phone
         
         # Skip players without phone numbers
-        if not phone or phone == '?' or not phone.isdigit():
-            print(f"  [{i:3d}/{len(players)}] ⚠ Skipping {player.get('Name', 'Unknown')} - invalid phone number")
+        if not player.has_phone:
+            print(f"  [{i:3d}/{len(players)}] ⚠ Skipping {player.name or 'Unknown'} - invalid phone number")
             stats['errors'] += 1
             continue
         
+        key = key_by_player[id(player)]
+        if key not in to_build:
+            continue
+        
         has_image = phone in image_map
         
         try:
-            success, message = create_player_slide(prs, template_slide, player, image_map)
+            success, message = create_player_slide(prs, template, player, image_map, next(photos))
             
             if success:
+                slide_ids[key] = prs.slides._sldIdLst[-1].id
                 stats['slides_created'] += 1
                 if has_image:
                     stats['images_found'] += 1
@@ -444,35 +1034,238 @@ def main():
             print(f"  [{i:3d}/{len(players)}] {message}")
         except Exception as e:
             stats['errors'] += 1
-            player_name = player.get('Name', 'Unknown')
+            player_name = player.name or 'Unknown'
             print(f"  [{i:3d}/{len(players)}] ✗ {player_name}: Error - {str(e)}")
     
     print("-" * 60)
     print()
     
-    # Save the updated presentation
-    output_path = pptx_path  # Overwrite original
-    print(f"Saving updated presentation to: {output_path.name}")
-    try:
-        prs.save(output_path)
-        print("✓ Presentation saved successfully")
-    except Exception as e:
-        print(f"✗ Error saving presentation: {e}")
-        sys.exit(1)
+    # Unchanged slides stay in their order; new ones go next to their roster neighbour
+    previous_order = [sldId.id for sldId in prs.slides._sldIdLst]
+    order = place_slides(previous_ids, key_by_slide_id, keys, slide_ids)
+    reorder_slides(prs, order)
+    reordered = previous_order != [sldId.id for sldId in prs.slides._sldIdLst]
     
-    # Print summary
+    # Record what is now in the deck
+    manifest['players'] = manifest_players(keys, entries, slide_ids, order)
+    stats['changed'] = bool(stats['slides_created'] or removed or reordered)
+    return stats
+
+
+@metrics.timed()
+def save_presentation(prs: Presentation, output_path: Path) -> None:
+    """
+    Save the presentation atomically, storing already-compressed media
+    rather than deflating it again (python-pptx deflates every part).
+    """
+    package = prs.part.package
+    parts = tuple(package.iter_parts())
+    tmp_path = output_path.with_name(f".{output_path.name}.tmp{os.getpid()}")
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as out:
+            out.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+            out.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+            for part in parts:
+                stored = os.path.splitext(part.partname)[1].lower() in STORED_EXTENSIONS
+                out.writestr(part.partname.membername, part.blob,
+                             zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+                if part._rels:
+                    out.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def print_summary(stats: Dict, derivatives: Optional[DerivativeCache] = None) -> None:
+    """Print the run statistics."""
     print()
     print("=" * 60)
     print("Summary")
     print("=" * 60)
     print(f"Total players processed: {stats['total_players']}")
     print(f"Slides created: {stats['slides_created']}")
+    print(f"Slides unchanged: {stats['slides_unchanged']}")
+    print(f"Slides removed: {stats['slides_removed']}")
     print(f"Images found and replaced: {stats['images_found']}")
     print(f"Images missing: {stats['images_missing']}")
     print(f"Errors: {stats['errors']}")
-    print(f"Total slides in presentation: {len(prs.slides)}")
+    if derivatives is not None:
+        print(f"Resized photos: {derivatives.misses} created, {derivatives.hits} reused from cache")
+    print(f"Total slides in presentation: {stats['total_slides']}")
     print("=" * 60)
 
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate player slides from the template slide.")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI,
+                        help=f"resolution photos are resized to for their slot (default: {DEFAULT_DPI})")
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY,
+                        help=f"JPEG quality of resized photos (default: {DEFAULT_QUALITY})")
+    parser.add_argument('--max-kb', type=int, default=None,
+                        help="lower the quality of resized photos until they fit this size")
+    parser.add_argument('--original-photos', action='store_true',
+                        help="embed the original photo files without resizing")
+    parser.add_argument('--placeholder', type=Path,
+                        help="photo shown for players without a usable photo (stored once in the deck)")
+    parser.add_argument('--draft', action='store_true',
+                        help="link the photos from the slides instead of embedding them, for fast "
+                             "iteration; `bcl package` embeds them into the final deck")
+    parser.add_argument('--full', action='store_true',
+                        help="rebuild every player slide instead of only new and changed players")
+    parser.add_argument('--stream', action='store_true',
+                        help="rebuild the whole deck, writing each slide to disk as soon as it is finished")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="rebuild the whole deck in N processes and merge the partial decks")
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH,
+                        help="photos loaded on worker threads ahead of the slide being built, "
+                             f"0 to load each photo when it is needed (default: {DEFAULT_PREFETCH})")
+    parser.add_argument('--profile', choices=MODES,
+                        help="record stage metrics, optionally with tracemalloc or cProfile capture")
+    parser.add_argument('--metrics', type=Path,
+                        help="write the stage metrics report to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    """Main function to generate player slides."""
+    args = parse_args()
+    metrics.start('generate_player_slides', args.profile, args.metrics)
+    
+    # Set up paths
+    script_dir = Path(__file__).parent
+    pptx_path = deck_path()
+    json_path = roster_path()
+    images_dir = photos_dir()
+    cache_dir = script_dir / ".photo_cache"
+    
+    # Validate input files
+    if not pptx_path.exists():
+        print(f"Error: PowerPoint file not found: {pptx_path}")
+        sys.exit(1)
+    
+    if not json_path.exists():
+        print(f"Error: Player data file not found: {json_path}")
+        sys.exit(1)
+    
+    print("=" * 60)
+    print("BCL Re-Auction 2025 - Generate Player Slides")
+    print("=" * 60)
+    print()
+    
+    # Load player data
+    players = load_player_data(json_path)
+    
+    # Resolve player images through the persistent asset index
+    asset_index = AssetIndex(images_dir)
+    image_map = scan_player_images(asset_index, players)
+    
+    # Resized photos are cached by source hash and target size
+    derivatives = None
+    if not args.original_photos:
+        max_bytes = args.max_kb * 1024 if args.max_kb else None
+        derivatives = DerivativeCache(cache_dir, dpi=args.dpi, quality=args.quality, max_bytes=max_bytes,
+                                      hash_source=asset_index.content_hash)
+        print(f"Resizing photos at {args.dpi} DPI (cache: {cache_dir.name}/)")
+    print()
+    
+    manifest_path = manifest_path_for(pptx_path)
+    settings = {
+        'dpi': args.dpi,
+        'quality': args.quality,
+        'max_kb': args.max_kb,
+        'original_photos': args.original_photos,
+    }
+    if args.placeholder:
+        if not args.placeholder.exists():
+            print(f"Error: Placeholder photo not found: {args.placeholder}")
+            sys.exit(1)
+        # A different placeholder photo rebuilds the slides showing it
+        settings['placeholder'] = file_hash(args.placeholder)
+    if args.draft:
+        # Switching between draft and embedded photos rebuilds every slide
+        settings['draft'] = True
+    
+    if args.stream or args.workers > 1:
+        if args.workers > 1:
+            stats = build_player_slides_parallel(pptx_path, players, image_map, derivatives,
+                                                 asset_index.content_hash, args.workers, args.prefetch,
+                                                 args.placeholder, args.draft)
+        else:
+            stats = stream_player_slides(pptx_path, players, image_map, derivatives, asset_index.content_hash,
+                                         args.prefetch, args.placeholder, args.draft)
+        if stats is None:
+            sys.exit(1)
+        manifest = new_manifest(settings)
+        manifest['players'] = stats.pop('manifest_players')
+        save_manifest(manifest_path, manifest)
+        print(f"Manifest saved to: {manifest_path.name}")
+        print_summary(stats, derivatives)
+        return
+    
+    # Load PowerPoint presentation
+    print(f"Loading PowerPoint: {pptx_path.name}")
+    try:
+        with metrics.stage('load_presentation'):
+            prs = Presentation(pptx_path)
+    except Exception as e:
+        print(f"Error loading PowerPoint: {e}")
+        sys.exit(1)
+    
+    # Get template slide (first slide)
+    if len(prs.slides) == 0:
+        print("Error: PowerPoint file has no slides")
+        sys.exit(1)
+    
+    template_slide = prs.slides[0]
+    print(f"Using slide 1 as template")
+    print(f"Current slides in presentation: {len(prs.slides)}")
+    
+    # Analyse the template once; every player slide is stamped from it
+    with metrics.stage('compile_template'):
+        template = CompiledTemplate(template_slide)
+    if template.photo_slot is None:
+        print("Warning: Template has no photo slot, slides will have no images")
+    print(f"Compiled template: {template.static_shape_count} static shape(s)")
+    print()
+    
+    # Only new, changed and removed players are touched when the manifest is usable
+    manifest = None if args.full else load_manifest(manifest_path)
+    if manifest is not None and manifest['settings'] != settings:
+        print("Photo settings changed since the last run, rebuilding all slides")
+        manifest = None
+    
+    removed = 0
+    if manifest is None:
+        # Full rebuild: start again from the template slide
+        player_slide_ids = {sldId.id for sldId in prs.slides._sldIdLst[1:]}
+        removed = drop_slides(prs, player_slide_ids)
+        print(f"Full rebuild: removed {removed} existing player slide(s)")
+        manifest = new_manifest(settings)
+    
+    stats = sync_slides(prs, template, players, image_map, manifest, derivatives, asset_index.content_hash,
+                        prefetch=args.prefetch, placeholder=args.placeholder, link=args.draft)
+    stats['slides_removed'] += removed
+    
+    if not stats['changed'] and not removed:
+        print("✓ Deck is up to date, nothing to save")
+    else:
+        # Save the updated presentation
+        output_path = pptx_path  # Overwrite original
+        print(f"Saving updated presentation to: {output_path.name}")
+        try:
+            save_presentation(prs, output_path)
+            print("✓ Presentation saved successfully")
+        except Exception as e:
+            print(f"✗ Error saving presentation: {e}")
+            sys.exit(1)
+    
+    save_manifest(manifest_path, manifest)
+    print(f"Manifest saved to: {manifest_path.name}")
+    
+    stats['total_slides'] = len(prs.slides)
+    print_summary(stats, derivatives)
+
+
 if __name__ == "__main__":
     main()
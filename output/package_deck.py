@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Package Deck
+Turns a draft deck into the final deck. A draft (`bcl slides --draft`)
+links each player photo from its slide as a file instead of embedding it,
+so it builds and opens quickly while the roster is still changing; this
+embeds every linked photo so the deck can be copied to another machine.
+
+The draft's package is copied entry by entry. Each linked file is read
+once and stored as a media part, and the slides that link it refer to
+that part instead. Slide ids and order do not change, so the draft's
+manifest carries over as the manifest of an embedded build.
+
+Usage:
+    python3 package_deck.py [--output final.pptx]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import zipfile
+from pathlib import Path
+from typing import Dict
+from lxml import etree
+
+from deck_manifest import load_manifest, manifest_path_for, save_manifest
+from deck_reader import (CONTENT_TYPES, NS, RT_IMAGE, DeckReader, linked_file, rels_name_for, relative_target,
+                         serialize)
+from deck_writer import IMAGE_CONTENT_TYPES, STORED_EXTENSIONS
+from pipeline_config import deck_path
+from pipeline_metrics import MODES, metrics
+
+
+R_EMBED = f"{{{NS['r']}}}embed"
+R_LINK = f"{{{NS['r']}}}link"
+
+
+def linked_photos(deck: DeckReader) -> Dict[str, Dict[str, Path]]:
+    """Local image files linked from each slide: {slide partname: {rId: file}}."""
+    links = {}
+    for partname in deck.slide_partnames():
+        files = {}
+        for rId, rel_type, target in deck.read_rels(partname, external=True):
+            path = linked_file(target)
+            if rel_type == RT_IMAGE and path is not None:
+                files[rId] = path
+        if files:
+            links[partname] = files
+    return links
+
+
+def embed_links(slide, rIds: set) -> None:
+    """Point pictures that link one of `rIds` at the relationship as an embedded image."""
+    for blip in slide.iterfind('.//a:blip', NS):
+        rId = blip.get(R_LINK)
+        if rId in rIds:
+            if blip.get(R_EMBED) is None:
+                blip.set(R_EMBED, rId)
+            del blip.attrib[R_LINK]
+
+
+class MediaStore:
+    """New media parts written to the output package, one per unique content."""
+
+    def __init__(self, out: zipfile.ZipFile, names: set):
+        self.out = out
+        self.names = set(names)
+        self.by_hash: Dict[str, str] = {}
+        self.by_path: Dict[Path, str] = {}
+        self.extensions = set()
+        self.added = 0
+        self._next_number = 1
+
+    def add_existing(self, partname: str, data: bytes) -> None:
+        """Index a media part of the draft, so a linked file with the same content reuses it."""
+        self.by_hash.setdefault(hashlib.sha1(data).hexdigest(), partname)
+
+    def add_file(self, path: Path) -> str:
+        """Store a linked file once and return its part name."""
+        if path in self.by_path:
+            return self.by_path[path]
+        data = path.read_bytes()
+        key = hashlib.sha1(data).hexdigest()
+        if key not in self.by_hash:
+            ext = path.suffix.lower().lstrip('.')
+            partname = f"ppt/media/image{self._next_number}.{ext}"
+            while partname in self.names:
+                self._next_number += 1
+                partname = f"ppt/media/image{self._next_number}.{ext}"
+            stored = f".{ext}" in STORED_EXTENSIONS
+            self.out.writestr(partname, data, zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+            self.names.add(partname)
+            self.extensions.add(ext)
+            self.by_hash[key] = partname
+            self.added += 1
+        self.by_path[path] = self.by_hash[key]
+        return self.by_path[path]
+
+
+def content_types_with(deck: DeckReader, extensions: set):
+    """The draft's content types, with a default for each new media extension."""
+    types = etree.fromstring(deck.zip.read(CONTENT_TYPES))
+    defaults = {default.get('Extension').lower() for default in types.findall('ct:Default', NS)}
+    for ext in sorted(extensions - defaults):
+        default = etree.Element(f"{{{NS['ct']}}}Default")
+        default.set('Extension', ext)
+        default.set('ContentType', IMAGE_CONTENT_TYPES.get(ext, 'application/octet-stream'))
+        types.insert(0, default)
+    return types
+
+
+@metrics.timed()
+def package_deck(draft_path: Path, output_path: Path) -> Dict[str, int]:
+    """
+    Write the draft deck with its linked photos embedded.
+
+    Returns counts of the slides and photos embedded. Raises
+    FileNotFoundError, listing the files, if any linked photo is missing.
+    """
+    tmp_path = output_path.with_name(f".{output_path.name}.packaging")
+    with DeckReader(draft_path) as deck:
+        links = linked_photos(deck)
+        missing = sorted({str(path) for files in links.values() for path in files.values() if not path.is_file()})
+        if missing:
+            raise FileNotFoundError("Linked photos not found:\n  " + "\n  ".join(missing))
+
+        rewritten = set(links) | {rels_name_for(partname) for partname in links}
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as out:
+                media = MediaStore(out, deck.names)
+
+                # Everything but the linking slides is copied as it is
+                with metrics.stage('copy_entries'):
+                    for info in deck.zip.infolist():
+                        if info.filename in rewritten or info.filename == CONTENT_TYPES:
+                            continue
+                        data = deck.zip.read(info)
+                        out.writestr(info, data)
+                        if info.filename.startswith('ppt/media/'):
+                            media.add_existing(info.filename, data)
+
+                with metrics.stage('embed_photos'):
+                    for partname, files in links.items():
+                        rels = etree.fromstring(deck.zip.read(rels_name_for(partname)))
+                        for rel in rels.findall('pr:Relationship', NS):
+                            if rel.get('Id') in files:
+                                media_partname = media.add_file(files[rel.get('Id')])
+                                rel.set('Target', relative_target(partname, media_partname))
+                                del rel.attrib['TargetMode']
+                        slide = deck.slide_xml(partname)
+                        embed_links(slide, set(files))
+                        out.writestr(partname, serialize(slide))
+                        out.writestr(rels_name_for(partname), serialize(rels))
+
+                out.writestr(CONTENT_TYPES, serialize(content_types_with(deck, media.extensions)))
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    return {
+        'slides': len(links),
+        'links': sum(len(files) for files in links.values()),
+        'photos': len(media.by_path),
+        'media_added': media.added,
+    }
+
+
+def package_manifest(draft_path: Path, output_path: Path) -> bool:
+    """Carry the draft's manifest over to the packaged deck as an embedded build; False if there is none."""
+    manifest = load_manifest(manifest_path_for(draft_path))
+    if manifest is None:
+        return False
+    manifest['settings'].pop('draft', None)
+    save_manifest(manifest_path_for(output_path), manifest)
+    return True
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Embed the linked photos of a draft deck.")
+    parser.add_argument('--draft', type=Path, default=deck_path(),
+                        help="draft deck built with --draft (default: the player deck, or $BCL_DECK)")
+    parser.add_argument('--output', type=Path,
+                        help="final deck to write (default: replace the draft)")
+    parser.add_argument('--profile', choices=MODES,
+                        help="record stage metrics, optionally with tracemalloc or cProfile capture")
+    parser.add_argument('--metrics', type=Path,
+                        help="write the stage metrics report to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    metrics.start('package_deck', args.profile, args.metrics)
+    draft_path = args.draft
+    output_path = args.output or draft_path
+
+    if not draft_path.exists():
+        print(f"Error: {draft_path} not found")
+        sys.exit(1)
+
+    print(f"Packaging {draft_path.name} into {output_path.name}")
+    try:
+        counts = package_deck(draft_path, output_path)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        print("Rebuild the draft (`bcl slides --draft`) to link the current photo files")
+        sys.exit(1)
+    except Exception as e:
+        print(f"✗ Error packaging deck: {e}")
+        sys.exit(1)
+
+    if not counts['links']:
+        print("No linked photos, the deck is already fully embedded")
+    else:
+        print(f"✓ Embedded {counts['photos']} photo file(s) ({counts['media_added']} new media part(s)) "
+              f"linked {counts['links']} time(s) from {counts['slides']} slide(s)")
+    if package_manifest(draft_path, output_path):
+        print(f"Manifest saved to: {manifest_path_for(output_path).name}")
+
+
+if __name__ == "__main__":
+    main()
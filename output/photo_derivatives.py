@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Photo Derivatives
+Downsizes player photos to the size they are displayed at before they are
+embedded in the deck. Derivatives are stored in a content-addressed cache
+keyed by source hash and target size, so reruns reuse them.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Tuple
+from PIL import Image, ImageOps
+
+from pipeline_metrics import metrics
+
+
+EMU_PER_INCH = 914400
+
+# Defaults for slide photos
+DEFAULT_DPI = 150
+DEFAULT_QUALITY = 85
+MIN_QUALITY = 50
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Part of the cache key; bumped when rendering changes (2: transparency on white)
+RENDER_VERSION = 2
+
+
+class Derivative(NamedTuple):
+    """A cached, resized copy of a source photo."""
+    path: Path
+    width: int
+    height: int
+
+
+def file_hash(filepath: Path) -> str:
+    """Calculate SHA-256 hash of a file."""
+    hash_sha = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_sha.update(chunk)
+    return hash_sha.hexdigest()
+
+
+def flatten_rgb(img: Image.Image) -> Image.Image:
+    """RGB copy of an image, with transparent areas (alpha or a transparent colour) composited onto white."""
+    if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+        img = img.convert('RGBA')
+        return Image.alpha_composite(Image.new('RGBA', img.size, (255, 255, 255, 255)), img).convert('RGB')
+    return img.convert('RGB')
+
+
+def emu_to_pixels(emu: int, dpi: int) -> int:
+    """Convert a length in EMU to pixels at the given DPI."""
+    return max(1, round(emu / EMU_PER_INCH * dpi))
+
+
+class DerivativeCache:
+    """
+    Content-addressed cache of resized photos.
+
+    Each derivative is fitted inside the target box (aspect ratio kept),
+    rotated according to its EXIF orientation, stripped of metadata and
+    re-encoded at `quality`. When `max_bytes` is set, quality is lowered
+    step by step until the encoded photo fits. `hash_source` computes the
+    cache key of a source file, e.g. from an index of known hashes.
+    One cache can be shared by the threads preparing photos.
+    """
+
+    def __init__(self, cache_dir: Path, dpi: int = DEFAULT_DPI, quality: int = DEFAULT_QUALITY,
+                 max_bytes: Optional[int] = None, hash_source: Callable[[Path], str] = file_hash):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.hash_source = hash_source
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def target_size(self, box_width: int, box_height: int) -> Tuple[int, int]:
+        """Pixel size of a box given in EMU at the configured DPI."""
+        return emu_to_pixels(box_width, self.dpi), emu_to_pixels(box_height, self.dpi)
+
+    def derive(self, source: Path, box_width: int, box_height: int, source_hash: Optional[str] = None) -> Derivative:
+        """Return the derivative of `source` for a box given in EMU, creating it if needed."""
+        target = self.target_size(box_width, box_height)
+        source_hash = source_hash or self.hash_source(source)
+
+        settings = f"q{self.quality}" + (f"-max{self.max_bytes}" if self.max_bytes else "") + f"-r{RENDER_VERSION}"
+        key = f"{source_hash}-{target[0]}x{target[1]}-{settings}"
+        cached = self.cache_dir / source_hash[:2] / f"{key}.jpg"
+
+        if cached.exists():
+            with self._counter_lock:
+                self.hits += 1
+            with Image.open(cached) as img:
+                width, height = img.size
+            return Derivative(cached, width, height)
+
+        with self._counter_lock:
+            self.misses += 1
+        data, (width, height) = self._render(source, target)
+
+        # Write atomically so an interrupted run never leaves a truncated file;
+        # threads rendering the same photo each write their own temporary file
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cached.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, cached)
+        return Derivative(cached, width, height)
+
+    @metrics.timed('render_photo')
+    def _render(self, source: Path, target: Tuple[int, int]) -> Tuple[bytes, Tuple[int, int]]:
+        """Decode, orient, resize and re-encode a photo as JPEG."""
+        with Image.open(source) as img:
+            orientation = img.getexif().get(0x0112, 1)
+            decode_size = target[::-1] if orientation in TRANSPOSED_ORIENTATIONS else target
+
+            # Reduce-on-decode: JPEG decoders can scale by 1/2, 1/4 or 1/8 while decoding
+            img.draft('RGB', decode_size)
+            img = ImageOps.exif_transpose(img)
+            img = flatten_rgb(img)
+            img.thumbnail(target, Image.Resampling.LANCZOS)
+
+            quality = self.quality
+            while True:
+                # No exif/icc arguments: metadata is not carried over
+                buffer = io.BytesIO()
+                img.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+                if not self.max_bytes or buffer.tell() <= self.max_bytes or quality <= MIN_QUALITY:
+                    return buffer.getvalue(), img.size
+                quality = max(MIN_QUALITY, quality - 10)
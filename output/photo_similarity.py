@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Photo Similarity
+Perceptual hashes for finding resized or recompressed copies of the same
+photo. Each photo is reduced to a 64-bit hash (pHash: low frequencies of
+a 32x32 DCT, or dHash: horizontal gradients of a 9x8 thumbnail); similar
+photos have hashes a few bits apart. Near neighbours are found through a
+BK-tree, so photos are never compared pairwise.
+
+Needs NumPy (pip install numpy).
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+PHASH_SIZE = 32    # side of the grayscale image the DCT is taken of
+PHASH_LOW = 8      # side of the low-frequency block kept (64 bits)
+DHASH_SIZE = 8     # 9x8 thumbnail, 64 bits
+
+# Hashes this many bits apart or fewer count as the same photo
+DEFAULT_DISTANCE = 8
+
+# Decoding and resizing release the GIL
+WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+_BIT_WEIGHTS = 1 << np.arange(63, -1, -1, dtype=np.uint64)
+
+
+def grayscale(path: Path, size: Tuple[int, int]) -> np.ndarray:
+    """Photo decoded at reduced size, upright, in grayscale, resized to `size` (width, height)."""
+    with Image.open(path) as img:
+        img.draft('L', (size[0] * 4, size[1] * 4))
+        img = ImageOps.exif_transpose(img).convert('L')
+        return np.asarray(img.resize(size, Image.Resampling.LANCZOS), dtype=np.float32)
+
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    """Pack rows of 64 booleans into unsigned 64-bit integers."""
+    return (bits.reshape(len(bits), 64).astype(np.uint64) * _BIT_WEIGHTS).sum(axis=1, dtype=np.uint64)
+
+
+def phashes(images: np.ndarray) -> np.ndarray:
+    """pHash of a stack of PHASH_SIZE x PHASH_SIZE grayscale images, all at once."""
+    coefficients = _DCT @ images @ _DCT.T
+    low = coefficients[:, :PHASH_LOW, :PHASH_LOW].reshape(len(images), -1)
+    # The DC term carries overall brightness only; leave it out of the median
+    medians = np.median(low[:, 1:], axis=1, keepdims=True)
+    return pack_bits(low > medians)
+
+
+def dhashes(images: np.ndarray) -> np.ndarray:
+    """dHash of a stack of DHASH_SIZE x (DHASH_SIZE + 1) grayscale images, all at once."""
+    return pack_bits(images[:, :, 1:] > images[:, :, :-1])
+
+
+HASHERS: Dict[str, Tuple[Tuple[int, int], Callable[[np.ndarray], np.ndarray]]] = {
+    'phash': ((PHASH_SIZE, PHASH_SIZE), phashes),
+    'dhash': ((DHASH_SIZE + 1, DHASH_SIZE), dhashes),
+}
+
+
+def perceptual_hashes(paths: List[Path], method: str = 'phash') -> Dict[Path, Optional[int]]:
+    """Perceptual hash of each photo (None if it can't be read), decoded on a thread pool."""
+    size, hasher = HASHERS[method]
+
+    def load(path: Path) -> Optional[np.ndarray]:
+        try:
+            return grayscale(path, size)
+        except Exception as e:
+            print(f"Warning: Could not read image {path.name}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        images = list(pool.map(load, paths))
+
+    readable = [index for index, image in enumerate(images) if image is not None]
+    hashes: Dict[Path, Optional[int]] = {path: None for path in paths}
+    if readable:
+        values = hasher(np.stack([images[index] for index in readable]))
+        for index, value in zip(readable, values):
+            hashes[paths[index]] = int(value)
+    return hashes
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits."""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over Hamming distance: finds every hash within a
+    distance of a query while visiting only a small part of the tree.
+    """
+
+    def __init__(self):
+        # Node: [hash, items, {distance: child}]
+        self._root = None
+
+    def add(self, value: int, item) -> None:
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """(distance, item) of every item within `max_distance` of `value`."""
+        found = []
+        pending = [self._root] if self._root is not None else []
+        while pending:
+            node = pending.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            # Triangle inequality: only children in this band can hold matches
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    pending.append(child)
+        return found
+
+
+def similar_clusters(hashes: Dict[Path, int], max_distance: int = DEFAULT_DISTANCE) -> List[List[Path]]:
+    """
+    Group photos whose hashes are within `max_distance` bits, transitively.
+    Returns clusters of two or more photos, each sorted by name.
+    """
+    # Photos with equal hashes share one tree node and one search
+    paths_by_value: Dict[int, List[Path]] = {}
+    for path, value in hashes.items():
+        paths_by_value.setdefault(value, []).append(path)
+    tree = BKTree()
+    for value in paths_by_value:
+        tree.add(value, value)
+
+    # Union-find over every near pair of hash values
+    parent = {value: value for value in paths_by_value}
+
+    def find(value: int) -> int:
+        while parent[value] != value:
+            parent[value] = parent[parent[value]]
+            value = parent[value]
+        return value
+
+    for value in paths_by_value:
+        for _, other in tree.search(value, max_distance):
+            root, other_root = find(value), find(other)
+            if root != other_root:
+                parent[other_root] = root
+
+    clusters: Dict[int, List[Path]] = {}
+    for value, paths in paths_by_value.items():
+        clusters.setdefault(find(value), []).extend(paths)
+    return sorted((sorted(cluster) for cluster in clusters.values() if len(cluster) > 1),
+                  key=lambda cluster: cluster[0])
+
+
+def cluster_distance(cluster: Iterable[Path], hashes: Dict[Path, int]) -> int:
+    """Largest Hamming distance between two photos of a cluster."""
+    values = [hashes[path] for path in cluster]
+    return max(hamming(a, b) for i, a in enumerate(values) for b in values[i + 1:])
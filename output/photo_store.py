@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Photo Store
+Content-addressed store for the player photos. Each distinct image is kept
+once, as .photo_store/<hash[:2]>/<hash>.<ext> next to the photos, and every
+directory that needs the photos (such as public/assets/players/) gets
+phone-keyed names that link to the stored objects instead of full copies.
+
+Hard links are used by default: the photo directory, the store and the
+linked directories then share one copy on disk, and every tree reads the
+same bytes. Replace a photo with a new file rather than editing it in
+place, since an in-place edit would change every link at once. Use
+--symlink for relative symbolic links, and directories on another file
+system fall back to copies.
+
+Usage:
+    python3 photo_store.py sync ../public/assets/players [--prune] [--dry-run]
+    python3 photo_store.py status ../public/assets/players
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from asset_index import AssetIndex
+from pipeline_config import photos_dir
+
+
+STORE_DIRNAME = ".photo_store"
+
+# JPEG photos are stored and linked as .jpg, the name the web app expects
+EXTENSION_ALIASES = {'.jpeg': '.jpg'}
+
+HARDLINK = 'hardlink'
+SYMLINK = 'symlink'
+
+
+def normalized_suffix(path: Path) -> str:
+    suffix = path.suffix.lower()
+    return EXTENSION_ALIASES.get(suffix, suffix)
+
+
+def same_file(a: Path, b: Path) -> bool:
+    """True if both paths exist and are the same file (hard link or symlink)."""
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def replace_with_link(target: Path, source: Path, mode: str) -> str:
+    """
+    Atomically make `target` a link to `source` (or a copy, across file systems).
+    Returns how it was linked: 'hardlink', 'symlink' or 'copy'.
+    """
+    tmp_path = target.with_name(f".{target.name}.link{os.getpid()}")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        if mode == SYMLINK:
+            os.symlink(os.path.relpath(source, target.parent), tmp_path)
+            how = SYMLINK
+        else:
+            try:
+                os.link(source, tmp_path)
+                how = HARDLINK
+            except OSError:
+                shutil.copy2(source, tmp_path)
+                how = 'copy'
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return how
+
+
+class PhotoStore:
+    """
+    Content-addressed photo objects under `root`, named by SHA-256 as
+    recorded in the asset index of the photo directory.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def object_path(self, digest: str, suffix: str) -> Path:
+        return self.root / digest[:2] / f"{digest}{suffix}"
+
+    def objects(self) -> List[Path]:
+        """Every stored object."""
+        if not self.root.exists():
+            return []
+        return sorted(path for path in self.root.glob('??/*') if path.is_file())
+
+    def inodes(self) -> Set[Tuple[int, int]]:
+        """(device, inode) of every stored object, to recognise hard links to them."""
+        inodes = set()
+        for obj in self.objects():
+            stat = obj.stat()
+            inodes.add((stat.st_dev, stat.st_ino))
+        return inodes
+
+    def links_to_store(self, path: Path, inodes: Set[Tuple[int, int]]) -> bool:
+        """True if `path` is a link this tool made: a symlink into the store or a hard link to an object."""
+        if path.is_symlink():
+            return self.root.resolve() in path.resolve().parents
+        stat = path.stat()
+        return (stat.st_dev, stat.st_ino) in inodes
+
+    def ingest(self, path: Path, digest: str, dry_run: bool = False) -> Tuple[Path, bool]:
+        """
+        Store a photo under its hash, as a hard link to it where possible.
+        Returns the object path and whether it was newly stored.
+        """
+        obj = self.object_path(digest, normalized_suffix(path))
+        if obj.exists():
+            return obj, False
+        if not dry_run:
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            replace_with_link(obj, path, HARDLINK)
+        return obj, True
+
+    def collect(self, keep: set, dry_run: bool = False) -> Tuple[int, int]:
+        """Remove objects not in `keep`; returns (objects removed, bytes freed)."""
+        removed, freed = 0, 0
+        for obj in self.objects():
+            if obj in keep:
+                continue
+            stat = obj.stat()
+            removed += 1
+            # A hard-linked object only frees space with its last link
+            if stat.st_nlink == 1:
+                freed += stat.st_size
+            if dry_run:
+                print(f"[dry run] would remove {obj}")
+            else:
+                obj.unlink()
+        return removed, freed
+
+
+def photo_objects(images_dir: Path, store: PhotoStore, dry_run: bool = False) -> Tuple[Dict[str, Path], Dict[str, int]]:
+    """
+    Store every photo in `images_dir` and dedupe the directory against the store.
+    Returns the object of each phone number's photo and counts of what was done.
+    """
+    index = AssetIndex(images_dir)
+    index.refresh()
+    index.hash_files(index.path(name) for name in index.entries)
+
+    counts = {'photos': len(index.entries), 'stored': 0, 'relinked': 0}
+    object_by_name: Dict[str, Path] = {}
+    for name, entry in sorted(index.entries.items()):
+        path = index.path(name)
+        obj, stored = store.ingest(path, entry['hash'], dry_run)
+        counts['stored'] += stored
+        # A second copy of stored bytes becomes a link to the stored object
+        if not stored and not same_file(path, obj):
+            counts['relinked'] += 1
+            if not dry_run:
+                replace_with_link(path, obj, HARDLINK)
+        object_by_name[name] = obj
+    index.save()
+
+    objects = {phone: object_by_name[path.name] for phone, path in index.phone_map().items()}
+    return objects, counts
+
+
+def sync_directory(target_dir: Path, objects: Dict[str, Path], store: PhotoStore, mode: str,
+                   prune: bool = False, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Give `target_dir` one phone-keyed link per photo object.
+    With `prune`, links into the store that no photo needs any more are
+    removed; files that are not links into the store (other photos, or
+    copies made across file systems) are never touched.
+    """
+    counts = {'linked': 0, 'unchanged': 0, 'copied': 0, 'pruned': 0}
+    wanted = {f"{phone}{obj.suffix}": obj for phone, obj in objects.items()}
+    if not dry_run:
+        target_dir.mkdir(parents=True, exist_ok=True)
+
+    for name, obj in sorted(wanted.items()):
+        target = target_dir / name
+        if same_file(target, obj) and (mode == SYMLINK) == target.is_symlink():
+            counts['unchanged'] += 1
+            continue
+        if dry_run:
+            counts['linked'] += 1
+            continue
+        how = replace_with_link(target, obj, mode)
+        counts['copied' if how == 'copy' else 'linked'] += 1
+
+    if prune and target_dir.exists():
+        inodes = store.inodes()
+        for path in sorted(target_dir.iterdir()):
+            if path.name in wanted or not (path.is_file() or path.is_symlink()):
+                continue
+            if not store.links_to_store(path, inodes):
+                continue
+            counts['pruned'] += 1
+            if dry_run:
+                print(f"[dry run] would remove {path}")
+            else:
+                path.unlink()
+    return counts
+
+
+def disk_usage(paths: List[Path]) -> Tuple[int, int]:
+    """(bytes the files take counting every copy, bytes of the distinct files on disk)."""
+    total, distinct = 0, 0
+    seen = set()
+    for path in paths:
+        stat = path.stat()
+        total += stat.st_size
+        if (stat.st_dev, stat.st_ino) not in seen:
+            seen.add((stat.st_dev, stat.st_ino))
+            distinct += stat.st_size
+    return total, distinct
+
+
+def format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def print_status(images_dir: Path, store: PhotoStore, target_dirs: List[Path]) -> None:
+    """How many photos each tree holds and how much of it is shared."""
+    trees = [('photos', images_dir)] + [(str(target_dir), target_dir) for target_dir in target_dirs]
+    all_files = []
+    for label, directory in trees:
+        files = sorted(path for path in directory.iterdir()
+                       if path.is_file() and path.suffix.lower() in ('.jpg', '.jpeg', '.png')) \
+            if directory.exists() else []
+        stored = sum(1 for path in files if path.is_symlink() or path.stat().st_nlink > 1)
+        print(f"  {label}: {len(files)} photos, {stored} linked to the store")
+        all_files.extend(path.resolve() if path.is_symlink() else path for path in files)
+    objects = store.objects()
+    total, distinct = disk_usage(all_files + objects)
+    print(f"  store: {len(objects)} objects")
+    print(f"Size of all copies: {format_size(total)}, on disk: {format_size(distinct)}")
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Keep player photos once, linked by phone number.")
+    parser.add_argument('--photos', type=Path, default=photos_dir(),
+                        help="directory of the player photos (default: this directory, or $BCL_PHOTOS)")
+    parser.add_argument('--store', type=Path,
+                        help=f"object store (default: {STORE_DIRNAME} in the photo directory)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sync = commands.add_parser('sync', help="store new photos and link them into the given directories")
+    sync.add_argument('targets', type=Path, nargs='*', help="directories to fill with phone-keyed links")
+    sync.add_argument('--symlink', action='store_true', help="use relative symbolic links instead of hard links")
+    sync.add_argument('--prune', action='store_true',
+                      help="remove links into the store that no photo needs any more, and unused objects")
+    sync.add_argument('--dry-run', action='store_true', help="report what would change without changing it")
+
+    status = commands.add_parser('status', help="show how the photos are stored")
+    status.add_argument('targets', type=Path, nargs='*', help="linked directories to include")
+    args = parser.parse_args()
+
+    if not args.photos.is_dir():
+        print(f"Error: Directory {args.photos} does not exist")
+        sys.exit(1)
+    store = PhotoStore(args.store or args.photos / STORE_DIRNAME)
+
+    if args.command == 'status':
+        print_status(args.photos, store, args.targets)
+        return
+
+    prefix = "[dry run] " if args.dry_run else ""
+    objects, counts = photo_objects(args.photos, store, args.dry_run)
+    print(f"{prefix}Photos: {counts['photos']} ({counts['stored']} newly stored, "
+          f"{counts['relinked']} duplicate copies linked to the store)")
+
+    mode = SYMLINK if args.symlink else HARDLINK
+    for target_dir in args.targets:
+        result = sync_directory(target_dir, objects, store, mode, args.prune, args.dry_run)
+        print(f"{prefix}{target_dir}: {result['linked']} linked, {result['unchanged']} unchanged, "
+              f"{result['copied']} copied (other file system), {result['pruned']} pruned")
+
+    # Objects no photo refers to any more (replaced or deleted photos)
+    if args.prune:
+        index = AssetIndex(args.photos)
+        keep = {store.object_path(entry['hash'], normalized_suffix(Path(name)))
+                for name, entry in index.entries.items()}
+        removed, freed = store.collect(keep, args.dry_run)
+        print(f"{prefix}Store: {removed} unused objects removed, {format_size(freed)} freed")
+
+
+if __name__ == "__main__":
+    main()
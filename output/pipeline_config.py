@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Pipeline Configuration
+Paths shared by the pipeline scripts and the bcl command. Each can be
+overridden through the environment (the bcl command sets these from its
+--deck, --roster and --photos options):
+
+    BCL_DECK     player deck (default: output/Re-Auction-2025-BCL-Players.pptx)
+    BCL_ROSTER   players_data.json or another roster file (default: output/players_data.json)
+    BCL_PHOTOS   directory of the phone-named player photos (default: output/)
+
+Only the standard library is imported here, so any command can read it.
+"""
+
+import os
+from pathlib import Path
+
+
+OUTPUT_DIR = Path(__file__).resolve().parent
+REPO_DIR = OUTPUT_DIR.parent
+PUBLIC_PLAYERS_DIR = REPO_DIR / "public" / "assets" / "players"
+
+DECK_NAME = "Re-Auction-2025-BCL-Players.pptx"
+
+DECK_ENV = 'BCL_DECK'
+ROSTER_ENV = 'BCL_ROSTER'
+PHOTOS_ENV = 'BCL_PHOTOS'
+
+
+def _configured(env: str, default: Path) -> Path:
+    value = os.environ.get(env)
+    return Path(value) if value else default
+
+
+def deck_path() -> Path:
+    """The player deck."""
+    return _configured(DECK_ENV, OUTPUT_DIR / DECK_NAME)
+
+
+def roster_path() -> Path:
+    """The roster the deck is built from."""
+    return _configured(ROSTER_ENV, OUTPUT_DIR / "players_data.json")
+
+
+def photos_dir() -> Path:
+    """Directory of the player photos."""
+    return _configured(PHOTOS_ENV, OUTPUT_DIR)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Pipeline Metrics
+Stage-level instrumentation for the pipeline scripts. Records the wall
+time and call count of each stage and writes a JSON report that can be
+compared between runs. Two capture modes add detail:
+
+    tracemalloc  memory allocated and peak traced memory per stage
+    cprofile     a full cProfile capture (.prof file plus the top
+                 functions in the report)
+
+Scripts enable it with --profile/--metrics, or through the environment:
+
+    BCL_PROFILE=timing|tracemalloc|cprofile
+    BCL_METRICS=path/to/report.json
+
+When neither is set, stages cost a single attribute check.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+MODES = ('timing', 'tracemalloc', 'cprofile')
+PROFILE_ENV = 'BCL_PROFILE'
+METRICS_ENV = 'BCL_METRICS'
+
+# Functions listed in the report of a cProfile capture
+PROFILE_TOP = 30
+
+
+class Metrics:
+    """
+    Collects per-stage statistics for one script run.
+
+    Stages nest within a thread; each stage's time includes its inner
+    stages, and stages may run on several threads at once. Call
+    `start()` once at the beginning of a script; the report is written
+    when the interpreter exits, including after sys.exit().
+    """
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self.script = None
+        self.report_path: Optional[Path] = None
+        self.stages: Dict[str, Dict] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._started = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    def start(self, script: str, mode: Optional[str] = None, report_path: Optional[Path] = None) -> None:
+        """Enable instrumentation if a mode or report path is given, here or in the environment."""
+        mode = mode or os.environ.get(PROFILE_ENV) or None
+        report_path = report_path or os.environ.get(METRICS_ENV) or None
+        if mode is None and report_path is None:
+            return
+        if mode is None:
+            mode = 'timing'
+        if mode not in MODES:
+            print(f"Warning: Unknown profile mode '{mode}', using 'timing' (choose from {', '.join(MODES)})")
+            mode = 'timing'
+
+        self.mode = mode
+        self.script = script
+        self.report_path = Path(report_path) if report_path else Path(f"{script}.metrics.json")
+        self._started = time.perf_counter()
+
+        if mode == 'tracemalloc':
+            tracemalloc.start()
+        elif mode == 'cprofile':
+            # Imported only when profiling, to keep the start-up of every script short
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        atexit.register(self.finish)
+
+    def _thread_stack(self) -> List[Dict]:
+        """Open stages of the calling thread, innermost last."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the enclosed block as one call of stage `name`."""
+        if self.mode is None:
+            yield
+            return
+
+        stack = self._thread_stack()
+        frame = {'peak': 0}
+        if self.mode == 'tracemalloc':
+            frame['memory'] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                self._record(name, elapsed, frame, stack)
+
+    def _record(self, name: str, elapsed: float, frame: Dict, stack: List[Dict]) -> None:
+        stats = self.stages.setdefault(name, {'calls': 0, 'total_s': 0.0, 'min_s': None, 'max_s': 0.0})
+        stats['calls'] += 1
+        stats['total_s'] += elapsed
+        stats['min_s'] = elapsed if stats['min_s'] is None else min(stats['min_s'], elapsed)
+        stats['max_s'] = max(stats['max_s'], elapsed)
+
+        if self.mode == 'tracemalloc':
+            current, peak = tracemalloc.get_traced_memory()
+            # An inner stage reset the peak; carry its peak up to the enclosing stages
+            peak = max(peak, frame['peak'])
+            for outer in stack:
+                outer['peak'] = max(outer['peak'], peak)
+            stats['alloc_bytes'] = stats.get('alloc_bytes', 0) + current - frame['memory']
+            stats['peak_bytes'] = max(stats.get('peak_bytes', 0), peak)
+
+    def timed(self, name: Optional[str] = None):
+        """Decorator: measure every call of the function as stage `name` (default: its name)."""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.mode is None:
+                    return func(*args, **kwargs)
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def report(self) -> Dict:
+        """The metrics collected so far."""
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = dict(stats, mean_s=stats['total_s'] / stats['calls'])
+        return {
+            'script': self.script,
+            'mode': self.mode,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'argv': sys.argv[1:],
+            'wall_s': time.perf_counter() - self._started,
+            'stages': stages,
+        }
+
+    def finish(self) -> None:
+        """Stop capturing and write the JSON report (and .prof file)."""
+        if self.mode is None:
+            return
+        report = self.report()
+
+        if self.mode == 'tracemalloc':
+            report['peak_traced_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        elif self.mode == 'cprofile':
+            self._profiler.disable()
+            profile_path = self.report_path.with_suffix('.prof')
+            self._profiler.dump_stats(str(profile_path))
+            report['profile'] = {'path': str(profile_path), 'top': profile_top(self._profiler)}
+
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Metrics report saved to: {self.report_path}")
+        self.mode = None
+
+
+def profile_top(profiler, limit: int = PROFILE_TOP) -> List[Dict]:
+    """The functions with the highest cumulative time in a cProfile capture."""
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.items():
+        rows.append({
+            'function': f"{Path(filename).name}:{line}({function})",
+            'calls': calls,
+            'total_s': total,
+            'cumulative_s': cumulative,
+        })
+    rows.sort(key=lambda row: row['cumulative_s'], reverse=True)
+    return rows[:limit]
+
+
+# Shared by every module of a script run
+metrics = Metrics()
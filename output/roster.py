@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Roster
+One loader for the player roster, whatever its format: players_data.json,
+players_data.csv or a tab-separated sheet (with or without a header row).
+Rows are streamed into compact typed records: ages parsed to years,
+phone numbers normalized, and category and player type as enums.
+
+Parsed rosters are cached next to the source in a binary file that is
+invalidated when the source's size or mtime changes, so a large roster
+is parsed once.
+"""
+
+import csv
+import json
+import os
+import pickle
+import re
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pipeline_metrics import metrics
+
+
+CACHE_VERSION = 2
+
+# Column order of a tab-separated sheet without a header row
+TSV_COLUMNS = ['Name', 'Age', 'Category', 'Ph', 'PlayerType',
+               'AuctionSerial', 'Valid', 'JerseyNumber', 'JerseyName']
+
+# Other spellings accepted in a header row
+FIELD_ALIASES = {'Phone': 'Ph', 'Player Type': 'PlayerType', 'Type': 'PlayerType'}
+
+AGE_PATTERN = re.compile(r'^\s*(\d{1,3})\s*(?:years?|yrs?)?\s*$', re.IGNORECASE)
+PHONE_PATTERN = re.compile(r'^(?:\+?91)?(\d{10})$')
+# A player sharing a phone number with another has it suffixed: "9900922363-1"
+SUFFIXED_PHONE_PATTERN = re.compile(r'^(.*\d)\s*-\s*(\d+)$')
+PHONE_KEY_PATTERN = re.compile(r'^\d{10}(?:-\d+)?$')
+
+
+class Category(Enum):
+    ALL_ROUNDER = 'All Rounder'
+    BATSMAN = 'Batsman'
+    BOWLER = 'Bowler'
+    WICKET_KEEPER = 'Wicket Keeper'
+    BATSMAN_WICKET_KEEPER = 'Batsman, Wicket Keeper'
+    UNKNOWN = ''
+
+
+class PlayerType(Enum):
+    REGULAR = 'Regular'
+    ICON = 'ICON'
+
+
+def _lookup(enum) -> Dict[str, Enum]:
+    """Members of an enum by their value, ignoring case, spaces and hyphens."""
+    return {re.sub(r'[\s-]+', '', member.value.lower()): member for member in enum}
+
+
+_CATEGORIES = dict(_lookup(Category), allrounder=Category.ALL_ROUNDER, wk=Category.WICKET_KEEPER,
+                   wicketkeeper=Category.WICKET_KEEPER)
+_PLAYER_TYPES = _lookup(PlayerType)
+
+
+class Player:
+    """One roster entry."""
+
+    __slots__ = ('name', 'age', 'category', 'phone', 'player_type',
+                 'auction_serial', 'valid', 'jersey_number', 'jersey_name')
+
+    def __init__(self, name: str, age: Optional[int], category: Category, phone: str,
+                 player_type: PlayerType = PlayerType.REGULAR, auction_serial: Optional[int] = None,
+                 valid: bool = True, jersey_number: Optional[int] = None, jersey_name: str = ''):
+        self.name = name
+        self.age = age
+        self.category = category
+        self.phone = phone
+        self.player_type = player_type
+        self.auction_serial = auction_serial
+        self.valid = valid
+        self.jersey_number = jersey_number
+        self.jersey_name = jersey_name
+
+    def __repr__(self) -> str:
+        return f"Player({self.name!r}, {self.phone!r})"
+
+    @property
+    def age_text(self) -> str:
+        """Age as shown on the slides ("36 years"), or '' if unknown."""
+        return f"{self.age} years" if self.age is not None else ''
+
+    @property
+    def has_phone(self) -> bool:
+        """True if the phone number ("9900922363" or "9900922363-1") is usable as a slide and photo key."""
+        return bool(PHONE_KEY_PATTERN.match(self.phone))
+
+    def record(self) -> Dict:
+        """The player as a players_data.json record; the deck manifest hashes this."""
+        record = {
+            'Name': self.name,
+            'Age': self.age_text,
+            'Category': self.category.value,
+            'Ph': self.phone,
+            'PlayerType': self.player_type.value,
+        }
+        if self.auction_serial is not None:
+            record['AuctionSerial'] = self.auction_serial
+        if self.jersey_number is not None:
+            record['JerseyNumber'] = self.jersey_number
+        if self.jersey_name:
+            record['JerseyName'] = self.jersey_name
+        if not self.valid:
+            record['Valid'] = 'N'
+        return record
+
+    def _row(self) -> tuple:
+        return (self.name, self.age, self.category.value, self.phone, self.player_type.value,
+                self.auction_serial, self.valid, self.jersey_number, self.jersey_name)
+
+    @classmethod
+    def _from_row(cls, row: tuple) -> 'Player':
+        name, age, category, phone, player_type, auction_serial, valid, jersey_number, jersey_name = row
+        return cls(name, age, Category(category), phone, PlayerType(player_type),
+                   auction_serial, valid, jersey_number, jersey_name)
+
+
+def parse_age(text: str) -> Optional[int]:
+    """Years from "36 years", "36" or "36 yrs"; None if missing or unreadable."""
+    match = AGE_PATTERN.match(text or '')
+    return int(match.group(1)) if match else None
+
+
+def normalize_phone(text: str) -> str:
+    """
+    10-digit phone number without spaces, dashes or a +91 prefix, keeping
+    a player suffix ('+91 99009 22363-1' -> '9900922363-1').
+    Anything else (e.g. '?') is returned trimmed, as is.
+    """
+    text = str(text or '').strip()
+    match = PHONE_PATTERN.match(re.sub(r'[\s()-]', '', text))
+    if match:
+        return match.group(1)
+    suffixed = SUFFIXED_PHONE_PATTERN.match(text)
+    if suffixed:
+        match = PHONE_PATTERN.match(re.sub(r'[\s()-]', '', suffixed.group(1)))
+        if match:
+            return f"{match.group(1)}-{suffixed.group(2)}"
+    return text
+
+
+def parse_int(text) -> Optional[int]:
+    text = str(text).strip() if text is not None else ''
+    return int(text) if text.isdigit() else None
+
+
+class _RowParser:
+    """Turns source rows into players, warning once about each unknown enum value."""
+
+    def __init__(self, source: Path):
+        self.source = source
+        self.warned = set()
+
+    def enum_value(self, table: Dict[str, Enum], text: str, default: Enum, label: str) -> Enum:
+        key = re.sub(r'[\s-]+', '', (text or '').lower())
+        member = table.get(key)
+        if member is not None:
+            return member
+        if text and (label, text) not in self.warned:
+            self.warned.add((label, text))
+            print(f"Warning: Unknown {label} '{text}' in {self.source.name}, using '{default.value}'")
+        return default
+
+    def player(self, row: Dict) -> Player:
+        row = {FIELD_ALIASES.get(key.strip(), key.strip()): value for key, value in row.items() if key}
+        return Player(
+            name=(row.get('Name') or '').strip(),
+            age=parse_age(row.get('Age') or ''),
+            category=self.enum_value(_CATEGORIES, (row.get('Category') or '').strip(), Category.UNKNOWN, 'category'),
+            phone=normalize_phone(row.get('Ph') or ''),
+            player_type=self.enum_value(_PLAYER_TYPES, (row.get('PlayerType') or '').strip(),
+                                        PlayerType.REGULAR, 'player type'),
+            auction_serial=parse_int(row.get('AuctionSerial')),
+            valid=str(row.get('Valid') or 'Y').strip().upper() != 'N',
+            jersey_number=parse_int(row.get('JerseyNumber')),
+            jersey_name=(row.get('JerseyName') or '').strip(),
+        )
+
+
+def _source_rows(path: Path) -> Iterator[Dict]:
+    """Rows of a JSON, CSV or tab-separated roster as dicts of source fields."""
+    suffix = path.suffix.lower()
+    if suffix == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if suffix == '.csv':
+            yield from csv.DictReader(f)
+            return
+        # Tab-separated, with or without a header row
+        reader = csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE)
+        first = next(reader, None)
+        if first is None:
+            return
+        header = [FIELD_ALIASES.get(field.strip(), field.strip()) for field in first]
+        columns = header if 'Name' in header and 'Ph' in header else TSV_COLUMNS
+        if columns is TSV_COLUMNS:
+            yield dict(zip(columns, first))
+        for fields in reader:
+            if any(field.strip() for field in fields):
+                yield dict(zip(columns, fields))
+
+
+def iter_roster(path: Path) -> Iterator[Player]:
+    """Stream the players of a roster file, in order, without the cache."""
+    parser = _RowParser(path)
+    for row in _source_rows(path):
+        yield parser.player(row)
+
+
+def cache_path_for(path: Path) -> Path:
+    """Binary cache stored next to the roster."""
+    return path.with_name(f".{path.name}.roster.pickle")
+
+
+def _read_cache(cache_path: Path, stat: os.stat_result) -> Optional[List[Player]]:
+    try:
+        with open(cache_path, 'rb') as f:
+            header = pickle.load(f)
+            if header != (CACHE_VERSION, stat.st_size, stat.st_mtime_ns):
+                return None
+            return [Player._from_row(row) for row in pickle.load(f)]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable roster cache {cache_path.name}: {e}")
+        return None
+
+
+def _write_cache(cache_path: Path, stat: os.stat_result, players: Iterable[Player]) -> None:
+    tmp_path = cache_path.with_name(f"{cache_path.name}.tmp{os.getpid()}")
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, stat.st_size, stat.st_mtime_ns), f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump([player._row() for player in players], f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not write roster cache {cache_path.name}: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+@metrics.timed()
+def load_roster(path: Path, use_cache: bool = True) -> List[Player]:
+    """
+    Load every player of a roster file, in order.
+    The parsed roster is reused from the cache while the file is unchanged.
+    """
+    stat = path.stat()
+    cache_path = cache_path_for(path)
+    if use_cache:
+        players = _read_cache(cache_path, stat)
+        if players is not None:
+            return players
+
+    players = list(iter_roster(path))
+    if use_cache:
+        _write_cache(cache_path, stat, players)
+    return players
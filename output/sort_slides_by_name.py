@@ -2,161 +2,135 @@
 """
 Sort slides in PowerPoint presentation by player name.
 Keeps the first slide (template) in place and sorts all other slides alphabetically by player name.
+
+Slides are reordered by permuting the slide list in presentation.xml; no
+slide content is copied. Player names come from the deck manifest and
+roster where they are current, and from the slide's player table otherwise.
 """
 
+import argparse
+import os
 import sys
 from pathlib import Path
-from typing import List, Tuple
-from pptx import Presentation
+from typing import Dict, List
+
+from deck_manifest import load_manifest, manifest_path_for, record_hash, save_manifest, slide_keys
+from deck_reader import DeckReader, first_table_cell_text
+from deck_writer import write_slide_order
+from pipeline_config import deck_path, roster_path
+from pipeline_metrics import MODES, metrics
+from roster import load_roster
+
+
+def names_from_manifest(pptx_path: Path, json_path: Path) -> Dict[int, str]:
+    """
+    Player names by slide id, for slides the manifest records with an
+    unchanged roster entry. Empty if there is no manifest or roster.
+    """
+    manifest = load_manifest(manifest_path_for(pptx_path))
+    if manifest is None or not json_path.exists():
+        return {}
+    try:
+        players = load_roster(json_path)
+    except Exception as e:
+        print(f"Warning: Could not read player data {json_path.name}: {e}")
+        return {}
+    
+    # Same keys as generate_player_slides.py
+    valid_players = [player for player in players if player.has_phone]
+    keys = slide_keys([player.phone for player in valid_players])
+    player_by_key = dict(zip(keys, valid_players))
+    
+    names = {}
+    for key, entry in manifest['players'].items():
+        player = player_by_key.get(key)
+        if player is not None and entry['record'] == record_hash(player.record()):
+            names[entry['slide_id']] = player.name
+    return names
 
 
-def extract_player_name_from_slide(slide) -> str:
-    """Extract player name from the table on the slide."""
-    for shape in slide.shapes:
-        if hasattr(shape, 'has_table') and shape.has_table:
-            table = shape.table
-            # Player name is in the first cell (row 0, col 0)
-            try:
-                player_name = table.cell(0, 0).text.strip()
-                return player_name if player_name else ''
-            except:
-                pass
-    return ''
+@metrics.timed()
+def read_player_names(deck: DeckReader, known: Dict[int, str]) -> Dict[int, str]:
+    """Player names by slide id: known names first, the slide's player table for the rest."""
+    names = {}
+    for ref in deck.slides()[1:]:
+        if ref.slide_id in known:
+            names[ref.slide_id] = known[ref.slide_id]
+        else:
+            names[ref.slide_id] = first_table_cell_text(deck.slide_xml(ref.partname))
+    return names
 
 
-def sort_slides_by_name(pptx_path: Path) -> None:
+def sort_slides_by_name(pptx_path: Path, json_path: Path) -> None:
     """Sort slides in the presentation by player name."""
     print("=" * 60)
     print("Sorting Slides by Player Name")
     print("=" * 60)
     print()
     
-    # Load presentation
+    # Open the package; only presentation.xml is parsed up front
     print(f"Loading PowerPoint: {pptx_path.name}")
     try:
-        prs = Presentation(pptx_path)
+        with metrics.stage('load_presentation'):
+            deck = DeckReader(pptx_path)
     except Exception as e:
         print(f"Error loading PowerPoint: {e}")
         sys.exit(1)
     
-    if len(prs.slides) < 2:
-        print("Not enough slides to sort (need at least 2 slides)")
-        return
-    
-    print(f"Total slides: {len(prs.slides)}")
-    print()
-    
-    # Extract player names from each slide
-    print("Extracting player names from slides...")
-    slide_data: List[Tuple[int, str, 'Slide']] = []
-    
-    # Keep template slide (first slide) separate
-    template_slide = prs.slides[0]
-    
-    # Process all other slides
-    for idx in range(1, len(prs.slides)):
-        slide = prs.slides[idx]
-        player_name = extract_player_name_from_slide(slide)
-        slide_data.append((idx, player_name, slide))
-        if player_name:
-            print(f"  Slide {idx + 1}: {player_name}")
-        else:
-            print(f"  Slide {idx + 1}: (no name found)")
-    
-    print()
-    
-    # Sort by player name (case-insensitive)
-    slide_data.sort(key=lambda x: x[1].lower() if x[1] else 'zzz')
-    
-    print("Sorted order:")
-    for idx, (original_idx, name, _) in enumerate(slide_data, start=1):
-        print(f"  Position {idx + 1}: {name if name else '(no name)'} (was slide {original_idx + 1})")
-    print()
-    
-    # Reorder slides by manipulating the slide list
-    print("Reordering slides...")
-    
-    # We need to reorder by manipulating the XML structure
-    # Since python-pptx doesn't support direct reordering, we'll:
-    # 1. Save slide data with their XML
-    # 2. Remove all slides except template
-    # 3. Re-add slides in sorted order
-    
-    import copy
-    import tempfile
-    
-    # Save a backup first
-    backup_path = pptx_path.with_suffix('.pptx.backup')
-    prs.save(backup_path)
-    print(f"Backup saved to: {backup_path.name}")
-    
-    # Store slide XML elements in sorted order
-    sorted_slide_elements = []
-    
-    # Get template slide element (keep it first)
-    template_element = template_slide._element
-    
-    # Get sorted slide elements
-    for _, _, slide in slide_data:
-        sorted_slide_elements.append(slide._element)
-    
-    # Remove all slides except template from the presentation
-    # We need to work backwards to avoid index issues
-    while len(prs.slides) > 1:
-        rId = prs.slides._sldIdLst[-1].rId
-        prs.part.drop_rel(rId)
-        del prs.slides._sldIdLst[-1]
-    
-    # Now add slides in sorted order by copying their content
-    for slide_element in sorted_slide_elements:
-        # Get the original slide to copy from
-        # We need to find it in the original presentation
-        # Since we've already removed slides, we need to reload or use stored data
-        pass
-    
-    # Better approach: Create new slides by copying from stored slide data
-    # Reload the original to get slide content
-    original_prs = Presentation(backup_path)
-    
-    # Create mapping of slide index to slide data
-    slide_index_map = {idx: slide for idx, _, slide in slide_data}
-    
-    # Clear current slides except template
-    while len(prs.slides) > 1:
-        rId = prs.slides._sldIdLst[-1].rId
-        prs.part.drop_rel(rId)
-        del prs.slides._sldIdLst[-1]
-    
-    # Add sorted slides
-    for original_idx, _, _ in slide_data:
-        original_slide = original_prs.slides[original_idx]
+    with deck:
+        slides = deck.slides()
+        if len(slides) < 2:
+            print("Not enough slides to sort (need at least 2 slides)")
+            return
         
-        # Create new slide with same layout
-        new_slide = prs.slides.add_slide(original_slide.slide_layout)
+        print(f"Total slides: {len(slides)}")
+        print()
         
-        # Remove default shapes
-        for shape in list(new_slide.shapes):
-            sp = shape._element
-            sp.getparent().remove(sp)
+        # Player names from the manifest, falling back to the slides themselves
+        print("Reading player names...")
+        known = names_from_manifest(pptx_path, json_path)
+        names = read_player_names(deck, known)
+        from_manifest = sum(1 for slide_id in names if slide_id in known)
+        print(f"  {from_manifest} from the manifest, {len(names) - from_manifest} from slide tables")
+        print()
         
-        # Copy all shapes from original slide
-        for shape in original_slide.shapes:
-            el = shape._element
-            newel = copy.deepcopy(el)
-            new_slide.shapes._spTree.insert_element_before(newel, 'p:extLst')
-    
-    # Save the sorted presentation
-    print(f"Saving sorted presentation to: {pptx_path.name}")
-    try:
-        prs.save(pptx_path)
-        print("✓ Presentation saved successfully")
-    except Exception as e:
-        print(f"✗ Error saving presentation: {e}")
-        # Restore from backup
-        import shutil
-        shutil.copy(backup_path, pptx_path)
-        print("Restored from backup")
-        sys.exit(1)
+        # Sort by player name (case-insensitive); the template stays first
+        slide_data: List[tuple] = [(position, ref.slide_id, names[ref.slide_id])
+                                   for position, ref in enumerate(slides[1:], start=2)]
+        slide_data.sort(key=lambda x: x[2].lower() if x[2] else 'zzz')
+        
+        print("Sorted order:")
+        for idx, (original_position, _, name) in enumerate(slide_data, start=2):
+            print(f"  Position {idx}: {name if name else '(no name)'} (was slide {original_position})")
+        print()
+        
+        new_order = [slide_id for _, slide_id, _ in slide_data]
+        if new_order == [ref.slide_id for ref in slides[1:]]:
+            print("✓ Slides are already sorted, nothing to save")
+            return
+        
+        # Write the reordered package next to the deck, then swap it in
+        print(f"Saving sorted presentation to: {pptx_path.name}")
+        tmp_path = pptx_path.with_name(f".{pptx_path.name}.sorting")
+        try:
+            with metrics.stage('save_presentation'):
+                write_slide_order(deck, [slides[0].slide_id] + new_order, tmp_path)
+                os.replace(tmp_path, pptx_path)
+            print("✓ Presentation saved successfully")
+        except Exception as e:
+            print(f"✗ Error saving presentation: {e}")
+            tmp_path.unlink(missing_ok=True)
+            sys.exit(1)
+    
+    # Keep the manifest's recorded positions in step with the deck
+    manifest_path = manifest_path_for(pptx_path)
+    manifest = load_manifest(manifest_path)
+    if manifest is not None:
+        position_by_id = {slide_id: position for position, slide_id in enumerate(new_order, start=2)}
+        for entry in manifest['players'].values():
+            if entry['slide_id'] in position_by_id:
+                entry['position'] = position_by_id[entry['slide_id']]
+        save_manifest(manifest_path, manifest)
     
     print()
     print("=" * 60)
@@ -164,20 +138,28 @@ def sort_slides_by_name(pptx_path: Path) -> None:
     print("=" * 60)
     print(f"Template slide: Kept at position 1")
     print(f"Player slides sorted: {len(slide_data)}")
-    print(f"Total slides: {len(prs.slides)}")
+    print(f"Total slides: {len(slides)}")
     print("=" * 60)
 
 
 def main():
     """Main function."""
-    script_dir = Path(__file__).parent
-    pptx_path = script_dir / "Re-Auction-2025-BCL-Players.pptx"
+    parser = argparse.ArgumentParser(description="Sort player slides by player name.")
+    parser.add_argument('--profile', choices=MODES,
+                        help="record stage metrics, optionally with tracemalloc or cProfile capture")
+    parser.add_argument('--metrics', type=Path,
+                        help="write the stage metrics report to this JSON file")
+    args = parser.parse_args()
+    metrics.start('sort_slides_by_name', args.profile, args.metrics)
+    
+    pptx_path = deck_path()
+    json_path = roster_path()
     
     if not pptx_path.exists():
         print(f"Error: PowerPoint file not found: {pptx_path}")
         sys.exit(1)
     
-    sort_slides_by_name(pptx_path)
+    sort_slides_by_name(pptx_path, json_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Split Decks
+Builds the player slides as several smaller decks instead of one deck with
+every player, so each opens and advances quickly on the venue laptop:
+
+    --by category    one deck per playing category
+    --by type        ICON players and Regular players
+    --by serial      auction serial ranges (--serial-range players per deck)
+
+--max-slides and --max-mb split any group further. Every deck starts with
+the template slide and has its own manifest; decks whose players, photos
+and settings are unchanged since the last run are not rebuilt. The decks
+are built concurrently, and decks.json maps each player to their deck and
+slide.
+
+Usage:
+    python3 split_decks.py --by category [--max-slides 40] [--workers 4]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from pptx import Presentation
+
+from asset_index import AssetIndex
+from deck_manifest import load_manifest, manifest_path_for, new_manifest, save_manifest
+from deck_writer import SourceDeck
+from generate_player_slides import (DEFAULT_PREFETCH, CompiledTemplate, build_shard, derivative_settings,
+                                    load_player_data, manifest_players, roster_entries, scan_player_images)
+from photo_derivatives import DEFAULT_DPI, DEFAULT_QUALITY, DerivativeCache, file_hash
+from pipeline_config import OUTPUT_DIR, deck_path, photos_dir, roster_path
+from pipeline_metrics import MODES, metrics
+from roster import Category, Player, PlayerType
+
+
+INDEX_FILENAME = "decks.json"
+INDEX_VERSION = 1
+
+GROUPINGS = ('none', 'category', 'type', 'serial')
+DEFAULT_SERIAL_RANGE = 50
+
+# Compressed slide XML and relationships per slide, added to its photo for --max-mb
+SLIDE_BYTES = 4 * 1024
+
+
+class Chunk(NamedTuple):
+    """One output deck: its file name, group label and players as (roster index, player, slide key)."""
+    name: str
+    group: str
+    players: List[Tuple[int, Player, str]]
+
+
+def slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def group_of(player: Player, by: str, serial_range: int) -> Tuple[int, str]:
+    """(sort order, label) of the group a player's slide goes in."""
+    if by == 'category':
+        order = list(Category).index(player.category)
+        return order, player.category.value or 'Uncategorized'
+    if by == 'type':
+        # ICON players are auctioned first
+        return (0, 'ICON') if player.player_type is PlayerType.ICON else (1, 'Regular')
+    if by == 'serial':
+        if player.auction_serial is None:
+            return sys.maxsize, 'No serial'
+        first = (player.auction_serial - 1) // serial_range * serial_range + 1
+        return first, f"Serial {first:03d}-{first + serial_range - 1:03d}"
+    return 0, 'Players'
+
+
+def plan_chunks(players: List[Player], key_by_player: Dict[int, str], by: str, serial_range: int,
+                max_slides: Optional[int], max_bytes: Optional[int], slide_bytes: Dict[str, int],
+                base_bytes: int, stem: str) -> List[Chunk]:
+    """
+    Group the players with a slide, keeping roster order within a group.
+    A group over `max_slides` is split into equal parts; a part estimated
+    over `max_bytes` is cut before the slide that would pass it.
+    """
+    groups: Dict[Tuple[int, str], List[Tuple[int, Player, str]]] = {}
+    for i, player in enumerate(players, start=1):
+        if player.has_phone:
+            groups.setdefault(group_of(player, by, serial_range), []).append((i, player, key_by_player[id(player)]))
+
+    chunks = []
+    for (_, label), members in sorted(groups.items(), key=lambda item: item[0]):
+        parts = [members]
+        if max_slides and len(members) > max_slides:
+            count = -(-len(members) // max_slides)
+            part_size = -(-len(members) // count)
+            parts = [members[start:start + part_size] for start in range(0, len(members), part_size)]
+
+        pieces = []
+        for part in parts:
+            pieces.append([])
+            size = base_bytes
+            for member in part:
+                if pieces[-1] and max_bytes and size + slide_bytes[member[2]] > max_bytes:
+                    pieces.append([])
+                    size = base_bytes
+                pieces[-1].append(member)
+                size += slide_bytes[member[2]]
+
+        base = stem if by == 'none' else f"{stem}-{slug(label)}"
+        for number, piece in enumerate(pieces, start=1):
+            name = f"{base}-{number:02d}.pptx" if len(pieces) > 1 else f"{base}.pptx"
+            chunks.append(Chunk(name, label, piece))
+    return chunks
+
+
+def estimate_slide_bytes(pptx_path: Path, keys: List[str], image_by_key: Dict[str, Path],
+                         derivatives: Optional[DerivativeCache]) -> Dict[str, int]:
+    """
+    Bytes each slide adds to a deck: its photo as embedded plus the slide
+    part. Resized photos are created here, so building the decks finds
+    them in the cache.
+    """
+    with SourceDeck(pptx_path) as source:
+        slot = CompiledTemplate(Presentation(source.template_package()).slides[0]).photo_slot
+
+    def photo_bytes(image_path: Optional[Path]) -> int:
+        if slot is None or image_path is None:
+            return 0
+        if derivatives is None:
+            return image_path.stat().st_size
+        return derivatives.derive(image_path, slot.width, slot.height).path.stat().st_size
+
+    # Only an estimate: photos shared by several slides are counted for each
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        sizes = list(pool.map(photo_bytes, [image_by_key.get(key) for key in keys]))
+    return {key: size + SLIDE_BYTES for key, size in zip(keys, sizes)}
+
+
+def chunk_is_current(deck_file: Path, keys: List[str], entries: Dict[str, Dict], settings: Dict) -> bool:
+    """Whether the deck was built from exactly these players, photos and settings."""
+    manifest = load_manifest(manifest_path_for(deck_file))
+    if not deck_file.exists() or manifest is None or manifest['settings'] != settings:
+        return False
+    recorded = manifest['players']
+    return list(recorded) == keys and all(
+        recorded[key]['record'] == entries[key]['record'] and recorded[key]['photo'] == entries[key]['photo']
+        for key in keys
+    )
+
+
+def template_hash(pptx_path: Path) -> str:
+    """Hash of the template slide, so editing it rebuilds every deck."""
+    with SourceDeck(pptx_path) as source:
+        return hashlib.sha256(source.zip.read(source.template_partname)).hexdigest()
+
+
+@metrics.timed()
+def split_decks(pptx_path: Path, image_map: Dict[str, Path], output_dir: Path,
+                chunks: List[Chunk], entries: Dict[str, Dict], settings: Dict,
+                derivatives: Optional[DerivativeCache], workers: int, prefetch: int,
+                placeholder: Optional[Path], full: bool = False) -> Optional[Dict]:
+    """Build the decks that changed, concurrently; returns the index, or None if a deck failed."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tasks = []
+    for chunk in chunks:
+        keys = [key for _, _, key in chunk.players]
+        if not full and chunk_is_current(output_dir / chunk.name, keys, entries, settings):
+            continue
+        tasks.append({
+            'pptx_path': pptx_path,
+            'shard_path': output_dir / f".{chunk.name}.tmp",
+            'players': [(i, player) for i, player, _ in chunk.players],
+            'image_map': {player.phone: image_map[player.phone] for _, player, _ in chunk.players
+                          if player.phone in image_map},
+            'derivatives': derivative_settings(derivatives),
+            'prefetch': prefetch,
+            'placeholder': placeholder,
+            # Split decks are handed out, so their photos are always embedded
+            'link': False,
+            'chunk': chunk,
+        })
+
+    print(f"Decks: {len(chunks)} ({len(tasks)} to build, {len(chunks) - len(tasks)} unchanged)")
+    if tasks:
+        workers = max(1, min(workers, len(tasks)))
+        print(f"Building {sum(len(task['players']) for task in tasks)} player slides "
+              f"in {len(tasks)} deck(s) with {workers} worker(s)...")
+        print("-" * 60)
+        try:
+            with metrics.stage('build_decks'), ProcessPoolExecutor(max_workers=workers) as pool:
+                # The chunk itself stays here; workers only need the shard fields
+                shard_tasks = [{field: value for field, value in task.items() if field != 'chunk'} for task in tasks]
+                outcomes = list(pool.map(build_shard, shard_tasks))
+        except Exception as e:
+            print(f"✗ Error building decks: {e}")
+            for task in tasks:
+                task['shard_path'].unlink(missing_ok=True)
+            return None
+
+        for task, outcome in zip(tasks, outcomes):
+            chunk = task['chunk']
+            if derivatives is not None:
+                derivatives.hits += outcome['hits']
+                derivatives.misses += outcome['misses']
+            keys = {i: key for i, _, key in chunk.players}
+            built_keys = [keys[i] for i, success, _ in outcome['results'] if success]
+            errors = [message for _, success, message in outcome['results'] if not success]
+            for message in errors:
+                print(f"  {chunk.name}: {message}")
+
+            deck_file = output_dir / chunk.name
+            os.replace(task['shard_path'], deck_file)
+            manifest = new_manifest(settings)
+            manifest['players'] = manifest_players([key for _, _, key in chunk.players], entries,
+                                                   dict(zip(built_keys, outcome['slide_ids'])))
+            save_manifest(manifest_path_for(deck_file), manifest)
+            print(f"  ✓ {chunk.name}: {len(built_keys)} slides" + (f", {len(errors)} errors" if errors else ""))
+        print("-" * 60)
+
+    index = {
+        'version': INDEX_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'source': pptx_path.name,
+        'decks': [],
+        'players': {},
+    }
+    for chunk in chunks:
+        deck_file = output_dir / chunk.name
+        recorded = load_manifest(manifest_path_for(deck_file))['players']
+        index['decks'].append({
+            'file': chunk.name,
+            'group': chunk.group,
+            'slides': len(recorded) + 1,
+            'bytes': deck_file.stat().st_size,
+        })
+        for _, player, key in chunk.players:
+            if key in recorded:
+                index['players'][key] = {'name': player.name, 'deck': chunk.name,
+                                         'slide': recorded[key]['position']}
+    return index
+
+
+def remove_stale_decks(output_dir: Path, index: Dict) -> List[str]:
+    """Remove decks of the previous index that are not in the new one."""
+    previous = load_index(output_dir / INDEX_FILENAME)
+    if previous is None:
+        return []
+    current = {deck['file'] for deck in index['decks']}
+    removed = []
+    for deck in previous['decks']:
+        if deck['file'] not in current:
+            deck_file = output_dir / deck['file']
+            deck_file.unlink(missing_ok=True)
+            manifest_path_for(deck_file).unlink(missing_ok=True)
+            removed.append(deck['file'])
+    return removed
+
+
+def load_index(index_path: Path) -> Optional[Dict]:
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get('version') == INDEX_VERSION else None
+
+
+def save_index(index_path: Path, index: Dict) -> None:
+    tmp_path = index_path.with_name(f".{index_path.name}.tmp{os.getpid()}")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build the player slides as several smaller decks.")
+    parser.add_argument('--by', choices=GROUPINGS, default='none',
+                        help="one deck per category, player type or auction serial range (default: none)")
+    parser.add_argument('--serial-range', type=int, default=DEFAULT_SERIAL_RANGE,
+                        help=f"auction serials per deck with --by serial (default: {DEFAULT_SERIAL_RANGE})")
+    parser.add_argument('--max-slides', type=int, default=None,
+                        help="split decks with more player slides than this")
+    parser.add_argument('--max-mb', type=float, default=None,
+                        help="split decks estimated to be larger than this many MB")
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR / "decks",
+                        help="directory for the decks and decks.json (default: output/decks)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="decks built at the same time (default: one per CPU)")
+    parser.add_argument('--full', action='store_true', help="rebuild every deck, changed or not")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI,
+                        help=f"resolution photos are resized to for their slot (default: {DEFAULT_DPI})")
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY,
+                        help=f"JPEG quality of resized photos (default: {DEFAULT_QUALITY})")
+    parser.add_argument('--max-kb', type=int, default=None,
+                        help="lower the quality of resized photos until they fit this size")
+    parser.add_argument('--original-photos', action='store_true',
+                        help="embed the original photo files without resizing")
+    parser.add_argument('--placeholder', type=Path,
+                        help="photo shown for players without a usable photo (stored once per deck)")
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH,
+                        help=f"photos loaded ahead of the slide being built in each deck (default: {DEFAULT_PREFETCH})")
+    parser.add_argument('--profile', choices=MODES,
+                        help="record stage metrics, optionally with tracemalloc or cProfile capture")
+    parser.add_argument('--metrics', type=Path,
+                        help="write the stage metrics report to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    metrics.start('split_decks', args.profile, args.metrics)
+
+    pptx_path = deck_path()
+    json_path = roster_path()
+    for path in (pptx_path, json_path) + ((args.placeholder,) if args.placeholder else ()):
+        if not path.exists():
+            print(f"Error: {path} not found")
+            sys.exit(1)
+
+    players = load_player_data(json_path)
+    asset_index = AssetIndex(photos_dir())
+    image_map = scan_player_images(asset_index, players)
+
+    derivatives = None
+    if not args.original_photos:
+        max_bytes = args.max_kb * 1024 if args.max_kb else None
+        derivatives = DerivativeCache(Path(__file__).parent / ".photo_cache", dpi=args.dpi, quality=args.quality,
+                                      max_bytes=max_bytes, hash_source=asset_index.content_hash)
+
+    settings = {
+        'dpi': args.dpi,
+        'quality': args.quality,
+        'max_kb': args.max_kb,
+        'original_photos': args.original_photos,
+        'template': template_hash(pptx_path),
+    }
+    if args.placeholder:
+        settings['placeholder'] = file_hash(args.placeholder)
+
+    keys, key_by_player, entries = roster_entries(players, image_map, asset_index.content_hash)
+    slide_bytes = {key: 0 for key in keys}
+    base_bytes = 0
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb else None
+    if max_bytes:
+        with metrics.stage('estimate_sizes'):
+            image_by_key = {key_by_player[id(player)]: image_map[player.phone]
+                            for player in players if player.has_phone and player.phone in image_map}
+            slide_bytes = estimate_slide_bytes(pptx_path, keys, image_by_key, derivatives)
+            with SourceDeck(pptx_path) as source:
+                base_bytes = len(source.template_package().getvalue())
+
+    chunks = plan_chunks(players, key_by_player, args.by, max(1, args.serial_range), args.max_slides,
+                         max_bytes, slide_bytes, base_bytes, pptx_path.stem)
+    index = split_decks(pptx_path, image_map, args.output_dir, chunks, entries, settings,
+                        derivatives, args.workers, args.prefetch, args.placeholder, args.full)
+    if index is None:
+        sys.exit(1)
+
+    removed = remove_stale_decks(args.output_dir, index)
+    index_path = args.output_dir / INDEX_FILENAME
+    save_index(index_path, index)
+
+    print()
+    for deck in index['decks']:
+        print(f"  {deck['file']:<50} {deck['slides'] - 1:4d} players  {deck['bytes'] / (1024 * 1024):6.1f} MB")
+    if removed:
+        print(f"Removed {len(removed)} deck(s) no longer in the split: {', '.join(removed)}")
+    if derivatives is not None:
+        print(f"Resized photos: {derivatives.misses} created, {derivatives.hits} reused from cache")
+    print(f"Index: {index_path} ({len(index['players'])} players in {len(index['decks'])} decks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,319 @@
 #!/usr/bin/env python3
-"""Quick script to verify images are present in the PowerPoint slides."""
+"""
+Quick script to verify images are present in the PowerPoint slides.
 
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+By default the first 10 slides and a few from the middle are checked, along
+with the player photos on disk. With --full, every slide is checked in
+parallel and cross-checked against players_data.json; slides with missing,
+broken or placeholder photos are listed in a JSON report.
+
+The deck is read straight from its zip package: only slide XML and
+relationships are parsed, and media sizes come from the zip directory.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from asset_index import AssetIndex
+from deck_manifest import load_manifest, manifest_path_for, slide_keys
+from deck_reader import NS, DeckReader, first_table_texts
+from pipeline_config import OUTPUT_DIR, deck_path, photos_dir, roster_path
+from pipeline_metrics import MODES, metrics
+from roster import Player, load_roster
+
+
+# Slide problems reported by --full
+MISSING_PHOTO = 'missing_photo'          # no picture on the slide
+BROKEN_PHOTO = 'broken_photo'            # relationship or media part missing, or empty media
+PLACEHOLDER_PHOTO = 'placeholder_photo'  # the template's picture, or the --placeholder photo
+NO_PLAYER_TABLE = 'no_player_table'      # no player table to identify the player
+UNKNOWN_PLAYER = 'unknown_player'        # player not in players_data.json
+NAME_MISMATCH = 'name_mismatch'          # name differs from players_data.json
+STALE_PHOTO = 'stale_photo'              # the player's photo changed since the slide was built
+DUPLICATE_SLIDE = 'duplicate_slide'      # more slides than roster entries for a phone number
+
+
+def picture_problems(pictures, placeholders: Set[Tuple[int, int]]) -> List[str]:
+    """Problems with a slide's pictures, from the zip directory only."""
+    if not pictures:
+        return [MISSING_PHOTO]
+    problems = []
+    for picture in pictures:
+        if picture.media is None or picture.size <= 0:
+            problems.append(BROKEN_PHOTO)
+        elif (picture.crc, picture.size) in placeholders:
+            problems.append(PLACEHOLDER_PHOTO)
+    return sorted(set(problems))
+
+
+def photo_slot_media(slide, pictures) -> Optional[str]:
+    """Media of the template's photo slot: the leftmost picture, as `bcl slides` finds it."""
+    if not pictures:
+        return None
+    # One offset per picture, in the order DeckReader.pictures() lists them
+    offsets = []
+    for pic in slide.iterfind('.//p:pic', NS):
+        if pic.find('p:blipFill/a:blip', NS) is not None:
+            offset = pic.find('p:spPr/a:xfrm/a:off', NS)
+            offsets.append(int(offset.get('x', 0)) if offset is not None else 0)
+    return min(zip(offsets, pictures), key=lambda pair: pair[0])[1].media
+
+
+def check_slides(pptx_path: Path, slides: List[Tuple[int, int, str]],
+                 placeholders: Set[Tuple[int, int]], artwork: Set[str]) -> List[Dict]:
+    """
+    Check a batch of slides given as (position, slide id, partname).
+    Pictures of `artwork` media are the template's, not player photos.
+    Runs in worker processes; each opens its own reader.
+    """
+    results = []
+    with DeckReader(pptx_path) as deck:
+        for position, slide_id, partname in slides:
+            slide = deck.slide_xml(partname)
+            pictures = [picture for picture in deck.pictures(partname, slide) if picture.media not in artwork]
+            texts = first_table_texts(slide)
+            results.append({
+                'position': position,
+                'slide_id': slide_id,
+                'partname': partname,
+                'name': texts[0] if texts else '',
+                'phone': texts[3] if len(texts) >= 4 else '',
+                'photos': [{'media': picture.media, 'bytes': picture.size} for picture in pictures],
+                'problems': picture_problems(pictures, placeholders) + ([] if texts else [NO_PLAYER_TABLE]),
+            })
+    return results
+
+
+def cross_check(results: List[Dict], players: List[Player], image_map: Dict[str, Path],
+                asset_index: AssetIndex, manifest: Optional[Dict]) -> List[Dict]:
+    """
+    Check every slide's player against the roster, photos on disk and manifest.
+    Returns the roster players that have no slide.
+    """
+    valid_players = [player for player in players if player.has_phone]
+    keys = slide_keys([player.phone for player in valid_players])
+    roster_count: Dict[str, int] = {}
+    for player in valid_players:
+        roster_count[player.phone] = roster_count.get(player.phone, 0) + 1
+    names_by_phone: Dict[str, Set[str]] = {}
+    for player in valid_players:
+        names_by_phone.setdefault(player.phone, set()).add(player.name)
+    photo_by_slide_id = {}
+    if manifest is not None:
+        photo_by_slide_id = {entry['slide_id']: entry['photo'] for entry in manifest['players'].values()}
+
+    slide_count: Dict[str, int] = {}
+    for result in results:
+        phone = result['phone']
+        if not phone:
+            continue
+        slide_count[phone] = slide_count.get(phone, 0) + 1
+        problems = result['problems']
+        if phone not in names_by_phone:
+            problems.append(UNKNOWN_PLAYER)
+            continue
+        if result['name'] not in names_by_phone[phone]:
+            problems.append(NAME_MISMATCH)
+        if slide_count[phone] > roster_count[phone]:
+            problems.append(DUPLICATE_SLIDE)
+
+        image_path = image_map.get(phone)
+        result['photo_on_disk'] = image_path.name if image_path else None
+        if image_path is None and result['photos'] and PLACEHOLDER_PHOTO not in problems:
+            # A photo shown for a player with none on disk is the --placeholder photo
+            problems.append(PLACEHOLDER_PHOTO)
+        recorded = photo_by_slide_id.get(result['slide_id'])
+        if recorded and image_path and recorded != asset_index.content_hash(image_path):
+            problems.append(STALE_PHOTO)
+
+    missing = []
+    seen: Dict[str, int] = {}
+    for player, key in zip(valid_players, keys):
+        seen[player.phone] = seen.get(player.phone, 0) + 1
+        if seen[player.phone] > slide_count.get(player.phone, 0):
+            missing.append({'key': key, 'name': player.name, 'phone': player.phone})
+    return missing
+
+
+@metrics.timed()
+def verify_all_slides(pptx_path: Path, json_path: Path, images_dir: Path, workers: int) -> Dict:
+    """Check every slide and build the report."""
+    with DeckReader(pptx_path) as deck:
+        refs = deck.slides()
+        template = deck.slide_xml(refs[0].partname) if refs else None
+        template_pictures = deck.pictures(refs[0].partname, template) if refs else []
+        # Media parts shared with the template slide are its static artwork, related from every slide;
+        # a slide still showing the template's sample photo keeps it, to be reported as a placeholder
+        photo_slot = photo_slot_media(template, template_pictures)
+        artwork = {picture.media for picture in template_pictures if picture.media and picture.media != photo_slot}
+        # Player slides showing a copy of the template's picture still have the placeholder
+        placeholders = {(picture.crc, picture.size) for picture in template_pictures if picture.size > 0}
+
+    slides = [(position, ref.slide_id, ref.partname) for position, ref in enumerate(refs[1:], start=2)]
+    workers = max(1, min(workers, len(slides)))
+    batch_size = -(-len(slides) // workers) if slides else 1
+    batches = [slides[start:start + batch_size] for start in range(0, len(slides), batch_size)]
+
+    print(f"Checking {len(slides)} player slides with {workers} worker(s)...")
+    results = []
+    with metrics.stage('check_slides'):
+        if workers == 1:
+            for batch in batches:
+                results.extend(check_slides(pptx_path, batch, placeholders, artwork))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for batch_results in pool.map(check_slides, [pptx_path] * len(batches), batches,
+                                              [placeholders] * len(batches), [artwork] * len(batches)):
+                    results.extend(batch_results)
+
+    players = load_roster(json_path)
+    with metrics.stage('scan_player_images'):
+        asset_index = AssetIndex(images_dir)
+        asset_index.refresh()
+        asset_index.save()
+    image_map = asset_index.phone_map(player.phone for player in players if player.has_phone)
+    manifest = load_manifest(manifest_path_for(pptx_path))
+    players_without_slide = cross_check(results, players, image_map, asset_index, manifest)
+
+    summary: Dict[str, int] = {}
+    for result in results:
+        for problem in result['problems']:
+            summary[problem] = summary.get(problem, 0) + 1
+    return {
+        'deck': pptx_path.name,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'slides_checked': len(results),
+        'summary': summary,
+        'slides': [result for result in results if result['problems']],
+        'players_without_slide': players_without_slide,
+    }
+
+
+def print_report(report: Dict) -> None:
+    """Summary of a full verification."""
+    print()
+    print("=" * 60)
+    print("Verification Summary")
+    print("=" * 60)
+    print(f"Slides checked: {report['slides_checked']}")
+    print(f"Slides with problems: {len(report['slides'])}")
+    for problem, count in sorted(report['summary'].items()):
+        print(f"  {problem}: {count}")
+    print(f"Roster players without a slide: {len(report['players_without_slide'])}")
+    for result in report['slides'][:20]:
+        label = result['name'] or '(no name)'
+        print(f"  Slide {result['position']}: {label} - {', '.join(result['problems'])}")
+    if len(report['slides']) > 20:
+        print(f"  ... and {len(report['slides']) - 20} more (see the report)")
+    print("=" * 60)
+
+
+def quick_check(pptx_path: Path, images_dir: Path) -> None:
+    """Check the first 10 slides and a few from the middle, and the photos on disk."""
+    with metrics.stage('load_presentation'):
+        deck = DeckReader(pptx_path)
+
+    with deck:
+        refs = deck.slides()
+        print(f"Total slides: {len(refs)}")
+        print("\nChecking first 10 slides for images:")
+        print("-" * 60)
+
+        for i, ref in enumerate(refs[:10], 1):
+            pictures = deck.pictures(ref.partname)
+            for picture in pictures:
+                if picture.size >= 0:
+                    ext = os.path.splitext(picture.media)[1].lstrip('.')
+                    print(f"Slide {i}: Found image - Size: {picture.size} bytes, Ext: {ext}")
+                else:
+                    print(f"Slide {i}: Found image shape but couldn't read image data")
+
+            if not pictures:
+                print(f"Slide {i}: No images found")
+            else:
+                print(f"Slide {i}: Total images: {len(pictures)}")
+
+        print("\n" + "=" * 60)
+        print("Checking a few slides from the middle:")
+        print("-" * 60)
+
+        # Check some slides from the middle
+        for i in [50, 100, 150]:
+            if i < len(refs):
+                print(f"Slide {i+1}: {len(deck.pictures(refs[i].partname))} image(s) found")
+
+    print("\n" + "=" * 60)
+    print("Checking player photos on disk (asset index):")
+    print("-" * 60)
+
+    with metrics.stage('scan_player_images'):
+        asset_index = AssetIndex(images_dir)
+        counts = asset_index.refresh()
+        asset_index.save()
+    image_map = asset_index.phone_map()
+    print(f"Indexed images: {len(asset_index.entries)} ({counts['added'] + counts['updated']} new or changed)")
+    print(f"Phone numbers with a photo: {len(image_map)}")
+
+    for phone, image_path in sorted(image_map.items()):
+        entry = asset_index.entry_for(image_path)
+        if entry['variant']:
+            print(f"  {phone}: only a suffixed photo ({image_path.name})")
+        if not entry['width']:
+            print(f"  {phone}: unreadable image ({image_path.name})")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Verify the player photos in the deck.")
+    parser.add_argument('--full', action='store_true',
+                        help="check every slide against players_data.json and write a JSON report")
+    parser.add_argument('--report', type=Path, default=OUTPUT_DIR / "verify_report.json",
+                        help="JSON report written by --full (default: output/verify_report.json)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes used by --full (default: one per CPU)")
+    parser.add_argument('--profile', choices=MODES,
+                        help="record stage metrics, optionally with tracemalloc or cProfile capture")
+    parser.add_argument('--metrics', type=Path,
+                        help="write the stage metrics report to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    metrics.start('verify_images', args.profile, args.metrics)
+
+    pptx_path = deck_path()
+    json_path = roster_path()
+    images_dir = photos_dir()
+
+    if not pptx_path.exists():
+        print(f"Error: {pptx_path} not found")
+        sys.exit(1)
+
+    if not args.full:
+        quick_check(pptx_path, images_dir)
+        return
+
+    if not json_path.exists():
+        print(f"Error: {json_path} not found")
+        sys.exit(1)
+
+    report = verify_all_slides(pptx_path, json_path, images_dir, args.workers)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"Report saved to: {args.report}")
+
+    if report['slides'] or report['players_without_slide']:
+        sys.exit(1)
+
 
-pptx_path = Path("Re-Auction-2025-BCL-Players.pptx")
-
-if not pptx_path.exists():
-    print(f"Error: {pptx_path} not found")
-    exit(1)
-
-prs = Presentation(pptx_path)
-
-print(f"Total slides: {len(prs.slides)}")
-print("\nChecking first 10 slides for images:")
-print("-" * 60)
-
-for i, slide in enumerate(prs.slides[:10], 1):
-    image_count = 0
-    for shape in slide.shapes:
-        if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-            image_count += 1
-            try:
-                image = shape.image
-                print(f"Slide {i}: Found image - Size: {len(image.blob)} bytes, Ext: {image.ext}")
-            except:
-                print(f"Slide {i}: Found image shape but couldn't read image data")
-        elif shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-            for sub_shape in shape.shapes:
-                if sub_shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                    image_count += 1
-                    try:
-                        image = sub_shape.image
-                        print(f"Slide {i}: Found image in group - Size: {len(image.blob)} bytes, Ext: {image.ext}")
-                    except:
-                        print(f"Slide {i}: Found image shape in group but couldn't read image data")
-    
-    if image_count == 0:
-        print(f"Slide {i}: No images found")
-    else:
-        print(f"Slide {i}: Total images: {image_count}")
-
-print("\n" + "=" * 60)
-print("Checking a few slides from the middle:")
-print("-" * 60)
-
-# Check some slides from the middle
-for i in [50, 100, 150]:
-    if i < len(prs.slides):
-        slide = prs.slides[i]
-        image_count = 0
-        for shape in slide.shapes:
-            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                image_count += 1
-        print(f"Slide {i+1}: {image_count} image(s) found")
+if __name__ == "__main__":
+    main()
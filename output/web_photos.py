@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+BCL Re-Auction 2025 - Web Photos
+Builds the player photos served by the web app: a thumbnail, display and
+full size of each photo, as WebP with a JPEG fallback, and a manifest.json
+mapping each phone number to the URL, pixel size and byte size of every
+variant, for use in `srcset`. URLs have the same form as the players'
+photo_url in the database (/assets/players/...), and the frontend passes
+them through getAssetPath() to add the deployed base path.
+
+Variants are named by the content hash of their source photo, so photos
+whose hash is already in the manifest are skipped, duplicate photos share
+one set of files, and the files can be cached by browsers indefinitely.
+Variants no photo uses any more are removed.
+
+Usage:
+    python3 web_photos.py [--output ../public/assets/players/web] [--workers N]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from PIL import Image, ImageOps
+
+from asset_index import AssetIndex
+from photo_derivatives import RENDER_VERSION, flatten_rgb
+from pipeline_config import PUBLIC_PLAYERS_DIR, photos_dir, roster_path
+from pipeline_metrics import MODES, metrics
+from roster import load_roster
+
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+
+# Longest side in pixels of each variant; photos are never enlarged
+VARIANTS = {
+    'thumb': 160,      # admin queue and team lists
+    'display': 720,    # display view
+    'full': 1600,      # player details
+}
+
+# Encoder settings per format; the JPEG is the fallback for browsers without WebP
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+# Source hash characters used in variant file names
+HASH_PREFIX = 16
+
+
+def settings_key() -> Dict:
+    """Everything that changes the rendered files; a change re-renders every photo."""
+    return {'variants': VARIANTS, 'formats': FORMATS, 'render': RENDER_VERSION}
+
+
+def variant_name(digest: str, variant: str, ext: str) -> str:
+    return f"{digest[:HASH_PREFIX]}-{variant}.{ext}"
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp{os.getpid()}")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def render_variants(source: Path, digest: str, output_dir: Path) -> Dict:
+    """
+    Decode a photo once and write every variant in every format.
+    Runs in worker processes; returns the photo's manifest entry.
+    """
+    with Image.open(source) as img:
+        largest = max(VARIANTS.values())
+        # Reduce-on-decode to no less than the largest variant needs
+        img.draft('RGB', (largest, largest))
+        img = flatten_rgb(ImageOps.exif_transpose(img))
+        photo = {'hash': digest, 'source': source.name, 'width': img.width, 'height': img.height, 'variants': {}}
+
+        for variant, side in VARIANTS.items():
+            resized = img.copy()
+            resized.thumbnail((side, side), Image.Resampling.LANCZOS)
+            files = {'width': resized.width, 'height': resized.height}
+            for ext, options in FORMATS.items():
+                buffer = io.BytesIO()
+                # No exif/icc arguments: metadata is not carried over
+                resized.save(buffer, **options)
+                name = variant_name(digest, variant, ext)
+                write_atomic(output_dir / name, buffer.getvalue())
+                files[ext] = {'file': name, 'bytes': buffer.tell()}
+            photo['variants'][variant] = files
+    return photo
+
+
+def load_manifest(manifest_path: Path) -> Optional[Dict]:
+    """The previous manifest, or None if missing, unreadable or built with other settings."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable manifest {manifest_path.name}: {e}")
+        return None
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('settings') != settings_key():
+        return None
+    return manifest
+
+
+def reusable_photos(manifest: Optional[Dict], output_dir: Path) -> Dict[str, Dict]:
+    """Rendered photos of the previous manifest by source hash, if all their files still exist."""
+    if manifest is None:
+        return {}
+    photos = {}
+    for entry in manifest['players'].values():
+        files = [output_dir / variant[ext]['file'] for variant in entry['variants'].values() for ext in FORMATS]
+        if all(path.exists() for path in files):
+            photos[entry['hash']] = entry
+    return photos
+
+
+def with_urls(photo: Dict, source: Path, base_url: str) -> Dict:
+    """Manifest entry of a phone's rendered photo, with the URL of each file."""
+    entry = dict(photo, source=source.name, variants={})
+    for variant, files in photo['variants'].items():
+        entry['variants'][variant] = {
+            'width': files['width'],
+            'height': files['height'],
+            **{ext: {'file': files[ext]['file'], 'url': f"{base_url}/{files[ext]['file']}",
+                     'bytes': files[ext]['bytes']} for ext in FORMATS},
+        }
+    return entry
+
+
+def prune_variants(output_dir: Path, manifest: Dict, dry_run: bool = False) -> int:
+    """Remove variant files the manifest does not refer to."""
+    keep = {variant[ext]['file'] for entry in manifest['players'].values()
+            for variant in entry['variants'].values() for ext in FORMATS}
+    extensions = {f".{ext}" for ext in FORMATS}
+    removed = 0
+    for path in sorted(output_dir.iterdir()):
+        if path.suffix in extensions and path.name not in keep:
+            removed += 1
+            if not dry_run:
+                path.unlink()
+    return removed
+
+
+@metrics.timed()
+def build_web_photos(images_dir: Path, output_dir: Path, base_url: str, workers: int,
+                     full: bool = False, dry_run: bool = False,
+                     phones: Iterable[str] = ()) -> Tuple[Dict, Dict[str, int]]:
+    """
+    Render the variants of every phone-keyed photo that changed and build the manifest.
+    `phones` are the roster's phone numbers, so suffixed players' photos are keyed by their phone.
+    """
+    with metrics.stage('scan_player_images'):
+        index = AssetIndex(images_dir)
+        index.refresh()
+        image_map = index.phone_map(phones)
+        index.hash_files(image_map.values())
+        index.save()
+
+    manifest_path = output_dir / MANIFEST_FILENAME
+    reusable = {} if full else reusable_photos(load_manifest(manifest_path), output_dir)
+
+    # One render per distinct photo; phones sharing a photo share its files
+    sources: Dict[str, Path] = {}
+    for phone, path in sorted(image_map.items()):
+        digest = index.entry_for(path)['hash']
+        if digest not in reusable:
+            sources.setdefault(digest, path)
+
+    counts = {'photos': len(image_map), 'rendered': len(sources), 'skipped': len(image_map) - len(sources)}
+    rendered: Dict[str, Dict] = dict(reusable)
+    if sources and not dry_run:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        digests = list(sources)
+        with metrics.stage('render_variants'):
+            if workers == 1:
+                photos = [render_variants(sources[digest], digest, output_dir) for digest in digests]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    photos = list(pool.map(render_variants, [sources[digest] for digest in digests],
+                                           digests, [output_dir] * len(digests)))
+        rendered.update(zip(digests, photos))
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'base_url': base_url,
+        'settings': settings_key(),
+        'players': {},
+    }
+    for phone, path in sorted(image_map.items()):
+        digest = index.entry_for(path)['hash']
+        if digest in rendered:
+            manifest['players'][phone] = with_urls(rendered[digest], path, base_url)
+
+    if not dry_run:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(manifest_path, (json.dumps(manifest, indent=2) + '\n').encode('utf-8'))
+        counts['pruned'] = prune_variants(output_dir, manifest)
+    else:
+        counts['pruned'] = prune_variants(output_dir, manifest, dry_run=True) if output_dir.exists() else 0
+    return manifest, counts
+
+
+def variant_bytes(manifest: Dict, ext: str) -> Dict[str, int]:
+    """Total bytes of each variant in one format."""
+    totals = {variant: 0 for variant in VARIANTS}
+    for entry in manifest['players'].values():
+        for variant, files in entry['variants'].items():
+            totals[variant] += files[ext]['bytes']
+    return totals
+
+
+def format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Build responsive web variants of the player photos.")
+    parser.add_argument('--photos', type=Path, default=photos_dir(),
+                        help="directory of the player photos (default: this directory, or $BCL_PHOTOS)")
+    parser.add_argument('--output', type=Path, default=PUBLIC_PLAYERS_DIR / "web",
+                        help="directory for the variants and manifest (default: public/assets/players/web)")
+    parser.add_argument('--base-url', default="/assets/players/web",
+                        help="URL the output directory is served at (default: /assets/players/web)")
+    parser.add_argument('--full', action='store_true',
+                        help="render every photo again instead of only new and changed photos")
+    parser.add_argument('--dry-run', action='store_true', help="report what would be rendered without writing")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes rendering photos (default: one per CPU)")
+    parser.add_argument('--profile', choices=MODES,
+                        help="record stage metrics, optionally with tracemalloc or cProfile capture")
+    parser.add_argument('--metrics', type=Path,
+                        help="write the stage metrics report to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    """Main function."""
+    args = parse_args()
+    metrics.start('web_photos', args.profile, args.metrics)
+
+    if not args.photos.is_dir():
+        print(f"Error: Directory {args.photos} does not exist")
+        sys.exit(1)
+
+    prefix = "[dry run] " if args.dry_run else ""
+    players = load_roster(roster_path()) if roster_path().exists() else []
+    manifest, counts = build_web_photos(args.photos, args.output, args.base_url.rstrip('/'),
+                                        max(1, args.workers), args.full, args.dry_run,
+                                        [player.phone for player in players if player.has_phone])
+
+    print(f"{prefix}Photos: {counts['photos']} ({counts['rendered']} rendered, "
+          f"{counts['skipped']} unchanged or shared, {counts['pruned']} unused variants removed)")
+    if args.dry_run:
+        return
+    originals = sum(os.path.getsize(args.photos / entry['source']) for entry in manifest['players'].values())
+    print(f"Original photos: {format_size(originals)}")
+    for ext in FORMATS:
+        sizes = ', '.join(f"{variant} {format_size(size)}" for variant, size in variant_bytes(manifest, ext).items())
+        print(f"  {ext}: {sizes}")
+    print(f"Manifest: {args.output / MANIFEST_FILENAME}")
+
+
+if __name__ == "__main__":
+    main()
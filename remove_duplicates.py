@@ -2,31 +2,57 @@
 """
 Script to detect and remove exact duplicate images from a directory.
 Keeps the highest quality version of each duplicate set.
+
+With --similar, resized and recompressed copies are found as well, by
+perceptual hash (needs NumPy). Similar photos filed under different phone
+numbers are reported for review and never deleted.
 """
 
-import hashlib
+import argparse
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Tuple
-from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
 from PIL import Image
 
+# Shared player asset index lives next to the photos
+sys.path.insert(0, str(Path(__file__).parent / "output"))
+from asset_index import AssetIndex, parse_photo_name
+from pipeline_config import photos_dir
+from pipeline_metrics import metrics
+
+
+# Asset indexes opened this run, by directory
+_indexes: Dict[Path, AssetIndex] = {}
+
+
+def load_index(directory: Path) -> AssetIndex:
+    """
+    Asset index of a directory, loaded once per run. It caches content
+    hashes, pixel sizes and perceptual hashes by file size and mtime;
+    call refresh() to bring it up to date.
+    """
+    if directory not in _indexes:
+        _indexes[directory] = AssetIndex(directory)
+    return _indexes[directory]
+
 
-def calculate_file_hash(filepath: Path) -> str:
-    """Calculate MD5 hash of a file."""
-    hash_md5 = hashlib.md5()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+def indexed_entry(filepath: Path) -> Optional[Dict]:
+    """Asset index entry of an unchanged file, if its directory's index is loaded."""
+    index = _indexes.get(filepath.parent)
+    return index.current_entry(filepath) if index is not None else None
 
 
+@metrics.timed()
 def get_image_info(filepath: Path) -> Tuple[int, int, int]:
     """
     Get image information: width, height, and file size.
+    Comes from the asset index when the file is unchanged since it was indexed.
     Returns: (width, height, file_size)
     """
+    entry = indexed_entry(filepath)
+    if entry is not None and entry['width']:
+        return (entry['width'], entry['height'], entry['size'])
     try:
         with Image.open(filepath) as img:
             width, height = img.size
@@ -51,6 +77,7 @@ def get_filename_priority(filepath: Path) -> int:
     return 0
 
 
+@metrics.timed()
 def select_best_quality(files: List[Path]) -> Path:
     """
     Select the best quality image from a list of duplicates.
@@ -79,27 +106,56 @@ def select_best_quality(files: List[Path]) -> Path:
     return file_info[0]['path']
 
 
+@metrics.timed()
 def find_duplicates(directory: Path) -> Dict[str, List[Path]]:
     """
     Find all duplicate images in a directory based on file hash.
+    Files are compared by size, then by a partial hash of their first and
+    last blocks; only files that still match get a full hash. Hashes are
+    kept in the asset index, so unchanged files are never rehashed.
     Returns: Dictionary mapping hash -> list of file paths
     """
-    hash_map = defaultdict(list)
+    index = load_index(directory)
+    counts = index.refresh()
     
     # Only process .jpg files
-    jpg_files = list(directory.glob("*.jpg")) + list(directory.glob("*.jpeg"))
+    names = [name for name in index.entries if Path(name).suffix.lower() in ('.jpg', '.jpeg')]
+    duplicates, tiers = index.duplicate_groups(names)
+    index.save()
+    
+    print(f"Scanning {tiers['files']} image files "
+          f"({counts['added'] + counts['updated']} new or changed, {counts['unchanged']} unchanged since last run)...")
+    print(f"  {tiers['same_size']} share a file size, {tiers['full_hashed']} also share a partial hash")
+    
+    return duplicates
+
+
+@metrics.timed()
+def find_similar(directory: Path, method: str, max_distance: int) -> Tuple[List[List[Path]], Dict[Path, int]]:
+    """
+    Find clusters of visually similar images by perceptual hash.
+    Hashes are kept in the asset index, so unchanged files are not decoded again.
+    Returns: (clusters, each a list of two or more file paths; the hash of each file)
+    """
+    try:
+        from photo_similarity import perceptual_hashes, similar_clusters
+    except ImportError:
+        print("Error: --similar needs NumPy (pip install numpy)")
+        sys.exit(1)
     
-    print(f"Scanning {len(jpg_files)} image files...")
+    index = load_index(directory)
+    index.refresh()
     
-    for filepath in jpg_files:
-        if filepath.is_file():
-            file_hash = calculate_file_hash(filepath)
-            hash_map[file_hash].append(filepath)
+    names = [name for name in index.entries if Path(name).suffix.lower() in ('.jpg', '.jpeg')]
+    computed = index.fill_batch(names, method, lambda paths: perceptual_hashes(paths, method))
+    index.save()
     
-    # Filter to only duplicates (hash with more than one file)
-    duplicates = {k: v for k, v in hash_map.items() if len(v) > 1}
+    hashes = {index.path(name): index.entries[name][method] for name in names
+              if index.entries[name][method] is not None}
+    print(f"Scanning {len(names)} image files by {method} ({computed} hashed, "
+          f"{len(names) - computed} from the index), max distance {max_distance} bits...")
     
-    return duplicates
+    return similar_clusters(hashes, max_distance), hashes
 
 
 def format_size(bytes: int) -> str:
@@ -111,36 +167,41 @@ def format_size(bytes: int) -> str:
     return f"{bytes:.2f} TB"
 
 
-def main():
-    # Check for --yes flag
-    auto_confirm = '--yes' in sys.argv or '-y' in sys.argv
-    
-    output_dir = Path(__file__).parent / "output"
-    
-    if not output_dir.exists():
-        print(f"Error: Directory {output_dir} does not exist")
-        return
-    
-    print("=" * 80)
-    print("DUPLICATE IMAGE DETECTION AND REMOVAL")
-    print("=" * 80)
-    print()
-    
-    # Find duplicates
-    duplicates = find_duplicates(output_dir)
-    
-    if not duplicates:
-        print("✓ No duplicate images found!")
-        return
-    
-    print(f"Found {len(duplicates)} groups of duplicate images\n")
-    
-    # Analyze each duplicate group
+def split_clusters(clusters: List[List[Path]],
+                   deleted: Set[Path]) -> Tuple[List[List[Path]], List[List[Path]]]:
+    """
+    Split clusters of similar images by player, leaving out files already
+    marked for deletion as exact duplicates. Players are told apart by the
+    full photo key, so "9900922363.jpg" and "9900922363-11.jpg" are two
+    players sharing a phone number. A cluster spanning several players is
+    left for review as a whole, and none of its files are deleted.
+    Returns: (groups of one player's near-duplicates, clusters spanning several players)
+    """
+    groups = []
+    review = []
+    for cluster in clusters:
+        files = [f for f in cluster if f not in deleted]
+        keys = set()
+        for f in files:
+            parsed = parse_photo_name(f.stem)
+            keys.add(parsed[0] if parsed else f.stem)
+        if len(keys) > 1:
+            review.append(files)
+        elif len(files) > 1:
+            groups.append(files)
+    return groups, review
+
+
+def plan_deletions(groups: List[List[Path]], title: str = "Duplicate Group") -> Tuple[List[Path], int]:
+    """
+    Print each group, keeping its best quality file.
+    Returns: (files to delete, bytes freed)
+    """
     files_to_delete = []
     total_space_to_free = 0
     
-    for idx, (file_hash, files) in enumerate(duplicates.items(), 1):
-        print(f"\nDuplicate Group {idx} ({len(files)} files):")
+    for idx, files in enumerate(groups, 1):
+        print(f"\n{title} {idx} ({len(files)} files):")
         print("-" * 60)
         
         # Select best quality file
@@ -162,12 +223,85 @@ def main():
                 files_to_delete.append(f)
                 total_space_to_free += info[2]
     
+    return files_to_delete, total_space_to_free
+
+
+def print_review(review: List[List[Path]], hashes: Dict[Path, int]) -> None:
+    """List similar images filed under different players, with how far apart they are; none are deleted."""
+    from photo_similarity import cluster_distance
+    
+    for idx, files in enumerate(review, 1):
+        print(f"\nReview Group {idx} ({len(files)} files, different players, "
+              f"up to {cluster_distance(files, hashes)} bits apart - nothing deleted):")
+        print("-" * 60)
+        for f in files:
+            width, height, size = get_image_info(f)
+            print(f"  REVIEW: {f.name} ({width}x{height}, {format_size(size)})")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Detect and remove duplicate player photos.")
+    parser.add_argument('--yes', '-y', action='store_true', help="delete without asking")
+    parser.add_argument('--similar', action='store_true',
+                        help="also find resized or recompressed copies by perceptual hash")
+    parser.add_argument('--method', choices=['phash', 'dhash'], default='phash',
+                        help="perceptual hash used by --similar (default: phash)")
+    parser.add_argument('--distance', type=int, default=8,
+                        help="bits two perceptual hashes may differ by and still match (default: 8)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    auto_confirm = args.yes
+    
+    # Stage metrics are enabled through BCL_PROFILE / BCL_METRICS
+    metrics.start('remove_duplicates')
+    
+    output_dir = photos_dir()
+    
+    if not output_dir.exists():
+        print(f"Error: Directory {output_dir} does not exist")
+        return
+    
+    print("=" * 80)
+    print("DUPLICATE IMAGE DETECTION AND REMOVAL")
+    print("=" * 80)
+    print()
+    
+    # Find duplicates
+    duplicates = find_duplicates(output_dir)
+    clusters, hashes = find_similar(output_dir, args.method, args.distance) if args.similar else ([], {})
+    
+    if not duplicates and not clusters:
+        print("✓ No duplicate images found!")
+        return
+    
+    print(f"Found {len(duplicates)} groups of duplicate images\n")
+    
+    # Analyze each duplicate group
+    files_to_delete, total_space_to_free = plan_deletions(list(duplicates.values()))
+    
+    # Near-duplicates are only removed among one player's photos
+    similar_groups, review = split_clusters(clusters, set(files_to_delete))
+    if args.similar:
+        print(f"\nFound {len(clusters)} clusters of similar images: {len(similar_groups)} groups of "
+              f"one player's photos, {len(review)} spanning several players")
+        similar_files, similar_space = plan_deletions(similar_groups, "Similar Group")
+        files_to_delete += similar_files
+        total_space_to_free += similar_space
+        print_review(review, hashes)
+    
     # Summary
     print("\n" + "=" * 80)
     print("SUMMARY")
     print("=" * 80)
     print(f"Total duplicate groups: {len(duplicates)}")
     print(f"Files to keep: {len(duplicates)}")
+    if args.similar:
+        print(f"Similar groups: {len(similar_groups)}")
+        print(f"Groups left for review: {len(review)}")
     print(f"Files to delete: {len(files_to_delete)}")
     print(f"Space to free: {format_size(total_space_to_free)}")
     print()
@@ -191,6 +325,11 @@ def main():
                 except Exception as e:
                     print(f"  ✗ Error deleting {f.name}: {e}")
             
+            # Drop the deleted files from the asset index
+            index = load_index(output_dir)
+            index.refresh()
+            index.save()
+            
             print(f"\n✓ Successfully deleted {deleted_count} duplicate files")
             print(f"✓ Freed {format_size(total_space_to_free)} of disk space")
         else:
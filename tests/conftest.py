@@ -0,0 +1,73 @@
+"""
+Scratch Postgres databases for the SQL generated by the scripts.
+
+Tests using `schema_database` are skipped unless psql is on the PATH and
+can create a database, using $DATABASE_URL or the usual PG* environment
+variables to connect. Each test module gets its own database, created
+from migrations 001 and 002 and dropped afterwards.
+"""
+
+import os
+import shutil
+import subprocess
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+MIGRATIONS = [REPO_DIR / "supabase" / "migrations" / name
+              for name in ("001_initial_schema.sql", "002_add_player_fields.sql")]
+
+# Plain Postgres builds may not ship uuid-ossp; gen_random_uuid() is built in
+UUID_EXTENSION = 'CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'
+UUID_FALLBACK = "CREATE FUNCTION uuid_generate_v4() RETURNS uuid AS 'SELECT gen_random_uuid()' LANGUAGE sql;"
+
+
+def psql_command():
+    """psql arguments for the server under test, or None if there is no psql."""
+    psql = shutil.which('psql')
+    if psql is None:
+        return None
+    command = [psql, '-X', '-q', '-A', '-t', '-v', 'ON_ERROR_STOP=1']
+    return command + [os.environ['DATABASE_URL']] if os.environ.get('DATABASE_URL') else command
+
+
+def scratch_command(command, name):
+    """The psql command connected to the scratch database `name`."""
+    if os.environ.get('DATABASE_URL'):
+        return command[:-1] + [urlsplit(command[-1])._replace(path=f"/{name}").geturl()]
+    return command + ['-d', name]
+
+
+def run_sql(command, sql) -> str:
+    """Output of a script run with psql; raises RuntimeError with psql's errors if it fails."""
+    result = subprocess.run(command, input=sql, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip())
+    return result.stdout
+
+
+@pytest.fixture(scope='module')
+def schema_database():
+    """psql command for a scratch database with the schema of migrations 001 and 002."""
+    command = psql_command()
+    if command is None:
+        pytest.skip("psql is not available")
+    name = f"bcl_test_{uuid.uuid4().hex[:12]}"
+    try:
+        run_sql(command, f"CREATE DATABASE {name};")
+    except (RuntimeError, OSError) as e:
+        pytest.skip(f"cannot create a scratch database: {e}")
+
+    scratch = scratch_command(command, name)
+    try:
+        schema = '\n'.join(path.read_text(encoding='utf-8') for path in MIGRATIONS)
+        if not run_sql(scratch, "SELECT 1 FROM pg_available_extensions WHERE name = 'uuid-ossp';").strip():
+            schema = schema.replace(UUID_EXTENSION, UUID_FALLBACK)
+        run_sql(scratch, schema)
+        yield scratch
+    finally:
+        run_sql(command, f"DROP DATABASE IF EXISTS {name};")
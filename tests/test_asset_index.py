@@ -0,0 +1,67 @@
+"""
+Photo lookup for players who share a phone number, with the roster rows and
+photo names of Devendra and Vaibhav D.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "output"
+sys.path.insert(0, str(OUTPUT_DIR))
+from asset_index import AssetIndex, parse_photo_name
+from deck_manifest import slide_keys
+from roster import load_roster, normalize_phone
+
+# The two rows of supabase/roster.tsv sharing 9900922363
+ROSTER_TSV = (
+    "Devendra\t40 years\tAll Rounder\t9900922363\tRegular\t26\tY\t26\tDevendra\n"
+    "Vaibhav D\t14 years\tAll Rounder\t9900922363-1\tRegular\t138\tY\t138\tVaibhav D\n"
+)
+
+
+@pytest.fixture
+def players(tmp_path):
+    roster = tmp_path / "roster.tsv"
+    roster.write_text(ROSTER_TSV, encoding='utf-8')
+    return load_roster(roster)
+
+
+def write_photos(images_dir: Path, *stems: str) -> None:
+    for stem in stems:
+        Image.new('RGB', (8, 8)).save(images_dir / f"{stem}.jpg")
+
+
+def photo_map(images_dir: Path, players) -> dict:
+    index = AssetIndex(images_dir)
+    index.refresh()
+    return {phone: path.name for phone, path in index.phone_map(p.phone for p in players).items()}
+
+
+def test_suffixed_phone_is_a_slide_key(players):
+    assert [player.phone for player in players] == ['9900922363', '9900922363-1']
+    assert all(player.has_phone for player in players)
+    assert normalize_phone('+91 99009 22363-1') == '9900922363-1'
+    assert slide_keys([player.phone for player in players]) == ['9900922363', '9900922363-1']
+
+
+def test_each_player_gets_their_own_photo(tmp_path, players):
+    write_photos(tmp_path, '9900922363', '9900922363-11')
+
+    assert photo_map(tmp_path, players) == {'9900922363': '9900922363.jpg', '9900922363-1': '9900922363-11.jpg'}
+
+
+def test_suffixed_photo_is_not_a_copy_of_the_plain_one(tmp_path, players):
+    write_photos(tmp_path, '9900922363-11')
+
+    assert parse_photo_name('9900922363-11') == ('9900922363-11', 0)
+    assert photo_map(tmp_path, players) == {'9900922363-1': '9900922363-11.jpg'}
+
+
+def test_copies_belong_to_the_same_player(tmp_path, players):
+    write_photos(tmp_path, '9900922363_2', '9900922363 (1)', '9900922363-11')
+
+    assert parse_photo_name('9900922363 (1)') == ('9900922363', 1)
+    assert photo_map(tmp_path, players) == {'9900922363': '9900922363 (1).jpg', '9900922363-1': '9900922363-11.jpg'}
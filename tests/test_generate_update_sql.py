@@ -0,0 +1,63 @@
+"""
+The --bulk roster UPDATE on a local Postgres (see conftest.py).
+"""
+
+import sys
+
+import pytest
+
+from conftest import REPO_DIR, run_sql
+
+sys.path.insert(0, str(REPO_DIR))
+from generate_update_sql import UPDATE_COLUMNS, bulk_update_statement
+
+# (name, category, phone) already in the table
+PLAYERS = [
+    ('Arjun', 'Batsman', '9000000001'),
+    ('Ravi', 'Bowler', '9000000002'),
+]
+
+
+def roster_player(phone: str, name: str, serial=None, jersey=None) -> dict:
+    """A player as parse_players() reads them from the roster."""
+    return {
+        'name': name,
+        'age': '',
+        'category': 'Batsman',
+        'phone': phone,
+        'player_type': 'Regular',
+        'auction_serial_number': serial,
+        'is_valid_player': 'Y',
+        'jersey_number': jersey,
+        'jersey_name': name,
+    }
+
+
+@pytest.fixture(scope='module')
+def database(schema_database):
+    """psql command for a scratch database with the schema and sample players."""
+    players = ', '.join(f"('{name}', '{category}', '{phone}', '/players/{phone}.jpg')"
+                        for name, category, phone in PLAYERS)
+    run_sql(schema_database, f"INSERT INTO players (name, category, phone, photo_url) VALUES {players};")
+    return schema_database
+
+
+def updated_rows(database, roster) -> list:
+    """Player rows after the bulk update of `roster`, rolled back afterwards."""
+    columns = ', '.join(UPDATE_COLUMNS)
+    sql = '\n'.join(['BEGIN;', *bulk_update_statement(roster),
+                     f"SELECT phone, {columns} FROM players ORDER BY phone;", 'ROLLBACK;'])
+    return [line.split('|') for line in run_sql(database, sql).splitlines()]
+
+
+@pytest.mark.parametrize('roster', [
+    [roster_player('9000000001', 'Arjun K', 7, 10), roster_player('9000000002', "Ravi O'Neil")],
+    # A small diff where the integer columns are NULL in every row
+    [roster_player('9000000002', "Ravi O'Neil")],
+], ids=['mixed', 'all_null_integers'])
+def test_bulk_update_applies_roster(database, roster):
+    rows = {row[0]: row[1:] for row in updated_rows(database, roster)}
+
+    for player in roster:
+        expected = ['' if player[column] is None else str(player[column]) for column in UPDATE_COLUMNS]
+        assert rows[player['phone']] == expected
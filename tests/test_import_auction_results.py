@@ -0,0 +1,89 @@
+"""
+The bulk auction results import against the trigger path, on a local
+Postgres (see conftest.py).
+"""
+
+import json
+import sys
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from conftest import REPO_DIR, run_sql
+
+sys.path.insert(0, str(REPO_DIR))
+from import_auction_results import (STATE_QUERY, bulk_statements, load_results, staging_statements,
+                                    trigger_statements)
+
+TEAMS = ['Sharks', 'Titans', 'Riders']
+
+# (name, category, phone); the two Ravis are told apart by category or phone
+PLAYERS = [
+    ('Arjun', 'Batsman', '9000000001'),
+    ('Ravi', 'Bowler', '9000000002'),
+    ('Ravi', 'Batsman', '9000000003'),
+    ('Kiran', 'All-rounder', '9000000004'),
+    ('Manoj', 'Bowler', '9000000005'),
+    ('Suresh', 'Batsman', '9000000006'),
+    ('Deepak', 'Bowler', '9000000007'),
+]
+
+SAMPLE_CSV = '''Order,Player Name,Category,Team,Amount,Sold At,Phone
+1,Arjun,Batsman,Sharks,"5,000","03/04/2025, 10:15:00 pm",
+2,Ravi,Bowler,Titans,4500,"03/04/2025, 10:20:00 pm",
+3,Ravi,,Sharks,3000,2025-04-03T17:00:00Z,9000000003
+4,Kiran,All-rounder,riders,7000,"03/04/2025, 22:31:00",
+'''
+
+# Sold before the import: (player phone, team, amount, order); the first is also in the export
+EARLIER_SALES = [
+    ('9000000001', 'Riders', 2500, 1),
+    ('9000000006', 'Titans', 6000, 2),
+    ('9000000007', 'Sharks', 4000, 3),
+]
+
+
+@pytest.fixture(scope='module')
+def database(schema_database):
+    """psql command for a scratch database with the schema and sample teams and players."""
+    teams = ', '.join(f"('{team}', '/logos/{team}.png')" for team in TEAMS)
+    players = ', '.join(f"('{name}', '{category}', '{phone}', '/players/{phone}.jpg')"
+                        for name, category, phone in PLAYERS)
+    run_sql(schema_database, f'''INSERT INTO teams (name, logo_url) VALUES {teams};
+INSERT INTO players (name, category, phone, photo_url) VALUES {players};''')
+    return schema_database
+
+
+@pytest.fixture(scope='module')
+def results(tmp_path_factory):
+    csv_path = tmp_path_factory.mktemp('import') / 'results.csv'
+    csv_path.write_text(SAMPLE_CSV, encoding='utf-8')
+    return load_results(csv_path, ZoneInfo('Asia/Kolkata'), 'dmy')
+
+
+def earlier_sales(replace: bool) -> str:
+    """Sales already recorded through the app; without --replace they are for players outside the export."""
+    sales = EARLIER_SALES if replace else EARLIER_SALES[1:]
+    return '\n'.join(
+        f'''INSERT INTO auction_results (player_id, team_id, final_amount, auction_order, sold_at)
+SELECT p.id, t.id, {amount}, {order}, '2025-04-03T21:00:00+05:30'
+FROM players p, teams t WHERE p.phone = '{phone}' AND t.name = '{team}';'''
+        for phone, team, amount, order in sales
+    )
+
+
+def import_state(database, results, statements, replace: bool) -> dict:
+    """State after importing the results with `statements`, rolled back afterwards."""
+    sql = '\n'.join(['BEGIN;', earlier_sales(replace), *staging_statements(results), *statements,
+                     f"{STATE_QUERY};", 'ROLLBACK;'])
+    return json.loads(run_sql(database, sql))
+
+
+@pytest.mark.parametrize('replace', [False, True], ids=['add', 'replace'])
+def test_bulk_import_matches_trigger_path(database, results, replace):
+    trigger_state = import_state(database, results, trigger_statements(replace), replace)
+    bulk_state = import_state(database, results, bulk_statements(replace), replace)
+
+    assert bulk_state == trigger_state
+    sold = sum(status == 'sold' for _, status, _ in trigger_state['players'])
+    assert len(trigger_state['results']) == sold == len(results) + (0 if replace else len(EARLIER_SALES) - 1)